@@ -1,5 +1,5 @@
 import { type NextRequest, NextResponse } from "next/server"
-import { spawn } from "child_process"
+import { spawn, type ChildProcessWithoutNullStreams } from "child_process"
 import path from "path"
 
 interface WalletAnalysisRequest {
@@ -117,46 +117,109 @@ async function fetchWalletData(walletAddress: string) {
   return mockData
 }
 
-async function runAIAnalysis(walletAddress: string, walletData: any, options: any): Promise<any> {
-  return new Promise((resolve, reject) => {
-    const pythonScript = path.join(process.cwd(), "lib", "ai-microservice.py")
-    const python = spawn("python3", [pythonScript])
-
-    let result = ""
-    let error = ""
+// Long-lived Python worker shared across requests so models stay warm
+let aiWorker: ChildProcessWithoutNullStreams | null = null
+let nextRequestId = 0
+// A hung or overloaded worker must not hold the HTTP request open forever
+const AI_ANALYSIS_TIMEOUT_MS = Number(process.env.AI_ANALYSIS_TIMEOUT_MS ?? 30000)
+const pendingAnalyses = new Map<
+  string,
+  { resolve: (value: any) => void; reject: (reason: Error) => void; timer: NodeJS.Timeout }
+>()
+
+function settleAnalysis(requestId: string) {
+  const pending = pendingAnalyses.get(requestId)
+  if (!pending) return undefined
+  pendingAnalyses.delete(requestId)
+  clearTimeout(pending.timer)
+  return pending
+}
 
-    python.stdout.on("data", (data) => {
-      result += data.toString()
-    })
+function failWorker(worker: ChildProcessWithoutNullStreams, error: Error) {
+  // Only the current worker owns the pending requests; a replaced one has none left
+  if (aiWorker !== worker) return
+  aiWorker = null
+  for (const requestId of Array.from(pendingAnalyses.keys())) {
+    settleAnalysis(requestId)?.reject(error)
+  }
+  if (worker.exitCode === null && !worker.killed) {
+    worker.kill()
+  }
+}
 
-    python.stderr.on("data", (data) => {
-      error += data.toString()
-    })
+function getAIWorker(): ChildProcessWithoutNullStreams {
+  if (aiWorker) {
+    return aiWorker
+  }
 
-    python.on("close", (code) => {
-      if (code === 0) {
-        try {
-          // Parse the result from Python script
-          const lines = result.trim().split("\n")
-          const lastLine = lines[lines.length - 1]
-          const analysisResult = JSON.parse(lastLine)
-          resolve(analysisResult)
-        } catch (parseError) {
-          reject(new Error(`Failed to parse Python output: ${parseError}`))
+  const pythonScript = path.join(process.cwd(), "lib", "ai-microservice.py")
+  const worker = spawn("python3", [pythonScript, "--worker"])
+  let buffered = ""
+
+  worker.stdout.on("data", (data) => {
+    buffered += data.toString()
+    const lines = buffered.split("\n")
+    buffered = lines.pop() ?? ""
+
+    for (const line of lines) {
+      if (!line.trim()) continue
+      try {
+        // Each response line carries the id of the request it answers
+        const message = JSON.parse(line)
+        const pending = settleAnalysis(message.id)
+        if (!pending) continue
+        if (message.error) {
+          pending.reject(new Error(`Python worker error: ${message.error}`))
+        } else {
+          pending.resolve(message.result)
         }
-      } else {
-        reject(new Error(`Python script failed with code ${code}: ${error}`))
+      } catch (parseError) {
+        console.error(`Failed to parse Python worker output: ${parseError}`)
       }
-    })
+    }
+  })
 
-    // Send data to Python script
+  worker.stderr.on("data", (data) => {
+    console.error(`AI worker: ${data.toString().trim()}`)
+  })
+
+  // Spawn failures (e.g. python3 missing) and EPIPE on a dead worker arrive as
+  // "error" events, which crash the server process if left unhandled
+  worker.on("error", (error) => {
+    console.error("AI worker error:", error)
+    failWorker(worker, new Error(`Python worker error: ${error.message}`))
+  })
+
+  worker.stdin.on("error", (error) => {
+    console.error("AI worker stdin error:", error)
+    failWorker(worker, new Error(`Python worker stdin error: ${error.message}`))
+  })
+
+  worker.on("close", (code) => {
+    failWorker(worker, new Error(`Python worker exited with code ${code}`))
+  })
+
+  aiWorker = worker
+  return worker
+}
+
+async function runAIAnalysis(walletAddress: string, walletData: any, options: any): Promise<any> {
+  return new Promise((resolve, reject) => {
+    const worker = getAIWorker()
+    const requestId = `req_${++nextRequestId}`
+    const timer = setTimeout(() => {
+      settleAnalysis(requestId)?.reject(new Error(`Python worker timed out after ${AI_ANALYSIS_TIMEOUT_MS}ms`))
+    }, AI_ANALYSIS_TIMEOUT_MS)
+    pendingAnalyses.set(requestId, { resolve, reject, timer })
+
+    // Send one newline-delimited request to the worker
     const inputData = {
+      id: requestId,
       wallet_address: walletAddress,
       wallet_data: walletData,
       options: options,
     }
-    python.stdin.write(JSON.stringify(inputData))
-    python.stdin.end()
+    worker.stdin.write(JSON.stringify(inputData) + "\n")
   })
 }
 
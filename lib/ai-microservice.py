@@ -1,28 +1,267 @@
 import numpy as np
-import pandas as pd
-import onnxruntime as ort
-from prophet import Prophet
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import StandardScaler
-import joblib
 import json
 from datetime import datetime, timedelta
 import asyncio
-import aiohttp
-from typing import Dict, List, Any, Optional
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Iterable, Iterator, List, Any, Optional, Tuple
+from collections import OrderedDict, deque
+from contextlib import nullcontext
+from contextvars import ContextVar, copy_context
+from types import SimpleNamespace
+from abc import ABC, abstractmethod
+import argparse
+import copy
+import hashlib
+import itertools
 import logging
+import os
+import pickle
+import sys
+import threading
+import time
+
+# Shared modules live next to this script, which is run directly rather than imported as a package
+_LIB_DIR = os.path.dirname(os.path.abspath(__file__))
+if _LIB_DIR not in sys.path:
+    sys.path.insert(0, _LIB_DIR)
+from request_profiler import ProfileCapture, RequestProfiler
+from wallet_feature_store import WalletFeatureStore
+
+# Heavy dependencies (pandas, prophet, onnxruntime, sklearn, joblib) are imported
+# on first use of the component that needs them to keep worker cold start fast
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    import pandas as pd
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Per-request timings dict that LatencyMetrics timers also record into
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar('request_timings', default=None)
+
+class LatencyMetrics:
+    """In-process latency summaries for analysis stages and model calls
+    
+    Every observation updates a per-operation count and sum plus a sliding
+    window of recent samples used for p50/p95/p99, and is also added to the
+    current request's timings (see ``request_timings``). When disabled,
+    ``timer`` returns a shared no-op context manager so instrumented code
+    pays only an attribute check.
+    """
+    
+    QUANTILES = (0.5, 0.95, 0.99)
+    
+    def __init__(self, enabled: bool = True, window: int = 2048):
+        self.enabled = enabled
+        self.window = window
+        self._series: Dict[str, List] = {}  # operation -> [count, sum_ms, recent samples]
+        self._lock = threading.Lock()
+    
+    def timer(self, operation: str):
+        """Context manager timing a block with the monotonic clock"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _LatencyTimer(self, operation)
+    
+    def observe(self, operation: str, elapsed_ms: float):
+        """Record one latency sample in milliseconds"""
+        with self._lock:
+            series = self._series.get(operation)
+            if series is None:
+                series = self._series[operation] = [0, 0.0, deque(maxlen=self.window)]
+            series[0] += 1
+            series[1] += elapsed_ms
+            series[2].append(elapsed_ms)
+        
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[operation] = timings.get(operation, 0.0) + elapsed_ms
+    
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Return count, sum and p50/p95/p99 (over the recent window) per operation"""
+        with self._lock:
+            series = {name: (count, total, list(samples)) for name, (count, total, samples) in self._series.items()}
+        
+        summary = {}
+        for name, (count, total, samples) in sorted(series.items()):
+            percentiles = np.percentile(samples, [q * 100 for q in self.QUANTILES])
+            summary[name] = {'count': count, 'sum_ms': total}
+            for q, value in zip(self.QUANTILES, percentiles):
+                summary[name][f'p{int(q * 100)}_ms'] = float(value)
+        return summary
+    
+    def render_prometheus(self, prefix: str = 'chainsignal_ai') -> str:
+        """Render the latency summaries in Prometheus text exposition format"""
+        metric = f'{prefix}_operation_duration_seconds'
+        lines = [
+            f'# HELP {metric} Latency of AI analysis stages and model calls',
+            f'# TYPE {metric} summary'
+        ]
+        for name, summary in self.snapshot().items():
+            for q in self.QUANTILES:
+                value = summary[f'p{int(q * 100)}_ms'] / 1000
+                lines.append(f'{metric}{{operation="{name}",quantile="{q}"}} {value:.9f}')
+            lines.append(f'{metric}_sum{{operation="{name}"}} {summary["sum_ms"] / 1000:.9f}')
+            lines.append(f'{metric}_count{{operation="{name}"}} {summary["count"]}')
+        return '\n'.join(lines) + '\n'
+    
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+    
+    def request_timings(self) -> 'RequestTimings':
+        """Collect every timer that fires in the current context into one dict"""
+        return RequestTimings(self.enabled)
+
+class _LatencyTimer:
+    """Times one block and reports it to LatencyMetrics"""
+    
+    __slots__ = ('metrics', 'operation', 'started')
+    
+    def __init__(self, metrics: LatencyMetrics, operation: str):
+        self.metrics = metrics
+        self.operation = operation
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.operation, (time.perf_counter() - self.started) * 1000)
+        return False
+
+class RequestTimings:
+    """Scope binding a fresh timings dict to the current context
+    
+    Executor work must be submitted through ``bind`` so the worker thread
+    sees the same dict (run_in_executor does not propagate context vars).
+    """
+    
+    def __init__(self, enabled: bool):
+        self.timings: Optional[Dict[str, float]] = {} if enabled else None
+        self._token = None
+    
+    def __enter__(self):
+        self._token = _request_timings.set(self.timings)
+        return self
+    
+    def __exit__(self, *exc_info):
+        _request_timings.reset(self._token)
+        return False
+    
+    def bind(self, fn):
+        """Wrap fn to run in a copy of the current context"""
+        if self.timings is None:
+            return fn
+        context = copy_context()
+        return lambda: context.run(fn)
+    
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(ms, 3) for name, ms in (self.timings or {}).items()}
+
+_NULL_TIMER = nullcontext()
+
+# Process-wide metrics; AI_METRICS_ENABLED=0 turns timing into a no-op
+metrics = LatencyMetrics(enabled=os.getenv('AI_METRICS_ENABLED', '1') == '1')
+
+class OnnxSessionRegistry:
+    """Process-wide registry of ONNX Runtime sessions
+    
+    Sessions are keyed by model path and session options, so every classifier
+    (and every concurrent analysis) using the same configuration shares one
+    optimized session. InferenceSession.run is thread-safe.
+    """
+    
+    # Defaults can be overridden per process via environment, e.g. ORT_INTRA_OP_THREADS=4
+    DEFAULT_CONFIG = {
+        'intra_op_num_threads': int(os.getenv('ORT_INTRA_OP_THREADS', '0')),  # 0 = ORT default
+        'inter_op_num_threads': int(os.getenv('ORT_INTER_OP_THREADS', '0')),
+        'graph_optimization_level': os.getenv('ORT_GRAPH_OPTIMIZATION_LEVEL', 'all'),
+        'execution_mode': os.getenv('ORT_EXECUTION_MODE', 'sequential'),
+        'enable_cpu_mem_arena': os.getenv('ORT_ENABLE_CPU_MEM_ARENA', '1') == '1',
+        'enable_mem_pattern': os.getenv('ORT_ENABLE_MEM_PATTERN', '1') == '1',
+        'allow_spinning': os.getenv('ORT_ALLOW_SPINNING', '1') == '1',
+    }
+    
+    _sessions: Dict[tuple, Any] = {}
+    _lock = threading.Lock()
+    
+    @classmethod
+    def get_session(cls, model_path: str, session_config: Optional[Dict] = None):
+        """Return the shared session for model_path, creating it on first use"""
+        config = {**cls.DEFAULT_CONFIG, **(session_config or {})}
+        key = (os.path.abspath(model_path), tuple(sorted(config.items())))
+        
+        with cls._lock:
+            session = cls._sessions.get(key)
+            if session is None:
+                import onnxruntime as ort
+                session = ort.InferenceSession(
+                    model_path,
+                    sess_options=cls._build_session_options(config),
+                    providers=['CPUExecutionProvider']
+                )
+                cls._sessions[key] = session
+                logger.info(f"ONNX session created for {model_path} with {config}")
+            return session
+    
+    @classmethod
+    def clear(cls):
+        """Drop all shared sessions (e.g. after a model file is replaced)"""
+        with cls._lock:
+            cls._sessions.clear()
+    
+    @staticmethod
+    def _build_session_options(config: Dict):
+        """Translate a session config dict into ort.SessionOptions"""
+        import onnxruntime as ort
+        
+        optimization_levels = {
+            'disable': ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+            'basic': ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+            'extended': ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+            'all': ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        }
+        execution_modes = {
+            'sequential': ort.ExecutionMode.ORT_SEQUENTIAL,
+            'parallel': ort.ExecutionMode.ORT_PARALLEL
+        }
+        
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = config['intra_op_num_threads']
+        options.inter_op_num_threads = config['inter_op_num_threads']
+        options.graph_optimization_level = optimization_levels[config['graph_optimization_level']]
+        options.execution_mode = execution_modes[config['execution_mode']]
+        options.enable_cpu_mem_arena = config['enable_cpu_mem_arena']
+        options.enable_mem_pattern = config['enable_mem_pattern']
+        # Spinning idle threads burn CPU that co-located workers could use
+        options.add_session_config_entry(
+            'session.intra_op.allow_spinning', '1' if config['allow_spinning'] else '0'
+        )
+        options.add_session_config_entry(
+            'session.inter_op.allow_spinning', '1' if config['allow_spinning'] else '0'
+        )
+        return options
+
 class WalletBehaviorClassifier:
     """Advanced wallet behavior classification using ONNX runtime"""
     
-    def __init__(self, model_path: str = "models/wallet_classifier.onnx"):
+    # Bump when the scaler artifact layout changes
+    SCALER_ARTIFACT_VERSION = 1
+    
+    def __init__(self, model_path: str = "models/wallet_classifier.onnx",
+                 scaler_path: Optional[str] = None, session_config: Optional[Dict] = None,
+                 feature_store: Optional['WalletFeatureStore'] = None):
         self.model_path = model_path
+        # Optional incremental feature state, used when a wallet address is given
+        self.feature_store = feature_store
+        # Overrides for OnnxSessionRegistry.DEFAULT_CONFIG (thread counts, optimization level, ...)
+        self.session_config = session_config
+        # Fitted scaler statistics live next to the model, e.g. models/wallet_classifier.scaler.json
+        self.scaler_path = scaler_path or os.path.splitext(model_path)[0] + ".scaler.json"
         self.session = None
-        self.scaler = StandardScaler()
+        self.feature_mean = None
+        self.feature_inv_scale = None
         self.feature_names = [
             'transaction_frequency', 'avg_transaction_size', 'total_volume',
             'unique_counterparties', 'time_variance', 'round_number_ratio',
@@ -37,50 +276,158 @@ class WalletBehaviorClassifier:
     def load_model(self):
         """Load ONNX model for inference"""
         try:
-            self.session = ort.InferenceSession(self.model_path)
+            self.session = OnnxSessionRegistry.get_session(self.model_path, self.session_config)
             logger.info(f"ONNX model loaded from {self.model_path}")
         except Exception as e:
             logger.error(f"Failed to load ONNX model: {e}")
             # Fallback to sklearn model
+            import joblib
             self.session = joblib.load("models/wallet_classifier_sklearn.pkl")
+        
+        self.load_scaler()
+    
+    def load_scaler(self):
+        """Load the persisted feature scaler statistics saved alongside the model"""
+        n_features = len(self.feature_names)
+        try:
+            with open(self.scaler_path) as f:
+                artifact = json.load(f)
+            
+            if artifact.get('version') != self.SCALER_ARTIFACT_VERSION:
+                raise ValueError(f"unsupported scaler artifact version {artifact.get('version')}")
+            if artifact.get('feature_names') != self.feature_names:
+                raise ValueError("scaler artifact feature names do not match the classifier")
+            
+            self._set_scaler(np.asarray(artifact['mean']), np.asarray(artifact['scale']))
+            logger.info(f"Feature scaler loaded from {self.scaler_path}")
+            
+        except Exception as e:
+            logger.error(f"Failed to load feature scaler, using unscaled features: {e}")
+            self._set_scaler(np.zeros(n_features), np.ones(n_features))
+    
+    def fit_scaler(self, features: np.ndarray):
+        """Fit scaler statistics on a training feature matrix (StandardScaler semantics)"""
+        features = np.asarray(features, dtype=np.float64)
+        scale = features.std(axis=0)
+        scale[scale == 0] = 1.0
+        self._set_scaler(features.mean(axis=0), scale)
+    
+    def save_scaler(self, path: Optional[str] = None):
+        """Persist the fitted scaler statistics as a versioned JSON artifact"""
+        artifact = {
+            'version': self.SCALER_ARTIFACT_VERSION,
+            'feature_names': self.feature_names,
+            'mean': self.feature_mean.tolist(),
+            'scale': (1.0 / self.feature_inv_scale).tolist(),
+            'created_at': datetime.now().isoformat()
+        }
+        with open(path or self.scaler_path, 'w') as f:
+            json.dump(artifact, f, indent=2)
     
-    def extract_features(self, wallet_data: Dict) -> np.ndarray:
+    def _set_scaler(self, mean: np.ndarray, scale: np.ndarray):
+        """Precompute the affine transform used to normalize features"""
+        self.feature_mean = mean.astype(np.float32)
+        self.feature_inv_scale = (1.0 / scale).astype(np.float32)
+    
+    def extract_features(self, wallet_data: Dict, wallet_address: Optional[str] = None) -> np.ndarray:
         """Extract features from wallet transaction data"""
-        features = {}
+        return np.array([self._feature_values(wallet_data, wallet_address)]).reshape(1, -1)
+    
+    def extract_features_batch(self, wallets: List[Dict],
+                               errors: Optional[Dict[int, str]] = None,
+                               wallet_addresses: Optional[List[str]] = None) -> np.ndarray:
+        """Extract an (N, n_features) float32 feature matrix for many wallets
+        
+        If an errors dict is passed, wallets whose features cannot be extracted
+        are recorded there by row index (their row is left as zeros) instead of
+        failing the whole batch. With a feature store, wallet_addresses (one
+        per wallet) lets each row be refreshed from only its new transactions.
+        """
+        features = np.zeros((len(wallets), len(self.feature_names)), dtype=np.float32)
+        for row, wallet_data in enumerate(wallets):
+            try:
+                wallet_address = wallet_addresses[row] if wallet_addresses else None
+                features[row] = self._feature_values(wallet_data, wallet_address)
+            except Exception as e:
+                if errors is None:
+                    raise
+                errors[row] = str(e)
+        return features
+    
+    def _feature_values(self, wallet_data: Dict, wallet_address: Optional[str] = None) -> List[float]:
+        """Compute one wallet's feature values, in feature_names order"""
+        if self.feature_store is not None and wallet_address:
+            return self._feature_values_from_state(wallet_data, self.feature_store.update(wallet_address, wallet_data))
         
         # Transaction frequency features
         tx_count = wallet_data.get('transaction_count', 0)
         time_span = wallet_data.get('activity_span_days', 1)
-        features['transaction_frequency'] = tx_count / max(time_span, 1)
+        transaction_frequency = tx_count / max(time_span, 1)
         
         # Volume and size features
         total_volume = wallet_data.get('total_volume', 0)
-        features['avg_transaction_size'] = total_volume / max(tx_count, 1)
-        features['total_volume'] = np.log10(max(total_volume, 1))
+        avg_transaction_size = total_volume / max(tx_count, 1)
+        log_total_volume = np.log10(max(total_volume, 1))
         
         # Network features
-        features['unique_counterparties'] = len(wallet_data.get('counterparties', []))
+        unique_counterparties = len(wallet_data.get('counterparties', []))
         
         # Temporal patterns
         tx_timestamps = wallet_data.get('transaction_timestamps', [])
         if len(tx_timestamps) > 1:
             intervals = np.diff(sorted(tx_timestamps))
-            features['time_variance'] = np.var(intervals) if len(intervals) > 0 else 0
+            time_variance = np.var(intervals) if len(intervals) > 0 else 0
         else:
-            features['time_variance'] = 0
+            time_variance = 0
         
         # Behavioral patterns
-        features['round_number_ratio'] = self._calculate_round_number_ratio(wallet_data)
-        features['consolidation_ratio'] = self._calculate_consolidation_ratio(wallet_data)
-        features['mixing_score'] = self._calculate_mixing_score(wallet_data)
-        features['exchange_interaction'] = self._calculate_exchange_interaction(wallet_data)
-        features['dormancy_periods'] = self._calculate_dormancy_periods(wallet_data)
-        features['gas_price_sensitivity'] = self._calculate_gas_sensitivity(wallet_data)
-        features['utxo_age_distribution'] = self._calculate_utxo_age_distribution(wallet_data)
-        
-        # Convert to numpy array in correct order
-        feature_vector = np.array([features[name] for name in self.feature_names])
-        return feature_vector.reshape(1, -1)
+        return [
+            transaction_frequency,
+            avg_transaction_size,
+            log_total_volume,
+            unique_counterparties,
+            time_variance,
+            self._calculate_round_number_ratio(wallet_data),
+            self._calculate_consolidation_ratio(wallet_data),
+            self._calculate_mixing_score(wallet_data),
+            self._calculate_exchange_interaction(wallet_data),
+            self._calculate_dormancy_periods(wallet_data),
+            self._calculate_gas_sensitivity(wallet_data),
+            self._calculate_utxo_age_distribution(wallet_data),
+        ]
+    
+    def _feature_values_from_state(self, wallet_data: Dict, state: Dict[str, Any]) -> List[float]:
+        """Feature values from WalletFeatureStore statistics, matching _feature_values"""
+        tx_count = wallet_data.get('transaction_count', 0)
+        time_span = wallet_data.get('activity_span_days', 1)
+        total_volume = wallet_data.get('total_volume', 0)
+        
+        n_tx = state['tx_count']
+        n_intervals, _, interval_m2 = state['interval_moments']
+        n_fees, fee_mean, fee_m2 = state['fee_moments']
+        
+        counts = state['cp_counts']
+        known_exchanges = wallet_data.get('known_exchange_addresses', set())
+        if len(known_exchanges) < len(counts):
+            exchange_interactions = sum(counts.get(address, 0) for address in known_exchanges)
+        else:
+            exchange_interactions = sum(count for address, count in counts.items() if address in known_exchanges)
+        
+        return [
+            tx_count / max(time_span, 1),
+            total_volume / max(tx_count, 1),
+            np.log10(max(total_volume, 1)),
+            state['cp_total'],
+            interval_m2 / n_intervals if n_intervals else 0,
+            state['round_count'] / n_tx if n_tx else 0.0,
+            state['consolidation_count'] / n_tx if n_tx else 0.0,
+            state['mixing_count'] / n_tx if n_tx else 0.0,
+            exchange_interactions / state['cp_total'] if state['cp_total'] else 0.0,
+            state['long_gap_count'] / n_intervals if n_intervals else 0.0,
+            np.sqrt(fee_m2 / n_fees) / fee_mean if n_fees and fee_mean > 0 else 0.0,
+            # UTXOs are spent as well as created, so their age entropy is recomputed
+            self._calculate_utxo_age_distribution(wallet_data),
+        ]
     
     def _calculate_round_number_ratio(self, wallet_data: Dict) -> float:
         """Calculate ratio of round number transactions"""
@@ -177,54 +524,98 @@ class WalletBehaviorClassifier:
         entropy = -np.sum(probs * np.log2(probs))
         return entropy
     
-    def predict(self, wallet_data: Dict) -> Dict[str, Any]:
+    def predict(self, wallet_data: Dict, wallet_address: Optional[str] = None) -> Dict[str, Any]:
         """Predict wallet entity type and confidence"""
+        return self.predict_batch([wallet_data], wallet_addresses=[wallet_address] if wallet_address else None)[0]
+    
+    def predict_batch(self, wallets: List[Dict], chunk_size: int = 4096,
+                      wallet_addresses: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Predict entity type for many wallets with one model run per chunk
+        
+        Features for each chunk of at most chunk_size wallets are built into a
+        single (N, n_features) float32 matrix, bounding peak memory while
+        amortizing per-call inference overhead across the chunk.
+        """
         if self.session is None:
             self.load_model()
         
-        try:
-            # Extract features
-            features = self.extract_features(wallet_data)
-            features_scaled = self.scaler.fit_transform(features)
-            
-            # ONNX inference
-            if isinstance(self.session, ort.InferenceSession):
-                input_name = self.session.get_inputs()[0].name
+        results = []
+        for start in range(0, len(wallets), chunk_size):
+            chunk = wallets[start:start + chunk_size]
+            chunk_addresses = wallet_addresses[start:start + chunk_size] if wallet_addresses else None
+            try:
+                errors: Dict[int, str] = {}
+                with metrics.timer('classifier_features'):
+                    features = self.extract_features_batch(chunk, errors, chunk_addresses)
+                probabilities = self._predict_proba(self._scale_features(features))
+                for row, wallet_data in enumerate(chunk):
+                    if row in errors:
+                        logger.error(f"Prediction error: {errors[row]}")
+                        results.append({
+                            'entity_type': 'unknown',
+                            'confidence': 0.0,
+                            'risk_score': 0.5,
+                            'error': errors[row]
+                        })
+                    else:
+                        results.append(self._build_prediction(wallet_data, probabilities[row], features[row]))
+                
+            except Exception as e:
+                logger.error(f"Prediction error: {e}")
+                results.extend({
+                    'entity_type': 'unknown',
+                    'confidence': 0.0,
+                    'risk_score': 0.5,
+                    'error': str(e)
+                } for _ in chunk)
+        
+        return results
+    
+    def _scale_features(self, features: np.ndarray) -> np.ndarray:
+        """Normalize a feature matrix with the persisted scaler statistics"""
+        if self.feature_mean is None:
+            self.load_scaler()
+        
+        return (features - self.feature_mean) * self.feature_inv_scale
+    
+    def _predict_proba(self, features_scaled: np.ndarray) -> np.ndarray:
+        """Run the model once over a scaled feature matrix, returning (N, n_classes) probabilities"""
+        import onnxruntime as ort
+        
+        # ONNX inference
+        if isinstance(self.session, ort.InferenceSession):
+            input_name = self.session.get_inputs()[0].name
+            with metrics.timer('onnx_inference'):
                 outputs = self.session.run(None, {input_name: features_scaled.astype(np.float32)})
-                probabilities = outputs[0][0]  # Assuming softmax output
-                predicted_class = np.argmax(probabilities)
-            else:
-                # Fallback sklearn prediction
-                probabilities = self.session.predict_proba(features_scaled)[0]
-                predicted_class = np.argmax(probabilities)
-            
-            # Calculate confidence and risk score
-            confidence = float(np.max(probabilities))
-            entity_type = self.entity_types[predicted_class]
-            risk_score = self._calculate_risk_score(entity_type, confidence, wallet_data)
-            
-            return {
-                'entity_type': entity_type,
-                'confidence': confidence,
-                'risk_score': risk_score,
-                'probabilities': {
-                    self.entity_types[i]: float(prob) 
-                    for i, prob in enumerate(probabilities)
-                },
-                'features': {
-                    name: float(val) for name, val in 
-                    zip(self.feature_names, features[0])
-                }
-            }
-            
-        except Exception as e:
-            logger.error(f"Prediction error: {e}")
-            return {
-                'entity_type': 'unknown',
-                'confidence': 0.0,
-                'risk_score': 0.5,
-                'error': str(e)
+            return np.asarray(outputs[0])  # Assuming softmax output
+        
+        # Fallback sklearn prediction
+        with metrics.timer('sklearn_inference'):
+            return self.session.predict_proba(features_scaled)
+    
+    def _build_prediction(self, wallet_data: Dict, probabilities: np.ndarray,
+                          feature_row: np.ndarray) -> Dict[str, Any]:
+        """Build the per-wallet prediction result from its class probabilities"""
+        predicted_class = np.argmax(probabilities)
+        
+        # Calculate confidence and risk score
+        confidence = float(np.max(probabilities))
+        entity_type = self.entity_types[predicted_class]
+        risk_score = self._calculate_risk_score(entity_type, confidence, wallet_data)
+        
+        return {
+            'entity_type': entity_type,
+            'confidence': confidence,
+            'risk_score': risk_score,
+            'probabilities': {
+                self.entity_types[i]: float(prob) 
+                for i, prob in enumerate(probabilities)
+            },
+            'features': {
+                name: float(val) for name, val in 
+                zip(self.feature_names, feature_row)
             }
+        }
     
     def _calculate_risk_score(self, entity_type: str, confidence: float, wallet_data: Dict) -> float:
         """Calculate risk score based on entity type and behavior"""
@@ -243,15 +634,439 @@ class WalletBehaviorClassifier:
         final_risk = min(base_risk + confidence_factor * 0.2 + volume_factor, 1.0)
         return final_risk
 
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire after ttl seconds"""
+    
+    def __init__(self, maxsize: int = 10000, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: 'OrderedDict[Any, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: Any, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+    
+    def set(self, key: Any, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class ModelStore:
+    """Bounded per-wallet model store with LRU eviction and optional disk spill
+    
+    Behaves like the plain dict it replaces (get / [] / in / len). When the
+    store exceeds max_items or max_bytes, least recently used models are
+    evicted; with a spill_dir they are written to disk (joblib, or Prophet's
+    JSON serializer) and transparently reloaded on the next access.
+    
+    Spill files are shared with other processes (e.g. the bulk trainer), so
+    a lookup compares the spill file's signature (mtime and size) with the
+    one the in-memory copy was loaded from or written as, and reloads the
+    model when another process has replaced it. Files are written to a
+    temporary path and renamed into place, so readers never see a partial
+    model.
+    """
+    
+    SERIALIZERS = ('joblib', 'prophet')
+    
+    def __init__(self, serializer: str = 'joblib', max_items: Optional[int] = None,
+                 max_bytes: Optional[int] = None, spill_dir: Optional[str] = None):
+        if serializer not in self.SERIALIZERS:
+            raise ValueError(f"Unsupported serializer: {serializer}")
+        
+        self.serializer = serializer
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self._entries: 'OrderedDict[str, Any]' = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self._on_disk = set()  # keys whose current value has an up-to-date spill file
+        self._signatures: Dict[str, Tuple[int, int]] = {}  # spill file each in-memory value matches
+        self._versions: Dict[str, int] = {}
+        self._version_counter = itertools.count(1)
+        self._lock = threading.RLock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_loads = 0
+        
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the model for key, reloading it from disk if it was spilled or replaced"""
+        with self._lock:
+            if key in self._entries:
+                signature = self._spill_signature(key) if self.spill_dir else None
+                if signature is None or signature == self._signatures.get(key):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key]
+                # Another process rewrote the spill file since this copy was loaded
+                self._discard(key)
+                self._on_disk.add(key)
+                self._versions[key] = next(self._version_counter)
+            
+            if self._has_spill_file(key):
+                signature = self._spill_signature(key)
+                if signature is not None:
+                    value = self._load(self._spill_path(key))
+                    self.disk_loads += 1
+                    self._insert(key, value)
+                    self._signatures[key] = signature
+                    return value
+                # Removed by another process
+                self._on_disk.discard(key)
+            
+            self.misses += 1
+            return default
+    
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, self)
+        if value is self:
+            raise KeyError(key)
+        return value
+    
+    def __setitem__(self, key: str, value: Any):
+        with self._lock:
+            self._discard(key)
+            if self._has_spill_file(key):
+                # The spilled copy is stale now
+                self._on_disk.discard(key)
+                try:
+                    os.remove(self._spill_path(key))
+                except FileNotFoundError:
+                    pass
+            self._versions[key] = next(self._version_counter)
+            self._insert(key, value)
+    
+    def put_serialized(self, key: str, payload: str):
+        """Store an already-serialized model (the spill file contents)
+        
+        With a spill_dir the payload is written straight to disk without being
+        deserialized; it is loaded like any spilled model on first access.
+        """
+        with self._lock:
+            if self.spill_dir is None:
+                self[key] = self._deserialize(payload)
+                return
+            
+            self._discard(key)
+            path = self._spill_path(key)
+            with open(self._temporary_path(path), 'wb' if isinstance(payload, bytes) else 'w') as f:
+                f.write(payload)
+            os.replace(self._temporary_path(path), path)
+            self._on_disk.add(key)
+            self._versions[key] = next(self._version_counter)
+    
+    def flush(self):
+        """Write every in-memory value without an up-to-date spill file to disk"""
+        with self._lock:
+            if not self.spill_dir:
+                return
+            for key, value in self._entries.items():
+                if key not in self._on_disk:
+                    self._dump(value, self._spill_path(key))
+                    self._on_disk.add(key)
+                    self._signatures[key] = self._spill_signature(key)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries or self._has_spill_file(key)
+    
+    def version(self, key: str) -> Tuple[int, Optional[Tuple[int, int]]]:
+        """Token that changes whenever key is (re)stored here or its spill file is replaced
+        
+        Combines this process's store counter with the spill file signature,
+        so caches keyed on it also notice models retrained by other processes.
+        """
+        with self._lock:
+            signature = self._spill_signature(key) if self.spill_dir else None
+            return self._versions.get(key, 0), signature
+    
+    def __len__(self) -> int:
+        return len(self._on_disk.union(self._entries))
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and current occupancy"""
+        with self._lock:
+            return {
+                'entries_in_memory': len(self._entries),
+                'entries_spilled': len(self._on_disk.difference(self._entries)),
+                'bytes_in_memory': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'disk_loads': self.disk_loads
+            }
+    
+    def _insert(self, key: str, value: Any):
+        """Add a value as most recently used and evict down to the budget"""
+        size = self._size_of(value) if self.max_bytes else 0
+        self._entries[key] = value
+        self._sizes[key] = size
+        self._bytes += size
+        
+        # Never evict the entry just inserted, even if it alone exceeds the budget
+        while len(self._entries) > 1 and (
+            (self.max_items is not None and len(self._entries) > self.max_items) or
+            (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            evicted_key, evicted_value = self._entries.popitem(last=False)
+            self._bytes -= self._sizes.pop(evicted_key)
+            self._signatures.pop(evicted_key, None)
+            self.evictions += 1
+            
+            if self.spill_dir and evicted_key not in self._on_disk:
+                self._dump(evicted_value, self._spill_path(evicted_key))
+                self._on_disk.add(evicted_key)
+    
+    def _discard(self, key: str):
+        """Drop the in-memory copy of key, if any"""
+        if key in self._entries:
+            self._bytes -= self._sizes.pop(key)
+            del self._entries[key]
+        self._signatures.pop(key, None)
+    
+    def _spill_signature(self, key: str) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) of key's spill file, None if there is none"""
+        try:
+            stat = os.stat(self._spill_path(key))
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _has_spill_file(self, key: str) -> bool:
+        """Check for a spilled copy, including ones written by other processes"""
+        if key in self._on_disk:
+            return True
+        if self.spill_dir and os.path.exists(self._spill_path(key)):
+            self._on_disk.add(key)
+            return True
+        return False
+    
+    def _spill_path(self, key: str) -> str:
+        extension = '.json' if self.serializer == 'prophet' else '.joblib'
+        return os.path.join(self.spill_dir, hashlib.sha1(key.encode()).hexdigest() + extension)
+    
+    def _size_of(self, value: Any) -> int:
+        """Approximate in-memory size of a model by its serialized size"""
+        if self.serializer == 'prophet':
+            from prophet.serialize import model_to_json
+            return len(model_to_json(value))
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    
+    def _dump(self, value: Any, path: str):
+        temporary_path = self._temporary_path(path)
+        if self.serializer == 'prophet':
+            from prophet.serialize import model_to_json
+            with open(temporary_path, 'w') as f:
+                f.write(model_to_json(value))
+        else:
+            import joblib
+            joblib.dump(value, temporary_path)
+        os.replace(temporary_path, path)
+    
+    @staticmethod
+    def _temporary_path(path: str) -> str:
+        return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    
+    def _deserialize(self, payload) -> Any:
+        if self.serializer == 'prophet':
+            from prophet.serialize import model_from_json
+            return model_from_json(payload)
+        import io
+        import joblib
+        return joblib.load(io.BytesIO(payload))
+    
+    def _load(self, path: str) -> Any:
+        if self.serializer == 'prophet':
+            from prophet.serialize import model_from_json
+            with open(path) as f:
+                return model_from_json(f.read())
+        import joblib
+        return joblib.load(path, mmap_mode='r')
+
+class ForecastBackend(ABC):
+    """Interface for TimeSeriesForecaster model backends
+    
+    fit() receives a prepared ds/y DataFrame for one series ('volume' or
+    'frequency') and returns a fitted model; predict() returns the
+    dates/predicted/lower_bound/upper_bound forecast dict, over the training
+    history plus the horizon or (include_history=False) the horizon only. serialize() must
+    produce the payload that ModelStore.put_serialized accepts for the
+    backend's serializer.
+    """
+    
+    name = ''
+    serializer = 'joblib'
+    
+    @abstractmethod
+    def fit(self, df: 'pd.DataFrame', series: str) -> Any:
+        """Fit one series and return the model"""
+    
+    @abstractmethod
+    def predict(self, model: Any, periods: int, include_history: bool = True) -> Dict[str, List]:
+        """Forecast dict for a fitted model"""
+    
+    def serialize(self, model: Any):
+        import io
+        import joblib
+        buffer = io.BytesIO()
+        joblib.dump(model, buffer)
+        return buffer.getvalue()
+
+class ProphetForecastBackend(ForecastBackend):
+    """Prophet models, one Stan fit per series"""
+    
+    name = 'prophet'
+    serializer = 'prophet'
+    
+    def fit(self, df: 'pd.DataFrame', series: str) -> Any:
+        from prophet import Prophet
+        
+        if series == 'volume':
+            model = Prophet(
+                changepoint_prior_scale=0.05,
+                seasonality_prior_scale=10,
+                holidays_prior_scale=10,
+                daily_seasonality=True,
+                weekly_seasonality=True,
+                yearly_seasonality=False
+            )
+        else:
+            model = Prophet(
+                changepoint_prior_scale=0.1,
+                seasonality_prior_scale=5
+            )
+        model.fit(df)
+        return model
+    
+    def predict(self, model: Any, periods: int, include_history: bool = True) -> Dict[str, List]:
+        future = model.make_future_dataframe(periods=periods, include_history=include_history)
+        forecast = model.predict(future)
+        return {
+            'dates': forecast['ds'].dt.strftime('%Y-%m-%d').tolist(),
+            'predicted': forecast['yhat'].tolist(),
+            'lower_bound': forecast['yhat_lower'].tolist(),
+            'upper_bound': forecast['yhat_upper'].tolist()
+        }
+    
+    def serialize(self, model: Any) -> str:
+        from prophet.serialize import model_to_json
+        return model_to_json(model)
+
+class NumpyForecastBackend(ForecastBackend):
+    """Additive linear trend + weekly seasonality fitted by least squares
+    
+    Observations are aggregated to daily values and fitted against a design
+    matrix of [1, t, day-of-week dummies]. fit_many solves many aligned daily
+    series at once with a single lstsq call over a 2-D array, which is orders
+    of magnitude cheaper than a Stan fit per series. Bounds use the residual
+    standard deviation at Prophet's default 80% interval width.
+    """
+    
+    name = 'numpy'
+    
+    INTERVAL_Z = 1.2816  # two-sided 80% normal interval, matching Prophet's interval_width
+    
+    def fit(self, df: 'pd.DataFrame', series: str) -> Dict[str, Any]:
+        # One value per calendar day: mean volume per day, summed counts for frequency
+        daily = df.groupby(df['ds'].dt.normalize())['y']
+        daily = daily.mean() if series == 'volume' else daily.sum()
+        days = (daily.index.values.astype('datetime64[D]')).astype(np.int64)
+        return self.fit_many(days, daily.values.reshape(1, -1))[0]
+    
+    def fit_many(self, days: np.ndarray, values: np.ndarray) -> List[Dict[str, Any]]:
+        """Fit many series observed on the same days in one least-squares solve
+        
+        days is a length-T array of integer days since the epoch and values an
+        (n_series, T) array. Returns one fitted model per series.
+        """
+        days = np.asarray(days, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        origin = int(days[0])
+        span = max(int(days[-1]) - origin, 1)
+        
+        X = self._design_matrix(days, origin, span)
+        coef, _, _, _ = np.linalg.lstsq(X, values.T, rcond=None)
+        residuals = values.T - X @ coef
+        dof = max(len(days) - X.shape[1], 1)
+        sigma = np.sqrt(np.sum(residuals ** 2, axis=0) / dof)
+        
+        return [
+            {'origin': origin, 'span': span, 'days': days, 'coef': coef[:, i], 'sigma': float(sigma[i])}
+            for i in range(values.shape[0])
+        ]
+    
+    def predict(self, model: Dict[str, Any], periods: int, include_history: bool = True) -> Dict[str, List]:
+        history_days = model['days']
+        future_days = history_days[-1] + np.arange(1, periods + 1)
+        days = np.concatenate((history_days, future_days)) if include_history else future_days
+        
+        predicted = self._design_matrix(days, model['origin'], model['span']) @ model['coef']
+        margin = self.INTERVAL_Z * model['sigma']
+        return {
+            'dates': np.datetime_as_string(days.astype('datetime64[D]')).tolist(),
+            'predicted': predicted.tolist(),
+            'lower_bound': (predicted - margin).tolist(),
+            'upper_bound': (predicted + margin).tolist()
+        }
+    
+    @staticmethod
+    def _design_matrix(days: np.ndarray, origin: int, span: int) -> np.ndarray:
+        """Columns: intercept, scaled trend, Tuesday..Sunday indicators (Monday is the baseline)"""
+        weekday = (days + 3) % 7  # 1970-01-01 was a Thursday; 0 = Monday
+        X = np.zeros((len(days), 8))
+        X[:, 0] = 1.0
+        X[:, 1] = (days - origin) / span
+        X[np.arange(len(days))[weekday > 0], 1 + weekday[weekday > 0]] = 1.0
+        return X
+
+FORECAST_BACKENDS = {
+    'prophet': ProphetForecastBackend,
+    'numpy': NumpyForecastBackend
+}
+
 class TimeSeriesForecaster:
-    """Time-series forecasting using Prophet"""
+    """Time-series forecasting using Prophet (or a pluggable ForecastBackend)"""
     
-    def __init__(self):
-        self.models = {}
+    def __init__(self, max_models: Optional[int] = None, max_bytes: Optional[int] = None,
+                 spill_dir: Optional[str] = None, backend: Any = 'prophet',
+                 cache_ttl: float = 300.0, cache_size: int = 10000):
+        self.backend = FORECAST_BACKENDS[backend]() if isinstance(backend, str) else backend
+        # Forecast results keyed by (wallet, model fingerprint, periods, include_history)
+        self.forecast_cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.models = ModelStore(
+            self.backend.serializer, max_items=max_models, max_bytes=max_bytes,
+            spill_dir=os.path.join(spill_dir, self.backend.name) if spill_dir else None
+        )
         self.scalers = {}
     
-    def prepare_data(self, data: List[Dict], target_column: str) -> pd.DataFrame:
+    def prepare_data(self, data: List[Dict], target_column: str) -> 'pd.DataFrame':
         """Prepare data for Prophet forecasting"""
+        import pandas as pd
         df = pd.DataFrame(data)
         df['ds'] = pd.to_datetime(df['timestamp'])
         df['y'] = df[target_column]
@@ -260,44 +1075,87 @@ class TimeSeriesForecaster:
     def train_model(self, wallet_address: str, transaction_data: List[Dict]) -> Dict[str, Any]:
         """Train Prophet model for wallet behavior forecasting"""
         try:
-            # Prepare different time series
-            volume_df = self.prepare_data(transaction_data, 'volume')
-            frequency_df = self._prepare_frequency_data(transaction_data)
-            
-            results = {}
-            
-            # Volume forecasting
-            if len(volume_df) >= 10:  # Minimum data points
-                volume_model = Prophet(
-                    changepoint_prior_scale=0.05,
-                    seasonality_prior_scale=10,
-                    holidays_prior_scale=10,
-                    daily_seasonality=True,
-                    weekly_seasonality=True,
-                    yearly_seasonality=False
-                )
-                volume_model.fit(volume_df)
-                self.models[f"{wallet_address}_volume"] = volume_model
-                results['volume_model_trained'] = True
-            
-            # Frequency forecasting
-            if len(frequency_df) >= 10:
-                freq_model = Prophet(
-                    changepoint_prior_scale=0.1,
-                    seasonality_prior_scale=5
-                )
-                freq_model.fit(frequency_df)
-                self.models[f"{wallet_address}_frequency"] = freq_model
-                results['frequency_model_trained'] = True
-            
+            models, results = self._fit_models(transaction_data)
+            for series, model in models.items():
+                self.models[f"{wallet_address}_{series}"] = model
             return results
             
         except Exception as e:
             logger.error(f"Model training error: {e}")
             return {'error': str(e)}
     
-    def _prepare_frequency_data(self, transaction_data: List[Dict]) -> pd.DataFrame:
+    def train_models_bulk(self, wallets: Iterable[Tuple[str, List[Dict]]],
+                          max_workers: Optional[int] = None,
+                          chunk_size: int = 8) -> Iterator[Dict[str, Any]]:
+        """Train forecasters for many wallets in a process pool
+        
+        wallets is an iterable of (wallet_address, transaction_data) pairs and
+        is consumed lazily. Chunks of chunk_size wallets are fitted in worker
+        processes, and fitted models come back serialized (Prophet JSON for
+        the Prophet backend) and go straight into the model store. One result dict per wallet is yielded as soon as
+        its chunk finishes, failures included.
+        """
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+        
+        max_workers = max_workers or os.cpu_count() or 1
+        max_in_flight = max_workers * 2
+        
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            in_flight = {}
+            for chunk in _chunked(wallets, chunk_size):
+                future = executor.submit(_fit_forecaster_chunk, chunk, self.backend)
+                in_flight[future] = [wallet_address for wallet_address, _ in chunk]
+                
+                # Bound queued work so large inputs are not materialized up front
+                if len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from self._store_bulk_results(future, in_flight.pop(future))
+            
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from self._store_bulk_results(future, in_flight.pop(future))
+    
+    def _store_bulk_results(self, future, wallet_addresses: List[str]) -> Iterator[Dict[str, Any]]:
+        """Move one finished chunk's models into the store and yield per-wallet results"""
+        try:
+            chunk_results = future.result()
+        except Exception as e:
+            logger.error(f"Bulk training chunk failed: {e}")
+            for wallet_address in wallet_addresses:
+                yield {'wallet_address': wallet_address, 'error': str(e)}
+            return
+        
+        for wallet_address, serialized_models, results in chunk_results:
+            for series, payload in serialized_models.items():
+                self.models.put_serialized(f"{wallet_address}_{series}", payload)
+            yield {'wallet_address': wallet_address, **results}
+    
+    def _fit_models(self, transaction_data: List[Dict]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Fit the volume and frequency models for one wallet's transactions"""
+        # Prepare different time series
+        volume_df = self.prepare_data(transaction_data, 'volume')
+        frequency_df = self._prepare_frequency_data(transaction_data)
+        
+        models = {}
+        results = {}
+        
+        # Volume forecasting
+        if len(volume_df) >= 10:  # Minimum data points
+            models['volume'] = self.backend.fit(volume_df, 'volume')
+            results['volume_model_trained'] = True
+        
+        # Frequency forecasting
+        if len(frequency_df) >= 10:
+            models['frequency'] = self.backend.fit(frequency_df, 'frequency')
+            results['frequency_model_trained'] = True
+        
+        return models, results
+    
+    def _prepare_frequency_data(self, transaction_data: List[Dict]) -> 'pd.DataFrame':
         """Prepare transaction frequency data"""
+        import pandas as pd
         df = pd.DataFrame(transaction_data)
         df['timestamp'] = pd.to_datetime(df['timestamp'])
         
@@ -308,53 +1166,251 @@ class TimeSeriesForecaster:
         
         return daily_counts
     
-    def forecast(self, wallet_address: str, periods: int = 30) -> Dict[str, Any]:
-        """Generate forecasts for wallet behavior"""
+    def forecast(self, wallet_address: str, periods: int = 30,
+                 include_history: bool = True) -> Dict[str, Any]:
+        """Generate forecasts for wallet behavior
+        
+        With include_history=False only the future horizon is predicted and
+        returned. Results are cached until the wallet's models are retrained
+        or the cache TTL expires; callers get their own copy to modify.
+        """
+        volume_key = f"{wallet_address}_volume"
+        freq_key = f"{wallet_address}_frequency"
+        cache_key = (
+            wallet_address,
+            (self.models.version(volume_key), self.models.version(freq_key)),
+            periods,
+            include_history
+        )
+        cached = self.forecast_cache.get(cache_key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
         try:
             results = {}
             
+            predict_timer = f'{self.backend.name}_predict'
+            
             # Volume forecast
-            volume_model = self.models.get(f"{wallet_address}_volume")
-            if volume_model:
-                future_volume = volume_model.make_future_dataframe(periods=periods)
-                volume_forecast = volume_model.predict(future_volume)
-                results['volume_forecast'] = {
-                    'dates': volume_forecast['ds'].dt.strftime('%Y-%m-%d').tolist(),
-                    'predicted': volume_forecast['yhat'].tolist(),
-                    'lower_bound': volume_forecast['yhat_lower'].tolist(),
-                    'upper_bound': volume_forecast['yhat_upper'].tolist()
-                }
+            volume_model = self.models.get(volume_key)
+            if volume_model is not None:
+                with metrics.timer(predict_timer):
+                    results['volume_forecast'] = self.backend.predict(volume_model, periods, include_history)
             
             # Frequency forecast
-            freq_model = self.models.get(f"{wallet_address}_frequency")
-            if freq_model:
-                future_freq = freq_model.make_future_dataframe(periods=periods)
-                freq_forecast = freq_model.predict(future_freq)
-                results['frequency_forecast'] = {
-                    'dates': freq_forecast['ds'].dt.strftime('%Y-%m-%d').tolist(),
-                    'predicted': freq_forecast['yhat'].tolist(),
-                    'lower_bound': freq_forecast['yhat_lower'].tolist(),
-                    'upper_bound': freq_forecast['yhat_upper'].tolist()
-                }
+            freq_model = self.models.get(freq_key)
+            if freq_model is not None:
+                with metrics.timer(predict_timer):
+                    results['frequency_forecast'] = self.backend.predict(freq_model, periods, include_history)
             
-            return results
+            self.forecast_cache.set(cache_key, results)
+            return copy.deepcopy(results)
             
         except Exception as e:
             logger.error(f"Forecasting error: {e}")
             return {'error': str(e)}
 
+def benchmark_forecast_backends(n_series: int = 2000, n_days: int = 180, periods: int = 30,
+                                prophet_series: int = 20, seed: int = 42) -> Dict[str, Any]:
+    """Compare Prophet and NumPy backends on synthetic trend + weekly seasonality series
+    
+    Both backends fit the first n_days - periods days and are scored (MAE) on
+    the held-out last periods days. Prophet runs on a prophet_series subset
+    since it is the slow path; NumPy runs on the same subset and on all series.
+    """
+    import time
+    import pandas as pd
+    
+    rng = np.random.default_rng(seed)
+    days = np.datetime64('2024-01-01', 'D').astype(np.int64) + np.arange(n_days)
+    t = np.arange(n_days) / n_days
+    level = rng.uniform(5, 50, (n_series, 1))
+    trend = rng.normal(0, 10, (n_series, 1)) * t
+    weekly = rng.uniform(0, 5, (n_series, 1)) * np.sin(2 * np.pi * ((days + 3) % 7) / 7)
+    values = level + trend + weekly + rng.normal(0, 2, (n_series, n_days))
+    
+    train_days, train_values = days[:-periods], values[:, :-periods]
+    actual = values[:, -periods:]
+    
+    numpy_backend = NumpyForecastBackend()
+    start = time.perf_counter()
+    numpy_models = numpy_backend.fit_many(train_days, train_values)
+    numpy_forecasts = np.array([numpy_backend.predict(m, periods, False)['predicted'] for m in numpy_models])
+    numpy_seconds = time.perf_counter() - start
+    
+    prophet_backend = ProphetForecastBackend()
+    ds = pd.to_datetime(train_days.astype('datetime64[D]'))
+    start = time.perf_counter()
+    prophet_forecasts = []
+    for i in range(prophet_series):
+        model = prophet_backend.fit(pd.DataFrame({'ds': ds, 'y': train_values[i]}), 'frequency')
+        prophet_forecasts.append(prophet_backend.predict(model, periods, False)['predicted'])
+    prophet_seconds = time.perf_counter() - start
+    
+    def mae(forecasts, n):
+        return float(np.mean(np.abs(np.asarray(forecasts) - actual[:n])))
+    
+    return {
+        'n_days': n_days,
+        'horizon': periods,
+        'numpy': {
+            'series': n_series,
+            'seconds': numpy_seconds,
+            'series_per_second': n_series / numpy_seconds,
+            'mae': mae(numpy_forecasts, n_series),
+            'mae_prophet_subset': mae(numpy_forecasts[:prophet_series], prophet_series)
+        },
+        'prophet': {
+            'series': prophet_series,
+            'seconds': prophet_seconds,
+            'series_per_second': prophet_series / prophet_seconds,
+            'mae': mae(prophet_forecasts, prophet_series)
+        }
+    }
+
+def _chunked(items: Iterable, size: int) -> Iterator[List]:
+    """Yield successive lists of at most size items from any iterable"""
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _timed(operation: str, fn):
+    """Wrap fn so each call is recorded under operation in the latency metrics"""
+    def run():
+        with metrics.timer(operation):
+            return fn()
+    return run
+
+def _fit_forecaster_chunk(chunk: List[Tuple[str, List[Dict]]],
+                          backend: ForecastBackend) -> List[Tuple[str, Dict[str, Any], Dict[str, Any]]]:
+    """Process-pool worker: fit forecasters for a chunk of wallets, returning serialized models"""
+    forecaster = TimeSeriesForecaster(backend=backend)
+    chunk_results = []
+    for wallet_address, transaction_data in chunk:
+        try:
+            models, results = forecaster._fit_models(transaction_data)
+            serialized = {series: backend.serialize(model) for series, model in models.items()}
+            chunk_results.append((wallet_address, serialized, results))
+        except Exception as e:
+            logger.error(f"Model training error for {wallet_address}: {e}")
+            chunk_results.append((wallet_address, {}, {'error': str(e)}))
+    return chunk_results
+
+class RunningZScoreModel:
+    """Online anomaly model over running per-feature means and variances
+    
+    A transaction's score is the RMS of its per-feature z-scores (features
+    with zero variance use unit scale, as StandardScaler does). The alert
+    threshold is the (1 - contamination) quantile of the training scores.
+    decision_function maps scores onto IsolationForest's bounded convention:
+    0.5 for a typical transaction, 0 at the threshold, -0.5 at four times
+    the threshold, approaching -1 for extreme outliers.
+    
+    update() folds one transaction in O(n_features) with a Welford step,
+    winsorized to mean ± CLIP_Z std so anomalies barely move the baseline.
+    Models are plain dicts (including the wallet's WalletStreamState
+    summary), so they are stored and spilled like any other per-wallet model.
+    """
+    
+    name = 'running_z'
+    CLIP_Z = 4.0
+    
+    def fit(self, X: np.ndarray, contamination: float, transaction_history: List[Dict]) -> Dict[str, Any]:
+        X = np.asarray(X, dtype=np.float64)
+        mean = X.mean(axis=0)
+        model = {
+            'type': self.name,
+            'n': len(X),
+            'mean': mean,
+            'm2': ((X - mean) ** 2).sum(axis=0),
+            'threshold': 1.0
+        }
+        model['threshold'] = max(float(np.quantile(self._z(model, X), 1 - contamination)), 1e-9)
+        model['history'] = WalletStreamState.from_transactions(transaction_history).to_dict()
+        return model
+    
+    def decision_function(self, model: Dict[str, Any], X: np.ndarray) -> np.ndarray:
+        z = self._z(model, X)
+        return 0.5 - 1.5 * z / (z + 2 * model['threshold'])
+    
+    def update(self, model: Dict[str, Any], x: np.ndarray) -> Dict[str, Any]:
+        """Return the model with one feature row folded in (arrays are replaced, not mutated)"""
+        mean, m2, n = model['mean'], model['m2'], model['n']
+        if n > 1:
+            std = np.sqrt(m2 / n)
+            x = np.clip(x, mean - self.CLIP_Z * std, mean + self.CLIP_Z * std)
+        n += 1
+        delta = x - mean
+        mean = mean + delta / n
+        m2 = m2 + delta * (x - mean)
+        return {**model, 'n': n, 'mean': mean, 'm2': m2}
+    
+    @staticmethod
+    def _z(model: Dict[str, Any], X: np.ndarray) -> np.ndarray:
+        std = np.sqrt(model['m2'] / model['n'])
+        std = np.where(std > 0, std, 1.0)
+        z = (np.asarray(X, dtype=np.float64) - model['mean']) / std
+        return np.sqrt(np.mean(z ** 2, axis=1))
+
+RUNNING_Z_MODEL = RunningZScoreModel()
+
 class AnomalyDetector:
-    """Anomaly detection using Isolation Forest"""
+    """Anomaly detection using Isolation Forest
+    
+    Wallets can instead use an online RunningZScoreModel (model_type
+    'running_z'), which update_detector keeps fresh without retraining.
+    Wallets without a fresh per-wallet model are scored by a shared global
+    model (train_global_detector) over wallet-normalized features.
+    """
+    
+    MODEL_TYPES = ('isolation_forest', 'running_z')
+    
+    # Entity context for the global model, as predicted by WalletBehaviorClassifier
+    ENTITY_TYPES = [
+        'exchange', 'miner', 'mixer', 'gambling', 'defi',
+        'institutional', 'retail', 'whale', 'unknown'
+    ]
     
-    def __init__(self, contamination: float = 0.1):
+    def __init__(self, contamination: float = 0.1, max_models: Optional[int] = None,
+                 max_bytes: Optional[int] = None, spill_dir: Optional[str] = None,
+                 model_type: str = 'isolation_forest', max_model_age: Optional[float] = None,
+                 max_history_growth: Optional[float] = 1.0):
+        if model_type not in self.MODEL_TYPES:
+            raise ValueError(f"Unsupported anomaly model type: {model_type}")
         self.contamination = contamination
-        self.models = {}
-        self.scalers = {}
+        # Default for train_detector; each wallet can be trained with either type
+        self.model_type = model_type
+        # A per-wallet model is stale once older than max_model_age seconds, or once the
+        # history has grown by more than max_history_growth times its training size;
+        # stale models give way to the global model when there is one
+        self.max_model_age = max_model_age
+        self.max_history_growth = max_history_growth
+        # Shared (scaler, model) for wallets without a fresh per-wallet model
+        self.global_model: Optional[Tuple[Any, Any]] = None
+        self.global_model_path = os.path.join(spill_dir, 'global_anomaly.joblib') if spill_dir else None
+        # (mtime_ns, size) of the global model file the loaded copy came from
+        self._global_model_signature: Optional[Tuple[int, int]] = None
+        self._global_model_lock = threading.Lock()
+        self.models = ModelStore(
+            'joblib', max_items=max_models, max_bytes=max_bytes,
+            spill_dir=os.path.join(spill_dir, 'isolation_forest') if spill_dir else None
+        )
+        self.scalers = ModelStore(
+            'joblib', max_items=max_models,
+            spill_dir=os.path.join(spill_dir, 'scalers') if spill_dir else None
+        )
         self.feature_names = [
             'transaction_amount', 'time_since_last', 'counterparty_new',
             'fee_ratio', 'input_count', 'output_count', 'hour_of_day',
             'day_of_week', 'amount_deviation', 'frequency_deviation'
         ]
+        self.global_feature_names = [
+            'log_amount_deviation', 'log_frequency_deviation', 'counterparty_new', 'fee_ratio',
+            'log_input_count', 'log_output_count', 'log_history_size'
+        ] + [f'entity_{entity_type}' for entity_type in self.ENTITY_TYPES]
     
     def extract_anomaly_features(self, transaction: Dict, wallet_history: List[Dict]) -> np.ndarray:
         """Extract features for anomaly detection"""
@@ -414,20 +1470,116 @@ class AnomalyDetector:
         feature_vector = np.array([features[name] for name in self.feature_names])
         return feature_vector.reshape(1, -1)
     
-    def train_detector(self, wallet_address: str, transaction_history: List[Dict]) -> Dict[str, Any]:
-        """Train Isolation Forest for specific wallet"""
+    def extract_anomaly_features_batch(self, transactions: List[Dict], wallet_history: List[Dict]) -> np.ndarray:
+        """Extract anomaly features for many transactions against one shared history
+        
+        Equivalent to stacking extract_anomaly_features(tx, wallet_history) for
+        each transaction, with the history aggregates computed only once.
+        """
+        n = len(transactions)
+        timestamps = np.array([tx.get('timestamp', 0) for tx in transactions], dtype=np.float64)
+        amounts = np.array([tx.get('amount', 1) for tx in transactions], dtype=np.float64)
+        fees = np.array([tx.get('fee', 0) for tx in transactions], dtype=np.float64)
+        tx_times = [datetime.fromtimestamp(tx.get('timestamp', 0)) for tx in transactions]
+        
+        # Shared history aggregates
+        known_counterparties = set(tx.get('counterparty', '') for tx in wallet_history)
+        
+        X = np.zeros((n, len(self.feature_names)))
+        X[:, 0] = np.log10(np.maximum(amounts, 1))
+        X[:, 2] = [tx.get('counterparty', '') not in known_counterparties for tx in transactions]
+        X[:, 3] = np.divide(fees, amounts, out=np.zeros(n), where=amounts > 0)
+        X[:, 4] = [tx.get('input_count', 1) for tx in transactions]
+        X[:, 5] = [tx.get('output_count', 1) for tx in transactions]
+        X[:, 6] = [t.hour for t in tx_times]
+        X[:, 7] = [t.weekday() for t in tx_times]
+        
+        if wallet_history:
+            historical_times = np.array([tx.get('timestamp', 0) for tx in wallet_history], dtype=np.float64)
+            mean_amount = np.mean([tx.get('amount', 0) for tx in wallet_history])
+            
+            X[:, 1] = timestamps - historical_times.max()
+            X[:, 8] = np.abs(amounts - mean_amount) / (mean_amount + 1)
+            
+            if len(historical_times) > 1:
+                # Mean of sorted intervals telescopes to (max - min) / (count - 1)
+                mean_interval = (historical_times.max() - historical_times.min()) / (len(historical_times) - 1)
+                X[:, 9] = np.abs(X[:, 1] - mean_interval) / (mean_interval + 1)
+        
+        return X
+    
+    def extract_training_features(self, transaction_history: List[Dict]) -> np.ndarray:
+        """Extract anomaly features for every transaction against the history before it
+        
+        Equivalent to calling extract_anomaly_features(tx, transaction_history[:i])
+        for each i, but done in one O(n) pass using running state: running max/min
+        timestamp, a seen-counterparty set and prefix sums of amounts. The mean of
+        sorted intervals telescopes to (max - min) / (count - 1).
+        """
+        n = len(transaction_history)
+        timestamps = np.array([tx.get('timestamp', 0) for tx in transaction_history], dtype=np.float64)
+        history_amounts = np.array([tx.get('amount', 0) for tx in transaction_history], dtype=np.float64)
+        amounts = np.array([tx.get('amount', 1) for tx in transaction_history], dtype=np.float64)
+        fees = np.array([tx.get('fee', 0) for tx in transaction_history], dtype=np.float64)
+        
+        X = np.zeros((n, len(self.feature_names)))
+        if n == 0:
+            return X
+        
+        # Number of transactions before each row, and running stats over them
+        history_len = np.arange(n)
+        last_time = np.concatenate(([0.0], np.maximum.accumulate(timestamps)[:-1]))
+        first_time = np.concatenate(([0.0], np.minimum.accumulate(timestamps)[:-1]))
+        amount_sums = np.concatenate(([0.0], np.cumsum(history_amounts)[:-1]))
+        has_history = history_len > 0
+        
+        time_since_last = np.where(has_history, timestamps - last_time, 0.0)
+        
+        # New counterparty indicator from a running seen-set
+        seen_counterparties = set()
+        counterparty_new = np.empty(n)
+        for i, tx in enumerate(transaction_history):
+            counterparty = tx.get('counterparty', '')
+            counterparty_new[i] = counterparty not in seen_counterparties
+            seen_counterparties.add(counterparty)
+        
+        tx_times = [datetime.fromtimestamp(tx.get('timestamp', 0)) for tx in transaction_history]
+        
+        mean_amount = np.divide(amount_sums, history_len, out=np.zeros(n), where=has_history)
+        mean_interval = np.divide(last_time - first_time, history_len - 1,
+                                  out=np.zeros(n), where=history_len > 1)
+        
+        X[:, 0] = np.log10(np.maximum(amounts, 1))
+        X[:, 1] = time_since_last
+        X[:, 2] = counterparty_new
+        X[:, 3] = np.divide(fees, amounts, out=np.zeros(n), where=amounts > 0)
+        X[:, 4] = [tx.get('input_count', 1) for tx in transaction_history]
+        X[:, 5] = [tx.get('output_count', 1) for tx in transaction_history]
+        X[:, 6] = [t.hour for t in tx_times]
+        X[:, 7] = [t.weekday() for t in tx_times]
+        X[:, 8] = np.where(has_history, np.abs(amounts - mean_amount) / (mean_amount + 1), 0.0)
+        X[:, 9] = np.where(history_len > 1,
+                           np.abs(time_since_last - mean_interval) / (mean_interval + 1), 0.0)
+        return X
+    
+    def train_detector(self, wallet_address: str, transaction_history: List[Dict],
+                       model_type: Optional[str] = None) -> Dict[str, Any]:
+        """Train Isolation Forest (or the model_type model) for specific wallet"""
         try:
             if len(transaction_history) < 10:
                 return {'error': 'Insufficient data for training'}
             
             # Extract features for all historical transactions
-            features_list = []
-            for i, tx in enumerate(transaction_history):
-                history_before = transaction_history[:i]  # Transactions before current
-                features = self.extract_anomaly_features(tx, history_before)
-                features_list.append(features[0])
+            X = self.extract_training_features(transaction_history)
             
-            X = np.array(features_list)
+            model_type = model_type or self.model_type
+            if model_type == 'running_z':
+                return self._train_running_z(wallet_address, X, transaction_history)
+            if model_type != 'isolation_forest':
+                raise ValueError(f"Unsupported anomaly model type: {model_type}")
+            
+            from sklearn.ensemble import IsolationForest
+            from sklearn.preprocessing import StandardScaler
             
             # Scale features
             scaler = StandardScaler()
@@ -440,6 +1592,10 @@ class AnomalyDetector:
                 n_estimators=100
             )
             iso_forest.fit(X_scaled)
+            # Freshness metadata and the history summary streaming resumes from, pickled with the model
+            iso_forest.trained_at_ = time.time()
+            iso_forest.training_samples_ = len(X)
+            iso_forest.history_ = WalletStreamState.from_transactions(transaction_history).to_dict()
             
             # Store model and scaler
             self.models[wallet_address] = iso_forest
@@ -466,41 +1622,311 @@ class AnomalyDetector:
             logger.error(f"Anomaly detector training error: {e}")
             return {'error': str(e)}
     
-    def detect_anomaly(self, wallet_address: str, transaction: Dict, wallet_history: List[Dict]) -> Dict[str, Any]:
-        """Detect if transaction is anomalous"""
+    def _train_running_z(self, wallet_address: str, X: np.ndarray,
+                         transaction_history: List[Dict]) -> Dict[str, Any]:
+        """Fit a RunningZScoreModel; it standardizes internally, so no scaler is stored"""
+        model = RUNNING_Z_MODEL.fit(X, self.contamination, transaction_history)
+        model['trained_at'] = time.time()
+        self.models[wallet_address] = model
+        
+        anomaly_scores = RUNNING_Z_MODEL.decision_function(model, X)
+        outliers = anomaly_scores < 0
+        return {
+            'model_trained': True,
+            'model_type': 'running_z',
+            'training_samples': len(X),
+            'anomalies_detected': int(np.sum(outliers)),
+            'anomaly_rate': float(np.mean(outliers)),
+            'score_statistics': {
+                'mean': float(np.mean(anomaly_scores)),
+                'std': float(np.std(anomaly_scores)),
+                'min': float(np.min(anomaly_scores)),
+                'max': float(np.max(anomaly_scores))
+            }
+        }
+    
+    def update_detector(self, wallet_address: str, transactions: List[Dict]) -> Dict[str, Any]:
+        """Fold new transactions into a wallet's online model, O(1) per transaction
+        
+        Only 'running_z' models support this; Isolation Forest models must be
+        retrained with train_detector.
+        """
         try:
             model = self.models.get(wallet_address)
-            scaler = self.scalers.get(wallet_address)
-            
-            if not model or not scaler:
+            if model is None:
                 return {'error': 'Model not trained for this wallet'}
+            if not _is_online_model(model):
+                return {'error': 'Model does not support online updates, retrain it'}
+            
+            history = WalletStreamState.from_dict(model['history'])
+            for tx in transactions:
+                model = RUNNING_Z_MODEL.update(model, np.asarray(history.features(tx), dtype=np.float64))
+                history.add(tx)
+            model['history'] = history.to_dict()
+            model['trained_at'] = time.time()
+            self.models[wallet_address] = model
+            
+            return {
+                'model_updated': True,
+                'model_type': 'running_z',
+                'transactions_added': len(transactions),
+                'training_samples': model['n']
+            }
+            
+        except Exception as e:
+            logger.error(f"Anomaly detector update error: {e}")
+            return {'error': str(e)}
+    
+    def detect_anomaly(self, wallet_address: str, transaction: Dict, wallet_history: List[Dict],
+                       entity_type: Optional[str] = None) -> Dict[str, Any]:
+        """Detect if transaction is anomalous"""
+        return self.detect_anomalies_batch(wallet_address, [transaction], wallet_history, entity_type)[0]
+    
+    def detect_anomalies_batch(self, wallet_address: str, transactions: List[Dict],
+                               wallet_history: List[Dict],
+                               entity_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Detect anomalies for many transactions against the same wallet history
+        
+        History aggregates are computed once, and the whole feature matrix is
+        scored with a single decision_function call. The wallet's own model is
+        used when it exists and is fresh, otherwise the global model (with
+        entity_type as context) if one has been trained.
+        """
+        try:
+            model, scaler = self.wallet_model(wallet_address, len(wallet_history))
+            if model is None and self.get_global_model() is None:
+                return [{'error': 'Model not trained for this wallet'} for _ in transactions]
+            
+            if not transactions:
+                return []
             
             # Extract features
-            features = self.extract_anomaly_features(transaction, wallet_history)
-            features_scaled = scaler.transform(features)
+            features = self.extract_anomaly_features_batch(transactions, wallet_history)
+            if model is not None:
+                return self.score_features(model, scaler, features)
+            return self.score_global(features, np.full(len(transactions), len(wallet_history)),
+                                     [entity_type] * len(transactions))
+            
+        except Exception as e:
+            logger.error(f"Anomaly detection error: {e}")
+            return [{'error': str(e)} for _ in transactions]
+    
+    def wallet_model(self, wallet_address: str, history_size: int) -> Tuple[Any, Any]:
+        """The wallet's (model, scaler), or (None, None) if there is none
+        
+        A stale model (see max_model_age / max_history_growth) is only set
+        aside when a global model can score the wallet instead; without one
+        it is still the best model available.
+        """
+        model = self.models.get(wallet_address)
+        if model is None:
+            return None, None
+        
+        if _is_online_model(model):
+            scaler = None
+            trained_at, training_samples = model.get('trained_at'), model['n']
+        else:
+            scaler = self.scalers.get(wallet_address)
+            if scaler is None:
+                return None, None
+            # Models trained before freshness metadata existed count as fresh
+            trained_at = getattr(model, 'trained_at_', None)
+            training_samples = getattr(model, 'training_samples_', None)
+        
+        too_old = (self.max_model_age is not None and trained_at is not None and
+                   time.time() - trained_at > self.max_model_age)
+        outgrown = (self.max_history_growth is not None and training_samples is not None and
+                    history_size > training_samples * (1 + self.max_history_growth))
+        if (too_old or outgrown) and self.get_global_model() is not None:
+            return None, None
+        return model, scaler
+    
+    def stream_state(self, wallet_address: str) -> Optional['WalletStreamState']:
+        """History summary stored with the wallet's model, None if there is none
+        
+        Running-z models carry every transaction folded into them (training
+        plus update_detector); Isolation Forest models their training history.
+        """
+        model = self.models.get(wallet_address)
+        if model is None:
+            return None
+        history = model.get('history') if _is_online_model(model) else getattr(model, 'history_', None)
+        return WalletStreamState.from_dict(history) if history is not None else None
+    
+    def global_features(self, features: np.ndarray, history_sizes: np.ndarray,
+                        entity_types: Optional[List[Optional[str]]] = None) -> np.ndarray:
+        """Wallet-normalized features for the global model from per-wallet anomaly features
+        
+        Keeps only columns that are relative to the wallet's own history
+        (deviations, new counterparty, fee ratio, in/out counts), adds the
+        history size and a one-hot entity type.
+        """
+        features = np.asarray(features, dtype=np.float64)
+        n = len(features)
+        G = np.zeros((n, len(self.global_feature_names)))
+        G[:, 0] = np.log1p(features[:, 8])
+        G[:, 1] = np.log1p(features[:, 9])
+        G[:, 2] = features[:, 2]
+        G[:, 3] = features[:, 3]
+        G[:, 4] = np.log1p(features[:, 4])
+        G[:, 5] = np.log1p(features[:, 5])
+        G[:, 6] = np.log1p(history_sizes)
+        
+        unknown = self.ENTITY_TYPES.index('unknown')
+        entity_index = [
+            self.ENTITY_TYPES.index(t) if t in self.ENTITY_TYPES else unknown
+            for t in (entity_types or [None] * n)
+        ]
+        G[np.arange(n), 7 + np.asarray(entity_index, dtype=int)] = 1.0
+        return G
+    
+    def train_global_detector(self, wallets: Iterable[Tuple[str, List[Dict]]],
+                              entity_types: Optional[Dict[str, str]] = None,
+                              max_rows_per_wallet: int = 100, max_samples: int = 500000,
+                              seed: int = 42) -> Dict[str, Any]:
+        """Train the shared model once on wallet-normalized features of many wallets
+        
+        Every transaction is featurized against the history before it (see
+        extract_training_features); at most max_rows_per_wallet rows are
+        sampled per wallet so large wallets do not dominate. With a spill_dir
+        the model is saved and picked up by other processes.
+        """
+        try:
+            from sklearn.ensemble import IsolationForest
+            from sklearn.preprocessing import StandardScaler
+            
+            rng = np.random.default_rng(seed)
+            blocks = []
+            n_wallets = 0
+            for wallet_address, transaction_history in wallets:
+                if not transaction_history:
+                    continue
+                X = self.extract_training_features(transaction_history)
+                rows = np.arange(len(X))
+                if len(rows) > max_rows_per_wallet:
+                    rows = rng.choice(rows, max_rows_per_wallet, replace=False)
+                entity_type = (entity_types or {}).get(wallet_address)
+                blocks.append(self.global_features(X[rows], rows, [entity_type] * len(rows)))
+                n_wallets += 1
             
-            # Predict anomaly
-            anomaly_score = model.decision_function(features_scaled)[0]
-            is_anomaly = model.predict(features_scaled)[0] == -1
+            if not blocks:
+                return {'error': 'Insufficient data for training'}
+            G = np.vstack(blocks)
+            if len(G) > max_samples:
+                G = G[rng.choice(len(G), max_samples, replace=False)]
             
-            # Calculate risk level
-            risk_level = self._calculate_anomaly_risk(anomaly_score, is_anomaly)
+            scaler = StandardScaler()
+            G_scaled = scaler.fit_transform(G)
+            model = IsolationForest(contamination=self.contamination, random_state=42, n_estimators=100)
+            model.fit(G_scaled)
+            with self._global_model_lock:
+                self.global_model = (scaler, model)
+                if self.global_model_path:
+                    import joblib
+                    temporary_path = ModelStore._temporary_path(self.global_model_path)
+                    joblib.dump(self.global_model, temporary_path)
+                    os.replace(temporary_path, self.global_model_path)
+                    self._global_model_signature = self._global_model_file_signature()
             
+            outliers = model.predict(G_scaled) == -1
             return {
-                'is_anomaly': bool(is_anomaly),
-                'anomaly_score': float(anomaly_score),
-                'risk_level': risk_level,
-                'confidence': float(abs(anomaly_score)),
-                'features': {
-                    name: float(val) for name, val in 
-                    zip(self.feature_names, features[0])
-                }
+                'model_trained': True,
+                'model_type': 'global',
+                'wallets': n_wallets,
+                'training_samples': len(G),
+                'anomaly_rate': float(np.mean(outliers))
             }
             
         except Exception as e:
-            logger.error(f"Anomaly detection error: {e}")
+            logger.error(f"Global anomaly detector training error: {e}")
             return {'error': str(e)}
     
+    def get_global_model(self) -> Optional[Tuple[Any, Any]]:
+        """The shared (scaler, model), reloaded whenever its file in the spill directory changes
+        
+        Picks up a global model trained, or retrained, by another process after
+        this one started.
+        """
+        if not self.global_model_path:
+            return self.global_model
+        with self._global_model_lock:
+            signature = self._global_model_file_signature()
+            if signature is not None and signature != self._global_model_signature:
+                self._global_model_signature = signature
+                try:
+                    import joblib
+                    self.global_model = joblib.load(self.global_model_path)
+                    logger.info(f"Global anomaly model loaded from {self.global_model_path}")
+                except Exception as e:
+                    # Keep the copy already loaded, if any, until the file is rewritten
+                    logger.error(f"Global anomaly model load error: {e}")
+            return self.global_model
+    
+    def _global_model_file_signature(self) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) of the global model file, None if there is none"""
+        try:
+            stat = os.stat(self.global_model_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def score_global(self, features: np.ndarray, history_sizes: np.ndarray,
+                     entity_types: Optional[List[Optional[str]]] = None) -> List[Dict[str, Any]]:
+        """Score per-wallet anomaly features with the global model, one result per row"""
+        scaler, model = self.get_global_model()
+        G_scaled = scaler.transform(self.global_features(features, history_sizes, entity_types))
+        
+        with metrics.timer('global_anomaly_score'):
+            anomaly_scores = model.decision_function(G_scaled)
+        is_anomaly = anomaly_scores < 0
+        
+        return [
+            {
+                'is_anomaly': bool(anomalous),
+                'anomaly_score': float(score),
+                'risk_level': self._calculate_anomaly_risk(score, anomalous),
+                'confidence': float(abs(score)),
+                'features': {
+                    name: float(val) for name, val in 
+                    zip(self.feature_names, feature_row)
+                },
+                'model_scope': 'global',
+                'model_type': 'global'
+            }
+            for score, anomalous, feature_row in zip(anomaly_scores, is_anomaly, features)
+        ]
+    
+    def score_features(self, model, scaler, features: np.ndarray) -> List[Dict[str, Any]]:
+        """Score an anomaly feature matrix with one model call, one result per row"""
+        if _is_online_model(model):
+            model_type = RUNNING_Z_MODEL.name
+            with metrics.timer('running_z_score'):
+                anomaly_scores = RUNNING_Z_MODEL.decision_function(model, features)
+        else:
+            model_type = 'isolation_forest'
+            features_scaled = scaler.transform(features)
+            
+            # IsolationForest.predict labels -1 exactly where decision_function < 0
+            with metrics.timer('isolation_forest_score'):
+                anomaly_scores = model.decision_function(features_scaled)
+        is_anomaly = anomaly_scores < 0
+        
+        return [
+            {
+                'is_anomaly': bool(anomalous),
+                'anomaly_score': float(score),
+                'risk_level': self._calculate_anomaly_risk(score, anomalous),
+                'confidence': float(abs(score)),
+                'features': {
+                    name: float(val) for name, val in 
+                    zip(self.feature_names, feature_row)
+                },
+                'model_scope': 'wallet',
+                'model_type': model_type
+            }
+            for score, anomalous, feature_row in zip(anomaly_scores, is_anomaly, features)
+        ]
+    
     def _calculate_anomaly_risk(self, score: float, is_anomaly: bool) -> str:
         """Calculate risk level based on anomaly score"""
         if not is_anomaly:
@@ -515,23 +1941,570 @@ class AnomalyDetector:
         else:
             return 'low'
 
+class WalletStreamState:
+    """Rolling per-wallet history summary for streaming anomaly features
+    
+    Holds exactly what extract_anomaly_features needs from a wallet's
+    history: transaction count, first/last timestamp, amount sum and the
+    set of counterparties seen so far.
+    """
+    
+    __slots__ = ('count', 'first_timestamp', 'last_timestamp', 'amount_sum', 'counterparties')
+    
+    def __init__(self):
+        self.count = 0
+        self.first_timestamp = 0.0
+        self.last_timestamp = 0.0
+        self.amount_sum = 0.0
+        self.counterparties = set()
+    
+    def features(self, transaction: Dict) -> List[float]:
+        """Anomaly features for transaction against the history folded so far"""
+        amount = transaction.get('amount', 1)
+        fee = transaction.get('fee', 0)
+        timestamp = transaction.get('timestamp', 0)
+        tx_time = datetime.fromtimestamp(timestamp)
+        
+        time_since_last = timestamp - self.last_timestamp if self.count else 0
+        amount_deviation = 0
+        if self.count:
+            mean_amount = self.amount_sum / self.count
+            amount_deviation = abs(amount - mean_amount) / (mean_amount + 1)
+        frequency_deviation = 0
+        if self.count > 1:
+            # Mean of sorted intervals telescopes to (max - min) / (count - 1)
+            mean_interval = (self.last_timestamp - self.first_timestamp) / (self.count - 1)
+            frequency_deviation = abs(time_since_last - mean_interval) / (mean_interval + 1)
+        
+        return [
+            np.log10(max(amount, 1)),
+            time_since_last,
+            1 if transaction.get('counterparty', '') not in self.counterparties else 0,
+            fee / amount if amount > 0 else 0,
+            transaction.get('input_count', 1),
+            transaction.get('output_count', 1),
+            tx_time.hour,
+            tx_time.weekday(),
+            amount_deviation,
+            frequency_deviation
+        ]
+    
+    @staticmethod
+    def validate(transaction: Any):
+        """Raise ValueError unless transaction is a record features() and add() can fold"""
+        if not isinstance(transaction, dict):
+            raise ValueError(f"expected a JSON object, got {type(transaction).__name__}")
+        if not isinstance(transaction.get('wallet_address'), str) or not transaction['wallet_address']:
+            raise ValueError("missing wallet_address")
+        for field, required in (('timestamp', True), ('amount', False), ('fee', False),
+                                ('input_count', False), ('output_count', False)):
+            value = transaction.get(field)
+            if value is None and not required:
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not np.isfinite(value):
+                raise ValueError(f"{field} must be a finite number, got {value!r}")
+        if not isinstance(transaction.get('counterparty', ''), str):
+            raise ValueError("counterparty must be a string")
+        try:
+            datetime.fromtimestamp(transaction['timestamp'])
+        except (OverflowError, OSError) as e:
+            raise ValueError(f"timestamp out of range: {e}")
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+    
+    @classmethod
+    def from_transactions(cls, transactions: List[Dict]) -> 'WalletStreamState':
+        state = cls()
+        for tx in transactions:
+            state.add(tx)
+        return state
+    
+    @classmethod
+    def from_dict(cls, values: Dict[str, Any]) -> 'WalletStreamState':
+        state = cls()
+        for name in cls.__slots__:
+            setattr(state, name, values[name])
+        state.counterparties = set(state.counterparties)
+        return state
+    
+    def add(self, transaction: Dict):
+        """Fold a transaction into the history"""
+        timestamp = transaction.get('timestamp', 0)
+        if self.count:
+            self.first_timestamp = min(self.first_timestamp, timestamp)
+            self.last_timestamp = max(self.last_timestamp, timestamp)
+        else:
+            self.first_timestamp = self.last_timestamp = timestamp
+        self.count += 1
+        self.amount_sum += transaction.get('amount', 0)
+        self.counterparties.add(transaction.get('counterparty', ''))
+
+class StreamingAnomalyScorer:
+    """Score a live transaction feed against per-wallet anomaly models
+    
+    Transactions (JSON objects with a ``wallet_address``) are collected into
+    micro-batch windows of up to window_size transactions or window_seconds
+    after the first one arrives. Each transaction's features are computed
+    against its wallet's rolling state, then every wallet in the window is
+    scored with one model call; wallets without a fresh model of their own
+    share one call to the global model, using an optional ``entity_type``
+    on the transaction as context. Anomalous transactions are emitted as
+    alerts and throughput is logged every report_seconds.
+    
+    A wallet's rolling state starts from the history summary stored with its
+    model (see AnomalyDetector.stream_state), so streaming the transactions
+    that follow its training history scores them as detect_anomaly would
+    against the full history. seed() sets the state explicitly instead.
+    """
+    
+    def __init__(self, detector: 'AnomalyDetector', window_size: int = 256, window_seconds: float = 0.5,
+                 max_wallets: Optional[int] = 1000000, report_seconds: float = 10.0):
+        self.detector = detector
+        self.window_size = window_size
+        self.window_seconds = window_seconds
+        self.max_wallets = max_wallets
+        self.report_seconds = report_seconds
+        self.states: 'OrderedDict[str, WalletStreamState]' = OrderedDict()
+        
+        self.transactions = 0
+        self.scored = 0
+        self.unscored = 0
+        self.invalid = 0
+        self.alerts = 0
+        self.windows = 0
+        self._started = time.monotonic()
+        self._last_report = self._started
+    
+    def seed(self, wallet_address: str, wallet_history: List[Dict]):
+        """Replace a wallet's rolling state with one built from its known history"""
+        self._track(wallet_address, WalletStreamState.from_transactions(wallet_history))
+    
+    def score_window(self, transactions: List[Dict]) -> List[Dict[str, Any]]:
+        """Score one micro-batch in arrival order, one result per transaction
+        
+        Each transaction sees the transactions of its wallet that arrived
+        before it, including earlier ones in the same window.
+        """
+        with metrics.timer('stream_window'):
+            rows_by_wallet: Dict[str, List[int]] = {}
+            features = np.zeros((len(transactions), len(self.detector.feature_names)))
+            history_sizes = np.zeros(len(transactions))
+            for row, tx in enumerate(transactions):
+                wallet_address = tx.get('wallet_address')
+                state = self._state(wallet_address)
+                features[row] = state.features(tx)
+                history_sizes[row] = state.count
+                state.add(tx)
+                rows_by_wallet.setdefault(wallet_address, []).append(row)
+            
+            results: List[Optional[Dict[str, Any]]] = [None] * len(transactions)
+            global_rows = []
+            for wallet_address, rows in rows_by_wallet.items():
+                try:
+                    model, scaler = self.detector.wallet_model(wallet_address, int(history_sizes[rows[0]]))
+                except Exception as e:
+                    # e.g. a missing or corrupt spill file; only this wallet goes unscored
+                    logger.error(f"Stream model load error for {wallet_address}: {e}")
+                    self._attach(results, transactions, rows, [{'error': str(e)} for _ in rows])
+                    self.unscored += len(rows)
+                    continue
+                if model is None and self.detector.get_global_model() is not None:
+                    global_rows.extend(rows)
+                    continue
+                if model is None:
+                    scored = [{'error': 'Model not trained for this wallet'} for _ in rows]
+                    self.unscored += len(rows)
+                else:
+                    try:
+                        scored = self.detector.score_features(model, scaler, features[rows])
+                        self.scored += len(rows)
+                    except Exception as e:
+                        logger.error(f"Stream scoring error for {wallet_address}: {e}")
+                        scored = [{'error': str(e)} for _ in rows]
+                        self.unscored += len(rows)
+                self._attach(results, transactions, rows, scored)
+            
+            # Every wallet without its own model shares one global model call
+            if global_rows:
+                try:
+                    scored = self.detector.score_global(
+                        features[global_rows], history_sizes[global_rows],
+                        [transactions[row].get('entity_type') for row in global_rows]
+                    )
+                    self.scored += len(global_rows)
+                except Exception as e:
+                    logger.error(f"Stream global scoring error: {e}")
+                    scored = [{'error': str(e)} for _ in global_rows]
+                    self.unscored += len(global_rows)
+                self._attach(results, transactions, global_rows, scored)
+            
+            self.transactions += len(transactions)
+            self.windows += 1
+            return results
+    
+    def run(self, lines: Iterable[str], emit=None) -> Dict[str, Any]:
+        """Consume JSON lines until the source ends, emitting an alert per anomaly
+        
+        emit is called with each alert dict (default: a JSON line on stdout).
+        Lines are read on a background thread so a window can close on time
+        even while the source is blocked.
+        """
+        import queue
+        emit = emit or _write_json_line
+        source: 'queue.Queue[Optional[str]]' = queue.Queue(maxsize=self.window_size * 4)
+        
+        def read():
+            try:
+                for line in lines:
+                    source.put(line)
+            except Exception as e:
+                logger.error(f"Transaction stream read error: {e}")
+            finally:
+                source.put(None)
+        
+        threading.Thread(target=read, name='anomaly-stream-reader', daemon=True).start()
+        
+        finished = False
+        while not finished:
+            window = []
+            window_end = None
+            while len(window) < self.window_size:
+                timeout = None if window_end is None else max(window_end - time.monotonic(), 0)
+                try:
+                    line = source.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if line is None:
+                    finished = True
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    transaction = json.loads(line)
+                    WalletStreamState.validate(transaction)
+                except ValueError as e:
+                    # Malformed JSON or records the features cannot be computed from
+                    self.invalid += 1
+                    logger.error(f"Invalid transaction line: {e}")
+                    continue
+                window.append(transaction)
+                if window_end is None:
+                    window_end = time.monotonic() + self.window_seconds
+            
+            if window:
+                for result in self.score_window(window):
+                    if result.get('is_anomaly'):
+                        self.alerts += 1
+                        emit(result)
+            
+            if time.monotonic() - self._last_report >= self.report_seconds:
+                self._report()
+        
+        self._report()
+        return self.stats()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters and sustained throughput since the scorer was created"""
+        elapsed = time.monotonic() - self._started
+        return {
+            'transactions': self.transactions,
+            'scored': self.scored,
+            'unscored': self.unscored,
+            'invalid': self.invalid,
+            'alerts': self.alerts,
+            'windows': self.windows,
+            'wallets_tracked': len(self.states),
+            'elapsed_seconds': elapsed,
+            'transactions_per_second': self.transactions / elapsed if elapsed > 0 else 0.0
+        }
+    
+    def _attach(self, results: List, transactions: List[Dict], rows: List[int], scored: List[Dict]):
+        for row, result in zip(rows, scored):
+            tx = transactions[row]
+            results[row] = {
+                'wallet_address': tx.get('wallet_address'),
+                'txid': tx.get('txid'),
+                'timestamp': tx.get('timestamp'),
+                **result
+            }
+    
+    def _state(self, wallet_address: str) -> WalletStreamState:
+        """Rolling state for a wallet, seeded from its model's history on first sight"""
+        state = self.states.get(wallet_address)
+        if state is None:
+            return self._track(wallet_address, self._initial_state(wallet_address))
+        self.states.move_to_end(wallet_address)
+        return state
+    
+    def _initial_state(self, wallet_address: str) -> WalletStreamState:
+        try:
+            state = self.detector.stream_state(wallet_address)
+        except Exception as e:
+            logger.error(f"Stream state seed error for {wallet_address}: {e}")
+            state = None
+        return state if state is not None else WalletStreamState()
+    
+    def _track(self, wallet_address: str, state: WalletStreamState) -> WalletStreamState:
+        """Store a wallet's state as most recent, evicting the least recently active beyond max_wallets"""
+        self.states[wallet_address] = state
+        self.states.move_to_end(wallet_address)
+        if self.max_wallets is not None and len(self.states) > self.max_wallets:
+            self.states.popitem(last=False)
+        return state
+    
+    def _report(self):
+        self._last_report = time.monotonic()
+        stats = self.stats()
+        logger.info(
+            f"Anomaly stream: {stats['transactions']} tx "
+            f"({stats['transactions_per_second']:.0f} tx/s), {stats['alerts']} alerts, "
+            f"{stats['unscored']} without a model, {stats['wallets_tracked']} wallets tracked"
+        )
+
+def _is_online_model(model: Any) -> bool:
+    """Whether a stored anomaly model is a RunningZScoreModel dict"""
+    return isinstance(model, dict) and model.get('type') == RunningZScoreModel.name
+
+def benchmark_anomaly_models(n_wallets: int = 20, n_history: int = 300, n_updates: int = 50,
+                             n_test: int = 100, anomaly_rate: float = 0.05,
+                             retrains: int = 3, seed: int = 42) -> Dict[str, Any]:
+    """Compare keeping IsolationForest and running-z detectors fresh on synthetic wallets
+    
+    Each wallet has regular activity with injected anomalies (large amounts
+    at unusual gaps to new counterparties). After training on n_history
+    transactions, n_updates new transactions arrive: IsolationForest must
+    retrain on the grown history (timed over `retrains` refits), while the
+    running-z model folds each one in. Both are then scored on n_test
+    held-out transactions for agreement and recall of the injected anomalies.
+    """
+    import time
+    rng = np.random.default_rng(seed)
+    
+    def make_transactions(n, start, injected):
+        base_amount = rng.uniform(1e5, 1e7)
+        timestamps = start + np.cumsum(rng.exponential(6 * 3600, n))
+        transactions = []
+        for i in range(n):
+            tx = {
+                'amount': float(base_amount * rng.lognormal(0, 0.3)),
+                'timestamp': float(timestamps[i]),
+                'fee': float(rng.uniform(500, 1500)),
+                'counterparty': f"cp{rng.integers(0, 8)}",
+                'input_count': int(rng.integers(1, 3)),
+                'output_count': int(rng.integers(1, 3))
+            }
+            if injected[i]:
+                tx['amount'] *= rng.uniform(20, 100)
+                tx['counterparty'] = f"new{i}"
+                tx['output_count'] = int(rng.integers(8, 20))
+            transactions.append(tx)
+        return transactions
+    
+    iso_detector = AnomalyDetector(model_type='isolation_forest')
+    online_detector = AnomalyDetector(model_type='running_z')
+    retrain_seconds, update_seconds = [], []
+    iso_labels, online_labels, truth = [], [], []
+    
+    for w in range(n_wallets):
+        wallet = f"wallet{w}"
+        total = n_history + n_updates + n_test
+        injected = rng.random(total) < anomaly_rate
+        transactions = make_transactions(total, 1.7e9, injected)
+        history = transactions[:n_history]
+        updates = transactions[n_history:n_history + n_updates]
+        test = transactions[n_history + n_updates:]
+        
+        iso_detector.train_detector(wallet, history)
+        online_detector.train_detector(wallet, history)
+        
+        # Keeping IsolationForest fresh means refitting on the grown history
+        grown = history + updates
+        start = time.perf_counter()
+        for _ in range(retrains):
+            iso_detector.train_detector(wallet, grown)
+        retrain_seconds.append((time.perf_counter() - start) / retrains)
+        
+        start = time.perf_counter()
+        for tx in updates:
+            online_detector.update_detector(wallet, [tx])
+        update_seconds.append((time.perf_counter() - start) / n_updates)
+        
+        # Score each held-out transaction against the history before it
+        for i, tx in enumerate(test):
+            prefix = grown + test[:i]
+            iso_labels.append(iso_detector.detect_anomaly(wallet, tx, prefix)['is_anomaly'])
+            online_labels.append(online_detector.detect_anomaly(wallet, tx, prefix)['is_anomaly'])
+        truth.extend(injected[n_history + n_updates:])
+    
+    iso_labels, online_labels, truth = map(np.asarray, (iso_labels, online_labels, truth))
+    
+    def recall(labels):
+        return float(np.mean(labels[truth])) if truth.any() else None
+    
+    return {
+        'wallets': n_wallets,
+        'history': n_history,
+        'updates_per_wallet': n_updates,
+        'isolation_forest': {
+            'refresh_seconds_per_update': float(np.mean(retrain_seconds)),
+            'flag_rate': float(np.mean(iso_labels)),
+            'recall_injected': recall(iso_labels)
+        },
+        'running_z': {
+            'refresh_seconds_per_update': float(np.mean(update_seconds)),
+            'flag_rate': float(np.mean(online_labels)),
+            'recall_injected': recall(online_labels)
+        },
+        'label_agreement': float(np.mean(iso_labels == online_labels)),
+        'speedup': float(np.mean(retrain_seconds) / np.mean(update_seconds))
+    }
+
+def _write_json_line(record: Dict):
+    sys.stdout.write(json.dumps(record, default=str) + '\n')
+    sys.stdout.flush()
+
+def _follow_lines(path: str, poll_interval: float = 0.5) -> Iterator[str]:
+    """Yield lines of a file from the start, then keep yielding lines appended to it"""
+    with open(path) as f:
+        partial = ''
+        while True:
+            line = f.readline()
+            if not line:
+                time.sleep(poll_interval)
+                continue
+            partial += line
+            if partial.endswith('\n'):
+                yield partial
+                partial = ''
+
+class StubInsightsClient:
+    """Offline stand-in for the Groq client with a fixed, configurable latency"""
+    
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+    
+    def _create(self, messages: List[Dict], **kwargs) -> Any:
+        time.sleep(self.latency)
+        context = " ".join(messages[-1]['content'].split())
+        content = f"[stub insights] {context}"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
 class AIOrchestrator:
     """Main orchestrator for AI microservice"""
     
     def __init__(self):
-        self.classifier = WalletBehaviorClassifier()
-        self.forecaster = TimeSeriesForecaster()
-        self.anomaly_detector = AnomalyDetector()
+        # Per-wallet model store limits, e.g. AI_MODEL_STORE_MAX_MB=2048 AI_MODEL_SPILL_DIR=/var/cache/chainsignal
+        max_mb = os.getenv('AI_MODEL_STORE_MAX_MB')
+        max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else None
+        spill_dir = os.getenv('AI_MODEL_SPILL_DIR')
+        forecast_backend = os.getenv('AI_FORECAST_BACKEND', 'prophet')
+        
+        # Incremental classifier features, persisted under AI_FEATURE_STORE_DIR when set
+        feature_store_dir = os.getenv('AI_FEATURE_STORE_DIR')
+        feature_store = WalletFeatureStore(
+            max_wallets=int(os.getenv('AI_FEATURE_STORE_MAX_WALLETS', '100000')),
+            spill_dir=feature_store_dir
+        ) if feature_store_dir else None
+        
+        self.classifier = WalletBehaviorClassifier(feature_store=feature_store)
+        self.forecaster = TimeSeriesForecaster(max_bytes=max_bytes, spill_dir=spill_dir,
+                                               backend=forecast_backend)
+        max_model_age = os.getenv('AI_ANOMALY_MODEL_MAX_AGE_SECONDS')
+        self.anomaly_detector = AnomalyDetector(max_bytes=max_bytes, spill_dir=spill_dir,
+                                                model_type=os.getenv('AI_ANOMALY_MODEL', 'isolation_forest'),
+                                                max_model_age=float(max_model_age) if max_model_age else None)
         self.groq_client = None
         self.fal_client = None
+        
+        # CPU-bound stages run here so they overlap and never block the event loop
+        from concurrent.futures import ThreadPoolExecutor
+        self.stage_workers = int(os.getenv('AI_STAGE_WORKERS', '4'))
+        self.stage_executor = ThreadPoolExecutor(max_workers=self.stage_workers, thread_name_prefix='ai-stage')
+        # Stages still running after their request gave up on them; a running thread
+        # cannot be cancelled, so while they hold every worker new stages are skipped
+        self._stage_lock = threading.Lock()
+        self.abandoned_stages = 0
+        self.skipped_stages = 0
+        # Default per-request deadline in seconds (unset = no deadline)
+        deadline = os.getenv('AI_ANALYSIS_DEADLINE_SECONDS')
+        self.analysis_deadline = float(deadline) if deadline else None
+        
+        # LLM insights: call timeout and content-addressed result cache
+        self.insights_timeout = float(os.getenv('AI_INSIGHTS_TIMEOUT_SECONDS', '10'))
+        self.insights_cache = TTLCache(
+            maxsize=int(os.getenv('AI_INSIGHTS_CACHE_SIZE', '1024')),
+            ttl=float(os.getenv('AI_INSIGHTS_CACHE_TTL_SECONDS', '3600'))
+        )
+        
+        # Opt-in request profiling: AI_PROFILE=1 profiles every request, otherwise per-request flag
+        self.profiler = RequestProfiler(enabled=os.getenv('AI_PROFILE') == '1',
+                                        output_dir=os.getenv('AI_PROFILE_DIR'))
+    
+    def model_store_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit/miss/eviction counters for the per-wallet model stores"""
+        return {
+            f'{self.forecaster.backend.name}_forecaster': self.forecaster.models.stats(),
+            'isolation_forest': self.anomaly_detector.models.stats(),
+            'anomaly_scalers': self.anomaly_detector.scalers.stats()
+        }
+    
+    def render_metrics(self) -> str:
+        """Latency summaries and model store counters in Prometheus text format"""
+        lines = [metrics.render_prometheus().rstrip('\n')]
+        stats = self.model_store_stats()
+        lines += [
+            '# HELP chainsignal_ai_model_store_events_total Per-wallet model store lookups and evictions',
+            '# TYPE chainsignal_ai_model_store_events_total counter'
+        ]
+        for store, store_stats in stats.items():
+            for event in ('hits', 'misses', 'evictions', 'disk_loads'):
+                lines.append(f'chainsignal_ai_model_store_events_total{{store="{store}",event="{event}"}} {store_stats[event]}')
+        lines += [
+            '# HELP chainsignal_ai_model_store_entries Per-wallet models held in memory or spilled to disk',
+            '# TYPE chainsignal_ai_model_store_entries gauge'
+        ]
+        for store, store_stats in stats.items():
+            for location in ('in_memory', 'spilled'):
+                lines.append(f'chainsignal_ai_model_store_entries{{store="{store}",location="{location}"}} {store_stats["entries_" + location]}')
+        lines += [
+            '# HELP chainsignal_ai_abandoned_stages Analysis stages still running after their request gave up',
+            '# TYPE chainsignal_ai_abandoned_stages gauge',
+            f'chainsignal_ai_abandoned_stages {self.abandoned_stages}',
+            '# HELP chainsignal_ai_skipped_stages_total Analysis stages skipped while abandoned stages held every worker',
+            '# TYPE chainsignal_ai_skipped_stages_total counter',
+            f'chainsignal_ai_skipped_stages_total {self.skipped_stages}'
+        ]
+        return '\n'.join(lines) + '\n'
+    
+    def flush(self):
+        """Persist incremental per-wallet state (the classifier feature store)"""
+        try:
+            if self.classifier.feature_store is not None:
+                self.classifier.feature_store.flush()
+        except Exception as e:
+            logger.error(f"Feature store flush error: {e}")
+    
+    def warm_up(self):
+        """Load models up front so the first request does not pay for it"""
+        try:
+            if self.classifier.session is None:
+                self.classifier.load_model()
+        except Exception as e:
+            logger.error(f"Model warm-up error: {e}")
     
     async def initialize_ai_clients(self):
         """Initialize Groq and Fal clients"""
         try:
             # Initialize Groq client (assuming API key is in environment)
-            import os
             groq_api_key = os.getenv('GROQ_API_KEY')
-            if groq_api_key:
+            if os.getenv('AI_INSIGHTS_BACKEND') == 'stub':
+                # Offline insights for load testing
+                latency_ms = float(os.getenv('AI_INSIGHTS_STUB_LATENCY_MS', '0'))
+                self.groq_client = StubInsightsClient(latency=latency_ms / 1000)
+                logger.info("Stub insights client initialized")
+            elif groq_api_key:
                 from groq import Groq
                 self.groq_client = Groq(api_key=groq_api_key)
                 logger.info("Groq client initialized")
@@ -546,95 +2519,338 @@ class AIOrchestrator:
         except Exception as e:
             logger.error(f"AI client initialization error: {e}")
     
-    async def analyze_wallet_comprehensive(self, wallet_address: str, wallet_data: Dict) -> Dict[str, Any]:
-        """Comprehensive wallet analysis using all AI models"""
+    async def analyze_wallet_comprehensive(self, wallet_address: str, wallet_data: Dict,
+                                           deadline: Optional[float] = None,
+                                           classification: Optional[Dict] = None,
+                                           profile: Optional[bool] = None,
+                                           request_id: Optional[str] = None) -> Dict[str, Any]:
+        """Comprehensive wallet analysis using all AI models
+        
+        Classification, forecasting and anomaly detection are independent and
+        run concurrently on the stage executor. If the deadline (seconds) passes
+        or the request is cancelled, the stages that finished are returned and
+        the rest are listed under 'incomplete_stages'; so are stages skipped
+        because abandoned stages of earlier requests hold every stage worker.
+        A precomputed classification (e.g. from predict_batch) skips the
+        classifier stage.
+        
+        profile=True (or AI_PROFILE=1 when profile is None) captures a profile
+        of this request under request_id; its location is returned in 'profile'.
+        """
+        if not (profile or (profile is None and self.profiler.enabled)):
+            return await self._analyze_wallet(wallet_address, wallet_data, deadline, classification)
+        
+        capture = self.profiler.capture(request_id or f"{wallet_address}-{int(time.time() * 1000)}")
+        if capture is None:
+            return await self._analyze_wallet(wallet_address, wallet_data, deadline, classification)
         try:
-            results = {
-                'wallet_address': wallet_address,
-                'analysis_timestamp': datetime.now().isoformat(),
-                'models_used': []
-            }
-            
-            # 1. Entity Classification
-            classification = self.classifier.predict(wallet_data)
-            results['classification'] = classification
-            results['models_used'].append('wallet_classifier')
-            
-            # 2. Time Series Forecasting
-            transaction_history = wallet_data.get('transaction_history', [])
-            if len(transaction_history) >= 10:
-                forecast_results = self.forecaster.forecast(wallet_address)
-                results['forecasting'] = forecast_results
-                results['models_used'].append('prophet_forecaster')
-            
-            # 3. Anomaly Detection for recent transactions
-            recent_transactions = transaction_history[-10:]  # Last 10 transactions
-            anomaly_results = []
-            
-            for tx in recent_transactions:
-                anomaly_result = self.anomaly_detector.detect_anomaly(
-                    wallet_address, tx, transaction_history
-                )
-                anomaly_results.append(anomaly_result)
-            
-            results['anomaly_detection'] = {
-                'recent_transactions_analyzed': len(anomaly_results),
-                'anomalies_found': sum(1 for r in anomaly_results if r.get('is_anomaly', False)),
-                'details': anomaly_results
-            }
-            results['models_used'].append('isolation_forest')
-            
-            # 4. AI-Generated Insights using Groq
-            if self.groq_client:
-                insights = await self._generate_ai_insights(results)
-                results['ai_insights'] = insights
-                results['models_used'].append('groq_llm')
-            
-            # 5. Risk Assessment Summary
-            results['risk_summary'] = self._calculate_comprehensive_risk(results)
-            
-            return results
+            results = await self._analyze_wallet(wallet_address, wallet_data, deadline, classification, capture)
+        finally:
+            summary = capture.stop()
+        results['profile'] = summary
+        return results
+    
+    async def _analyze_wallet(self, wallet_address: str, wallet_data: Dict, deadline: Optional[float],
+                              classification: Optional[Dict],
+                              capture: Optional[ProfileCapture] = None) -> Dict[str, Any]:
+        """Run the analysis stages for analyze_wallet_comprehensive"""
+        deadline = deadline if deadline is not None else self.analysis_deadline
+        request_timings = metrics.request_timings()
+        try:
+            with request_timings:
+                loop = asyncio.get_running_loop()
+                started = loop.time()
+                started_perf = time.perf_counter()
+                results = {
+                    'wallet_address': wallet_address,
+                    'analysis_timestamp': datetime.now().isoformat(),
+                    'models_used': []
+                }
+                
+                transaction_history = wallet_data.get('transaction_history', [])
+                
+                # (result key, model name, stage function), in reporting order; a callable
+                # model name derives the name from the stage result
+                stages = []
+                if classification is None:
+                    stages.append(('classification', 'wallet_classifier', lambda: self.classifier.predict(wallet_data, wallet_address)))
+                else:
+                    results['classification'] = classification
+                    results['models_used'].append('wallet_classifier')
+                if len(transaction_history) >= 10:
+                    # The dashboard only plots future days
+                    stages.append((
+                        'forecasting', f'{self.forecaster.backend.name}_forecaster',
+                        lambda: self.forecaster.forecast(wallet_address, include_history=False)
+                    ))
+                stages.append((
+                    'anomaly_detection', lambda result: result.get('model_used'),
+                    lambda: self._detect_recent_anomalies(wallet_address, transaction_history)
+                ))
+                
+                # 1-3. Classification, forecasting and anomaly detection, concurrently
+                stage_fns = [_timed(key, stage) for key, _, stage in stages]
+                if capture is not None:
+                    stage_fns = [capture.wrap(fn) for fn in stage_fns]
+                futures = [self._submit_stage(request_timings.bind(fn)) for fn in stage_fns]
+                waiters = [asyncio.wrap_future(future) if future is not None else None for future in futures]
+                cancelled = False
+                try:
+                    pending = [waiter for waiter in waiters if waiter is not None]
+                    if pending:
+                        await asyncio.wait(pending, timeout=deadline)
+                except asyncio.CancelledError:
+                    # Return what has finished instead of discarding it
+                    cancelled = True
+                
+                incomplete_stages = []
+                for (key, model_name, _), future, waiter in zip(stages, futures, waiters):
+                    if future is None:
+                        incomplete_stages.append(key)
+                    elif not future.done():
+                        waiter.cancel()
+                        self._abandon_stage(future)
+                        incomplete_stages.append(key)
+                    elif future.exception() is not None:
+                        logger.error(f"Analysis stage {key} error: {future.exception()}")
+                        results[key] = {'error': str(future.exception())}
+                    else:
+                        results[key] = future.result()
+                        if callable(model_name):
+                            model_name = model_name(results[key])
+                        if model_name:
+                            results['models_used'].append(model_name)
+                
+                # 4. AI-Generated Insights using Groq
+                if self.groq_client and not cancelled:
+                    remaining = None if deadline is None else deadline - (loop.time() - started)
+                    if remaining is not None and remaining <= 0:
+                        incomplete_stages.append('ai_insights')
+                    else:
+                        try:
+                            with metrics.timer('ai_insights'):
+                                insights = await asyncio.wait_for(self._generate_ai_insights(results), remaining)
+                            results['ai_insights'] = insights
+                            results['models_used'].append('groq_llm')
+                        except asyncio.TimeoutError:
+                            incomplete_stages.append('ai_insights')
+                
+                # 5. Risk Assessment Summary
+                with metrics.timer('risk_summary'):
+                    results['risk_summary'] = self._calculate_comprehensive_risk(results)
+                
+                if incomplete_stages:
+                    results['incomplete_stages'] = incomplete_stages
+                    results['cancelled'] = cancelled
+                
+                if metrics.enabled:
+                    metrics.observe('total', (time.perf_counter() - started_perf) * 1000)
+                    results['timings_ms'] = request_timings.as_dict()
+                
+                return results
             
         except Exception as e:
             logger.error(f"Comprehensive analysis error: {e}")
             return {'error': str(e)}
     
+    async def analyze_wallets(self, wallets: Iterable[Tuple[str, Dict]], concurrency: int = 16,
+                              batch_size: int = 64,
+                              deadline: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Analyze many wallets, yielding results in completion order
+        
+        wallets is an iterable of (wallet_address, wallet_data) pairs consumed
+        lazily, with at most `concurrency` analyses in flight, so memory stays
+        flat for arbitrarily large inputs. Classification runs ahead of the
+        analyses: whenever the prefetched wallets run out, the next batch_size
+        wallets are classified with one predict_batch call, independently of
+        how many analysis slots are free. An error in one wallet is reported
+        in its own result and does not affect the others. Closing the
+        generator early cancels the outstanding classifications and analyses.
+        """
+        iterator = iter(wallets)
+        # (wallet_address, wallet_data, classify future, row in its batch) waiting for a slot
+        prefetched = deque()
+        in_flight = set()
+        exhausted = False
+        
+        try:
+            while True:
+                while len(in_flight) < concurrency:
+                    if not prefetched and not exhausted:
+                        batch = list(itertools.islice(iterator, batch_size))
+                        if not batch:
+                            exhausted = True
+                        else:
+                            # Skipped while the executor is saturated; each analysis then
+                            # classifies its own wallet if a worker is free by then
+                            classify = self._submit_stage(lambda batch=batch: self.classifier.predict_batch(
+                                [wallet_data for _, wallet_data in batch],
+                                wallet_addresses=[wallet_address for wallet_address, _ in batch]
+                            ))
+                            classify = asyncio.wrap_future(classify) if classify is not None else None
+                            prefetched.extend(
+                                (wallet_address, wallet_data, classify, index)
+                                for index, (wallet_address, wallet_data) in enumerate(batch)
+                            )
+                    if not prefetched:
+                        break
+                    
+                    wallet_address, wallet_data, classify, index = prefetched.popleft()
+                    in_flight.add(asyncio.ensure_future(
+                        self._analyze_batch_item(wallet_address, wallet_data, classify, index, deadline)
+                    ))
+                
+                if not in_flight:
+                    return
+                
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            # Reached early only when the consumer closed or cancelled the generator
+            for _, _, classify, _ in prefetched:
+                if classify is not None:
+                    classify.cancel()
+            for task in in_flight:
+                task.cancel()
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+    
+    async def _analyze_batch_item(self, wallet_address: str, wallet_data: Dict,
+                                  classify: Optional[asyncio.Future], index: int,
+                                  deadline: Optional[float]) -> Dict[str, Any]:
+        """Analyze one wallet of an analyze_wallets batch, isolating its errors"""
+        try:
+            try:
+                classification = (await classify)[index] if classify is not None else None
+            except Exception as e:
+                logger.error(f"Batch classification error: {e}")
+                classification = {'entity_type': 'unknown', 'confidence': 0.0, 'risk_score': 0.5, 'error': str(e)}
+            
+            result = await self.analyze_wallet_comprehensive(
+                wallet_address, wallet_data, deadline=deadline, classification=classification
+            )
+            # Results arrive in completion order, so every result must name its wallet
+            result.setdefault('wallet_address', wallet_address)
+            return result
+            
+        except Exception as e:
+            logger.error(f"Wallet analysis error for {wallet_address}: {e}")
+            return {'wallet_address': wallet_address, 'error': str(e)}
+    
+    def _submit_stage(self, fn) -> Optional['Future']:
+        """Run fn on the stage executor, or return None while abandoned stages hold every worker
+        
+        Queued behind them, fn would only wait out its request's deadline and
+        delay the requests after it; skipping it fails fast instead.
+        """
+        with self._stage_lock:
+            if self.abandoned_stages >= self.stage_workers:
+                self.skipped_stages += 1
+                return None
+        return self.stage_executor.submit(fn)
+    
+    def _abandon_stage(self, future: 'Future'):
+        """Give up on a stage; one already running counts as abandoned until it returns"""
+        if future.cancel():
+            return
+        with self._stage_lock:
+            self.abandoned_stages += 1
+        future.add_done_callback(self._release_stage)
+    
+    def _release_stage(self, future: 'Future'):
+        with self._stage_lock:
+            self.abandoned_stages -= 1
+    
+    def _detect_recent_anomalies(self, wallet_address: str, transaction_history: List[Dict]) -> Dict[str, Any]:
+        """Anomaly detection for the most recent transactions
+        
+        'model_used' names the model that produced the scores: the wallet's
+        'isolation_forest' or 'running_z' model, or 'global_isolation_forest'
+        for the shared cold-start model (None if nothing could be scored).
+        """
+        recent_transactions = transaction_history[-10:]  # Last 10 transactions
+        anomaly_results = self.anomaly_detector.detect_anomalies_batch(
+            wallet_address, recent_transactions, transaction_history
+        )
+        model_type = next((r['model_type'] for r in anomaly_results if 'model_type' in r), None)
+        
+        return {
+            'recent_transactions_analyzed': len(anomaly_results),
+            'anomalies_found': sum(1 for r in anomaly_results if r.get('is_anomaly', False)),
+            'details': anomaly_results,
+            'model_used': 'global_isolation_forest' if model_type == 'global' else model_type
+        }
+    
     async def _generate_ai_insights(self, analysis_results: Dict) -> Dict[str, Any]:
-        """Generate AI insights using Groq"""
+        """Generate AI insights using Groq
+        
+        The blocking client call runs off the event loop with a timeout, and
+        results are cached by a hash of the normalized context, so wallets
+        with the same entity type, bucketed scores and anomaly count share one
+        generation until the cache entry expires.
+        """
         try:
+            normalized = self._normalize_insights_context(analysis_results)
+            cache_key = hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+            cached = self.insights_cache.get(cache_key)
+            if cached is not None:
+                return {**cached, 'cached': True}
+            
             # Prepare context for Groq
             context = f"""
             Wallet Analysis Results:
-            - Entity Type: {analysis_results.get('classification', {}).get('entity_type', 'unknown')}
-            - Confidence: {analysis_results.get('classification', {}).get('confidence', 0):.2f}
-            - Risk Score: {analysis_results.get('classification', {}).get('risk_score', 0):.2f}
-            - Anomalies Found: {analysis_results.get('anomaly_detection', {}).get('anomalies_found', 0)}
+            - Entity Type: {normalized['entity_type']}
+            - Confidence: {normalized['confidence']:.2f}
+            - Risk Score: {normalized['risk_score']:.2f}
+            - Anomalies Found: {normalized['anomalies_found']}
             
             Please provide insights about this wallet's behavior, potential risks, and recommendations.
             """
             
-            response = self.groq_client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": "You are a blockchain analytics expert specializing in Bitcoin wallet behavior analysis."},
-                    {"role": "user", "content": context}
-                ],
-                model="mixtral-8x7b-32768",
-                temperature=0.3,
-                max_tokens=500
-            )
+            loop = asyncio.get_running_loop()
+            with metrics.timer('groq_completion'):
+                response = await asyncio.wait_for(
+                    loop.run_in_executor(None, lambda: self.groq_client.chat.completions.create(
+                        messages=[
+                            {"role": "system", "content": "You are a blockchain analytics expert specializing in Bitcoin wallet behavior analysis."},
+                            {"role": "user", "content": context}
+                        ],
+                        model="mixtral-8x7b-32768",
+                        temperature=0.3,
+                        max_tokens=500
+                    )),
+                    self.insights_timeout
+                )
             
             insights_text = response.choices[0].message.content
             
-            return {
+            insights = {
                 'summary': insights_text,
                 'generated_at': datetime.now().isoformat(),
-                'model_used': 'groq_mixtral'
+                'model_used': 'stub' if isinstance(self.groq_client, StubInsightsClient) else 'groq_mixtral'
             }
+            self.insights_cache.set(cache_key, insights)
+            return insights
             
+        except asyncio.TimeoutError:
+            logger.error(f"AI insights generation timed out after {self.insights_timeout}s")
+            return {'error': 'AI insights generation timed out'}
         except Exception as e:
             logger.error(f"AI insights generation error: {e}")
             return {'error': str(e)}
     
+    def _normalize_insights_context(self, analysis_results: Dict) -> Dict[str, Any]:
+        """Reduce analysis results to the coarse context the insights prompt depends on"""
+        classification = analysis_results.get('classification', {})
+        return {
+            'entity_type': classification.get('entity_type', 'unknown'),
+            # 0.1-wide buckets so near-identical scores share a cache entry
+            'confidence': round(float(classification.get('confidence', 0)), 1),
+            'risk_score': round(float(classification.get('risk_score', 0)), 1),
+            'anomalies_found': int(analysis_results.get('anomaly_detection', {}).get('anomalies_found', 0))
+        }
+    
     def _calculate_comprehensive_risk(self, analysis_results: Dict) -> Dict[str, Any]:
         """Calculate comprehensive risk score"""
         try:
@@ -702,8 +2918,213 @@ class AIOrchestrator:
         
         return recommendations.get(risk_level, ["Standard monitoring recommended"])
 
+class AIWorker:
+    """Long-lived worker serving AIOrchestrator over newline-delimited JSON
+    
+    Each request line is ``{"id": ..., "wallet_address": ..., "wallet_data": {...}}``
+    with optional ``"deadline_ms"`` and ``"profile"`` (capture a profile
+    named after the request id). A ``{"id": ..., "type": "metrics"}`` line
+    returns the latency and model store metrics as Prometheus text in "result".
+    Requests are pipelined: they are accepted as soon as they arrive and each
+    response line ``{"id": ..., "result": {...}}`` (or ``"error"``) is written
+    back in the order the requests were received.
+    """
+    
+    # Wallet payloads easily exceed asyncio's default 64 KiB line limit
+    STREAM_LIMIT = 64 * 1024 * 1024
+    
+    def __init__(self, orchestrator: Optional[AIOrchestrator] = None, max_pending: int = 64):
+        self.orchestrator = orchestrator or AIOrchestrator()
+        self.max_pending = max_pending
+        self._request_ids = itertools.count(1)
+    
+    async def start(self):
+        """Initialize AI clients and keep models warm for the worker lifetime"""
+        await self.orchestrator.initialize_ai_clients()
+        self.orchestrator.warm_up()
+        logger.info("AI worker ready")
+    
+    def stop(self):
+        """Persist incremental state before the worker exits"""
+        self.orchestrator.flush()
+    
+    async def handle_request(self, line: bytes) -> Dict[str, Any]:
+        """Run one analysis request and wrap the result with its request id"""
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id', next(self._request_ids))
+            if request.get('type') == 'metrics':
+                return {'id': request_id, 'result': self.orchestrator.render_metrics()}
+            
+            deadline_ms = request.get('deadline_ms')
+            result = await self.orchestrator.analyze_wallet_comprehensive(
+                request['wallet_address'],
+                request.get('wallet_data', {}),
+                deadline=deadline_ms / 1000 if deadline_ms is not None else None,
+                profile=request.get('profile'),
+                request_id=str(request_id)
+            )
+            return {'id': request_id, 'result': result}
+            
+        except Exception as e:
+            logger.error(f"Worker request error: {e}")
+            return {'id': request_id, 'error': str(e)}
+    
+    async def serve_stream(self, reader, writer) -> None:
+        """Read pipelined requests from reader and write ordered responses to writer"""
+        pending: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending)
+        
+        async def write_responses():
+            while True:
+                task = await pending.get()
+                if task is None:
+                    break
+                response = await task
+                writer.write((json.dumps(response, default=str) + '\n').encode())
+                await writer.drain()
+        
+        writer_task = asyncio.create_task(write_responses())
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                await pending.put(asyncio.create_task(self.handle_request(line)))
+        finally:
+            await pending.put(None)
+            await writer_task
+    
+    async def serve_stdio(self) -> None:
+        """Serve requests from stdin, writing responses to stdout"""
+        await self.serve_stream(_StdinReader(), _StdoutWriter())
+    
+    async def serve_unix_socket(self, socket_path: str) -> None:
+        """Serve requests on a local Unix socket, one ordered stream per connection"""
+        async def handle_connection(reader, writer):
+            try:
+                await self.serve_stream(reader, writer)
+            finally:
+                writer.close()
+        
+        server = await asyncio.start_unix_server(
+            handle_connection, path=socket_path, limit=self.STREAM_LIMIT
+        )
+        logger.info(f"AI worker listening on {socket_path}")
+        async with server:
+            await server.serve_forever()
+
+class _StdinReader:
+    """Minimal StreamReader stand-in for stdin (works for pipes and redirected files)"""
+    
+    async def readline(self) -> bytes:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, sys.stdin.buffer.readline)
+
+class _StdoutWriter:
+    """Minimal StreamWriter stand-in for the worker's stdout"""
+    
+    def write(self, data: bytes):
+        sys.stdout.buffer.write(data)
+    
+    async def drain(self):
+        sys.stdout.buffer.flush()
+
 # Example usage and testing
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ChainSignal AI microservice")
+    parser.add_argument('--worker', action='store_true',
+                        help="run as a long-lived worker reading newline-delimited JSON requests")
+    parser.add_argument('--socket', help="serve worker requests on this Unix socket instead of stdin")
+    parser.add_argument('--train-forecasts', metavar='PATH',
+                        help="bulk-train forecasters from newline-delimited JSON "
+                             "{wallet_address, transaction_history} records ('-' for stdin)")
+    parser.add_argument('--workers', type=int, help="process pool size for --train-forecasts")
+    parser.add_argument('--train-global-anomaly', metavar='PATH',
+                        help="train the shared cold-start anomaly model from newline-delimited JSON "
+                             "{wallet_address, transaction_history, entity_type?} records ('-' for stdin)")
+    parser.add_argument('--stream-anomalies', metavar='PATH',
+                        help="score newline-delimited JSON transactions against trained anomaly "
+                             "models ('-' for stdin), writing alerts as JSON lines")
+    parser.add_argument('--follow', action='store_true',
+                        help="with --stream-anomalies PATH, keep reading lines appended to the file")
+    parser.add_argument('--window-size', type=int, default=256,
+                        help="maximum transactions per --stream-anomalies micro-batch")
+    parser.add_argument('--window-ms', type=float, default=500,
+                        help="maximum wait in ms before a partial --stream-anomalies micro-batch is scored")
+    parser.add_argument('--benchmark-anomaly', action='store_true',
+                        help="compare refresh cost and detection agreement of IsolationForest and running-z anomaly models")
+    parser.add_argument('--benchmark-forecast', action='store_true',
+                        help="compare accuracy and throughput of the Prophet and NumPy forecast backends")
+    args = parser.parse_args()
+    
+    def train_forecasts():
+        spill_dir = os.getenv('AI_MODEL_SPILL_DIR')
+        if not spill_dir:
+            logger.warning("AI_MODEL_SPILL_DIR is not set; trained forecasters will not be persisted")
+        forecaster = TimeSeriesForecaster(max_models=0, spill_dir=spill_dir,
+                                          backend=os.getenv('AI_FORECAST_BACKEND', 'prophet'))
+        
+        source = sys.stdin if args.train_forecasts == '-' else open(args.train_forecasts)
+        with source:
+            records = (json.loads(line) for line in source if line.strip())
+            wallets = ((r['wallet_address'], r['transaction_history']) for r in records)
+            for result in forecaster.train_models_bulk(wallets, max_workers=args.workers):
+                print(json.dumps(result, default=str), flush=True)
+    
+    def train_global_anomaly():
+        spill_dir = os.getenv('AI_MODEL_SPILL_DIR')
+        if not spill_dir:
+            logger.warning("AI_MODEL_SPILL_DIR is not set; the global anomaly model will not be persisted")
+        detector = AnomalyDetector(spill_dir=spill_dir)
+        entity_types = {}
+        
+        def wallets(source):
+            for line in source:
+                if line.strip():
+                    record = json.loads(line)
+                    if record.get('entity_type'):
+                        entity_types[record['wallet_address']] = record['entity_type']
+                    yield record['wallet_address'], record['transaction_history']
+        
+        source = sys.stdin if args.train_global_anomaly == '-' else open(args.train_global_anomaly)
+        with source:
+            result = detector.train_global_detector(wallets(source), entity_types)
+        print(json.dumps(result, default=str))
+    
+    def stream_anomalies():
+        # Per-wallet models are read from the spill directory written by training
+        spill_dir = os.getenv('AI_MODEL_SPILL_DIR')
+        if not spill_dir:
+            logger.warning("AI_MODEL_SPILL_DIR is not set; only models trained in this process can score")
+        scorer = StreamingAnomalyScorer(AnomalyDetector(spill_dir=spill_dir), window_size=args.window_size,
+                                        window_seconds=args.window_ms / 1000)
+        
+        if args.stream_anomalies == '-':
+            lines = sys.stdin
+        elif args.follow:
+            lines = _follow_lines(args.stream_anomalies)
+        else:
+            lines = open(args.stream_anomalies)
+        try:
+            stats = scorer.run(lines)
+        except KeyboardInterrupt:
+            stats = scorer.stats()
+        logger.info(f"Anomaly stream finished: {json.dumps(stats)}")
+    
+    async def serve():
+        worker = AIWorker()
+        await worker.start()
+        try:
+            if args.socket:
+                await worker.serve_unix_socket(args.socket)
+            else:
+                await worker.serve_stdio()
+        finally:
+            worker.stop()
+    
     async def main():
         # Initialize AI orchestrator
         orchestrator = AIOrchestrator()
@@ -747,5 +3168,18 @@ if __name__ == "__main__":
         
         print(json.dumps(results, indent=2, default=str))
     
-    # Run the example
-    asyncio.run(main())
+    if args.benchmark_forecast:
+        print(json.dumps(benchmark_forecast_backends(), indent=2))
+    elif args.benchmark_anomaly:
+        print(json.dumps(benchmark_anomaly_models(), indent=2))
+    elif args.train_forecasts:
+        train_forecasts()
+    elif args.train_global_anomaly:
+        train_global_anomaly()
+    elif args.stream_anomalies:
+        stream_anomalies()
+    elif args.worker or args.socket:
+        asyncio.run(serve())
+    else:
+        # Run the example
+        asyncio.run(main())
@@ -1,36 +1,666 @@
 import numpy as np
-import pandas as pd
-from sklearn.cluster import DBSCAN, KMeans
-from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import IsolationForest
-import networkx as nx
 import json
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 import logging
+import os
+import sys
+import time
+
+# Shared modules live next to this script, which is run directly rather than imported as a package
+_LIB_DIR = os.path.dirname(os.path.abspath(__file__))
+if _LIB_DIR not in sys.path:
+    sys.path.insert(0, _LIB_DIR)
+from request_profiler import RequestProfiler
+from wallet_feature_store import WalletFeatureStore
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class ClusteringFeatureStore(WalletFeatureStore):
+    """WalletFeatureStore with the extra statistics behind the clustering features
+    
+    Adds similar-output, high-fee and rapid-interval counts, the suspicious
+    amount score, per-amount counts, hour-of-day counts and active days to
+    the shared per-wallet state; with it, WalletPrimitives.from_state needs
+    nothing from the raw history.
+    """
+    
+    def _reset_transactions(self, state: Dict):
+        super()._reset_transactions(state)
+        state.update(similar_output_count=0, high_fee_count=0, suspicious_sum=0.0, amount_counts={})
+    
+    def _reset_timestamps(self, state: Dict):
+        super()._reset_timestamps(state)
+        state.update(rapid_gap_count=0, hour_counts=[0] * 24, active_days=set())
+    
+    def _fold_transaction(self, state: Dict, tx: Dict):
+        super()._fold_transaction(state, tx)
+        amount = tx.get('amount', 0)
+        if amount > 0:
+            amount_counts = state['amount_counts']
+            amount_counts[amount] = amount_counts.get(amount, 0) + 1
+            if amount % 1000000 == 0:  # Very round amounts
+                state['suspicious_sum'] += 0.5
+            elif str(amount).count('0') > 6:  # Many zeros
+                state['suspicious_sum'] += 0.3
+        
+        state['similar_output_count'] += _output_flags(tx.get('outputs', []))[1]
+        if tx.get('fee', 0) / max(tx.get('amount', 1), 1) > 0.001:  # High fee rate
+            state['high_fee_count'] += 1
+    
+    def _fold_timestamp(self, state: Dict, timestamp: float, gap: Optional[float]):
+        super()._fold_timestamp(state, timestamp, gap)
+        if gap is not None and gap < WalletPrimitives.RAPID_GAP_SECONDS:
+            state['rapid_gap_count'] += 1
+        state['hour_counts'][int((timestamp % 86400) // 3600)] += 1
+        state['active_days'].add(timestamp // 86400)
+
+def _entropy(counts: np.ndarray) -> float:
+    """Shannon entropy (bits) of a histogram, ignoring empty bins"""
+    counts = counts[counts > 0]
+    if len(counts) == 0:
+        return 0.0
+    probs = counts / np.sum(counts)
+    return -np.sum(probs * np.log2(probs))
+
+def _segment_offsets(lengths: np.ndarray) -> np.ndarray:
+    """Start offset of every segment in a flattened (CSR) array"""
+    offsets = np.zeros(len(lengths), dtype=np.intp)
+    np.cumsum(lengths[:-1], out=offsets[1:])
+    return offsets
+
+def _segment_sum(values: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """np.sum of every segment of values (0.0 for empty segments)
+    
+    reduceat seeds a segment with its first element and adds the rest
+    pairwise, so each segment is prefixed with a zero to reproduce np.sum's
+    summation order (and therefore its rounding) exactly.
+    """
+    n_segments = len(lengths)
+    if n_segments == 0:
+        return np.zeros(0)
+    padded = np.zeros(len(values) + n_segments)
+    padded[np.arange(len(values)) + np.repeat(np.arange(1, n_segments + 1), lengths)] = values
+    return np.add.reduceat(padded, _segment_offsets(lengths) + np.arange(n_segments))
+
+def _segment_sequential_sum(values: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Left-to-right sum of every segment, as a Python ``+=`` loop computes it
+    
+    Segments are packed into rows of power-of-two width (zero padded at the
+    end) and accumulated along the rows, so memory stays within 2x of values.
+    """
+    totals = np.zeros(len(lengths))
+    nonempty = np.flatnonzero(lengths)
+    if len(nonempty) == 0:
+        return totals
+    offsets = _segment_offsets(lengths)
+    widths = 2 ** np.ceil(np.log2(lengths[nonempty])).astype(np.intp)
+    for width in np.unique(widths):
+        rows = nonempty[widths == width]
+        columns = np.arange(width)
+        mask = columns < lengths[rows, None]
+        block = np.zeros((len(rows), width))
+        block[mask] = values[(offsets[rows, None] + columns)[mask]]
+        totals[rows] = np.cumsum(block, axis=1)[:, -1]
+    return totals
+
+def _segment_distinct(values: np.ndarray, segment_ids: np.ndarray, n_segments: int) -> np.ndarray:
+    """Number of distinct values in every segment (len(set(...)) per segment)"""
+    if len(values) == 0:
+        return np.zeros(n_segments, dtype=np.intp)
+    order = np.lexsort((values, segment_ids))
+    values, segment_ids = values[order], segment_ids[order]
+    first = np.ones(len(values), dtype=bool)
+    first[1:] = (values[1:] != values[:-1]) | (segment_ids[1:] != segment_ids[:-1])
+    return np.bincount(segment_ids[first], minlength=n_segments)
+
+def _segment_histogram(values: np.ndarray, lengths: np.ndarray, bins: int = 10) -> np.ndarray:
+    """np.histogram(segment, bins)[0] for every segment, as a (n_segments, bins) matrix
+    
+    Follows np.histogram's equal-width fast path step by step (edges from
+    np.linspace, index from the scaled offset, then the +-1 ULP edge fix-ups),
+    so bin assignments are identical to calling it per segment.
+    """
+    n_segments = len(lengths)
+    counts = np.zeros((n_segments, bins), dtype=np.intp)
+    nonempty = lengths > 0
+    if not nonempty.any():
+        return counts
+    
+    segment_ids = np.repeat(np.arange(n_segments), lengths)
+    starts = _segment_offsets(lengths)[nonempty]
+    first_edge = np.zeros(n_segments)
+    last_edge = np.ones(n_segments)
+    first_edge[nonempty] = np.minimum.reduceat(values, starts)
+    last_edge[nonempty] = np.maximum.reduceat(values, starts)
+    degenerate = first_edge == last_edge
+    first_edge[degenerate] -= 0.5
+    last_edge[degenerate] += 0.5
+    bin_edges = np.linspace(first_edge, last_edge, bins + 1, axis=1)
+    
+    first = first_edge[segment_ids]
+    indices = ((values - first) / (last_edge - first_edge)[segment_ids] * bins).astype(np.intp)
+    indices[indices == bins] -= 1
+    indices[values < bin_edges[segment_ids, indices]] -= 1
+    indices[(values >= bin_edges[segment_ids, indices + 1]) & (indices != bins - 1)] += 1
+    
+    counts += np.bincount(segment_ids * bins + indices, minlength=n_segments * bins).reshape(n_segments, bins)
+    return counts
+
+def _segment_entropy(counts: np.ndarray) -> np.ndarray:
+    """_entropy of every row of a count matrix"""
+    nonzero = counts > 0
+    probs = (counts / np.maximum(counts.sum(axis=1), 1)[:, None])[nonzero]
+    entropy = -_segment_sum(probs * np.log2(probs), nonzero.sum(axis=1))
+    entropy[~nonzero.any(axis=1)] = 0.0
+    return entropy
+
+def _zero_digit_counts(values: np.ndarray) -> np.ndarray:
+    """str(value).count('0') for positive integers, digit by digit"""
+    counts = np.zeros(len(values), dtype=np.intp)
+    remaining = values.copy()
+    while remaining.any():
+        counts += (remaining % 10 == 0) & (remaining > 0)
+        remaining //= 10
+    return counts
+
+def _numeric_array(values: List) -> np.ndarray:
+    """np.array(values), keeping an integer dtype for an empty list"""
+    return np.array(values) if values else np.zeros(0, dtype=np.int64)
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """numerator / denominator, 0.0 where the denominator is zero"""
+    return np.divide(numerator, denominator, out=np.zeros(len(numerator)), where=denominator != 0)
+
+class WalletPrimitives:
+    """Behavioral building blocks shared by the clustering features, entity rules and risk scoring
+    
+    Built once per wallet per clustering run: timestamp interval moments and
+    the counts of dormant (30+ day) and rapid (< 1 hour) intervals, counts of
+    CoinJoin (equal outputs), similar-output and whole-BTC transactions, and
+    the mean/std of positive fees. The feature extractor, EntityClassifier
+    and RiskAnalyzer all read these instead of re-deriving them from the raw
+    transaction lists.
+    
+    Every field is a scalar, so primitives come equally from a wallet's raw
+    history (from_wallet), the columnar engine's batch arrays (from_row) or a
+    ClusteringFeatureStore state in O(1) (from_state).
+    """
+    
+    __slots__ = ('timestamp_count', 'interval_mean', 'interval_std', 'long_gap_count', 'rapid_gap_count',
+                 'transaction_count', 'coinjoin_count', 'similar_output_count', 'round_count',
+                 'fee_mean', 'fee_std')
+    
+    LONG_GAP_SECONDS = 86400 * 30
+    RAPID_GAP_SECONDS = 3600
+    
+    def __init__(self):
+        self.timestamp_count = 0
+        self.interval_mean = 0.0
+        self.interval_std = 0.0
+        self.long_gap_count = 0
+        self.rapid_gap_count = 0
+        self.transaction_count = 0
+        self.coinjoin_count = 0
+        self.similar_output_count = 0
+        self.round_count = 0
+        self.fee_mean = 0.0
+        self.fee_std = 0.0
+    
+    @classmethod
+    def from_wallet(cls, wallet: Dict) -> 'WalletPrimitives':
+        """Primitives of a single wallet"""
+        primitives = cls()
+        timestamps = wallet.get('transaction_timestamps', [])
+        primitives.timestamp_count = len(timestamps)
+        if len(timestamps) > 1:
+            intervals = np.diff(sorted(timestamps))
+            primitives.interval_mean = np.mean(intervals)
+            primitives.interval_std = np.std(intervals)
+            primitives.long_gap_count = int(np.count_nonzero(intervals > cls.LONG_GAP_SECONDS))
+            primitives.rapid_gap_count = int(np.count_nonzero(intervals < cls.RAPID_GAP_SECONDS))
+        
+        transactions = wallet.get('transactions', [])
+        primitives.transaction_count = len(transactions)
+        for tx in transactions:
+            coinjoin, similar = _output_flags(tx.get('outputs', []))
+            primitives.coinjoin_count += coinjoin
+            primitives.similar_output_count += similar
+            primitives.round_count += tx.get('amount', 0) % 100000000 == 0  # Whole BTC
+        
+        fees = [tx.get('fee', 0) for tx in transactions if tx.get('fee', 0) > 0]
+        if fees:
+            primitives.fee_mean = np.mean(fees)
+            primitives.fee_std = np.std(fees)
+        return primitives
+    
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'WalletPrimitives':
+        """Primitives from a ClusteringFeatureStore state, without touching the history"""
+        primitives = cls()
+        primitives.timestamp_count = state['ts_count']
+        n_intervals, interval_mean, interval_m2 = state['interval_moments']
+        if n_intervals:
+            primitives.interval_mean = interval_mean
+            primitives.interval_std = np.sqrt(interval_m2 / n_intervals)
+        primitives.long_gap_count = state['long_gap_count']
+        primitives.rapid_gap_count = state['rapid_gap_count']
+        
+        primitives.transaction_count = state['tx_count']
+        primitives.coinjoin_count = state['mixing_count']
+        primitives.similar_output_count = state['similar_output_count']
+        primitives.round_count = state['round_count']
+        n_fees, fee_mean, fee_m2 = state['fee_moments']
+        if n_fees:
+            primitives.fee_mean = fee_mean
+            primitives.fee_std = np.sqrt(fee_m2 / n_fees)
+        return primitives
+    
+    @classmethod
+    def from_row(cls, row: np.ndarray) -> 'WalletPrimitives':
+        """Primitives from one row of a ColumnarFeatureEngine primitives matrix (columns in __slots__ order)"""
+        primitives = cls()
+        for name, value in zip(cls.__slots__, row.tolist()):
+            setattr(primitives, name, int(value) if name.endswith('_count') else value)
+        return primitives
+    
+    def mixing_score(self) -> float:
+        """Share of transactions with CoinJoin-like equal outputs"""
+        if not self.transaction_count:
+            return 0.0
+        return self.coinjoin_count / self.transaction_count
+    
+    def round_ratio(self) -> float:
+        """Share of whole-BTC transactions"""
+        if not self.transaction_count:
+            return 0.0
+        return self.round_count / self.transaction_count
+    
+    def fee_sensitivity(self) -> float:
+        """Coefficient of variation of the positive fees"""
+        return self.fee_std / self.fee_mean if self.fee_mean > 0 else 0.0
+    
+    def dormancy_ratio(self) -> float:
+        """Share of timestamp intervals longer than 30 days"""
+        if self.timestamp_count < 2:
+            return 0.0
+        return self.long_gap_count / (self.timestamp_count - 1)
+    
+    def rapid_ratio(self) -> float:
+        """Share of timestamp intervals shorter than an hour"""
+        if self.timestamp_count < 2:
+            return 0.0
+        return self.rapid_gap_count / (self.timestamp_count - 1)
+
+def _output_flags(outputs: List[Dict]) -> Tuple[bool, bool]:
+    """(CoinJoin, similar outputs) for a transaction: fewer than 50% / 70% of 3+ output amounts are distinct"""
+    if len(outputs) <= 2:
+        return False, False
+    amounts = [out.get('amount', 0) for out in outputs]
+    unique_amounts = len(set(amounts))
+    return unique_amounts < len(amounts) * 0.5, unique_amounts < len(amounts) * 0.7
+
+class ColumnarFeatureEngine:
+    """Vectorized counterpart of the per-wallet clustering feature extractor
+    
+    The timestamps, counterparties, transactions, outputs and UTXOs of all
+    wallets in a batch are flattened once into contiguous arrays with
+    per-wallet lengths (CSR offsets), and every feature is computed with
+    segmented reductions (reduceat, bincount, lexsort + diff) instead of a
+    Python loop per wallet and per feature. Columns come out in the order of
+    EnterpriseWalletClusterer._wallet_features and bit-for-bit equal to it;
+    the one difference is that UTXO ages are measured from a single
+    current_time for the whole batch rather than a fresh datetime.now() per
+    wallet. The same arrays also yield every wallet's WalletPrimitives, as
+    a matrix with one column per WalletPrimitives field.
+    """
+    
+    N_FEATURES = 21
+    N_PRIMITIVES = len(WalletPrimitives.__slots__)
+    LONG_GAP_SECONDS = WalletPrimitives.LONG_GAP_SECONDS
+    
+    def extract(self, wallet_data: List[Dict], current_time: Optional[float] = None) -> np.ndarray:
+        """Feature matrix (len(wallet_data), N_FEATURES) for a batch of wallets"""
+        return self.extract_rows(wallet_data, current_time)[0]
+    
+    def extract_with_primitives(self, wallet_data: List[Dict], current_time: Optional[float] = None
+                                ) -> Tuple[np.ndarray, List[WalletPrimitives]]:
+        """Feature matrix plus the WalletPrimitives of every wallet"""
+        features, primitive_rows = self.extract_rows(wallet_data, current_time)
+        return features, [WalletPrimitives.from_row(row) for row in primitive_rows]
+    
+    def extract_rows(self, wallet_data: List[Dict], current_time: Optional[float] = None
+                     ) -> Tuple[np.ndarray, np.ndarray]:
+        """Feature matrix plus the (len(wallet_data), N_PRIMITIVES) primitives matrix"""
+        n = len(wallet_data)
+        if n == 0:
+            return np.zeros((0, self.N_FEATURES)), np.zeros((0, self.N_PRIMITIVES))
+        if current_time is None:
+            current_time = datetime.now().timestamp()
+        
+        tx_count = np.array([w.get('transaction_count', 0) for w in wallet_data], dtype=float)
+        total_volume = np.array([w.get('total_volume', 0) for w in wallet_data], dtype=float)
+        balance = np.array([w.get('balance', 0) for w in wallet_data], dtype=float)
+        time_span = np.array([w.get('activity_span_days', 1) for w in wallet_data], dtype=float)
+        
+        timing = self.timestamp_features(wallet_data)
+        network = self.counterparty_features(wallet_data)
+        behavior = self.transaction_features(wallet_data)
+        utxo_entropy = self.utxo_age_entropy(wallet_data, current_time)
+        
+        # Regularity only counts once there are more than 10 timestamps
+        interval_mean, interval_std = timing['interval_mean'], timing['interval_std']
+        regularity = np.where(interval_mean > 0, 1 - _ratio(interval_std, interval_mean), 0)
+        institutional = np.where(balance > 1000, 0.3, 0.0)
+        institutional = institutional + np.where(timing['count'] > 10, regularity * 0.3, 0.0)
+        institutional = np.minimum(institutional + network['exchange_score'] * 0.4, 1.0)
+        
+        has_intervals = timing['count'] > 1
+        features = np.column_stack([
+            np.log10(np.maximum(total_volume, 1)),
+            tx_count,
+            np.log10(np.maximum(total_volume / np.maximum(tx_count, 1), 1)),
+            np.where(has_intervals, interval_mean, 0),
+            np.where(has_intervals, interval_std, 0),
+            np.where(has_intervals, timing['active_days'], 0),
+            network['unique_count'],
+            network['count'] / np.maximum(tx_count, 1),
+            behavior['round_ratio'],
+            behavior['consolidation_ratio'],
+            behavior['mixing_score'],
+            network['exchange_score'],
+            timing['dormancy_score'],
+            behavior['fee_sensitivity'],
+            utxo_entropy,
+            timing['time_zone_entropy'],
+            behavior['amount_entropy'],
+            tx_count / np.maximum(time_span, 1),
+            behavior['privacy_score'],
+            institutional,
+            behavior['suspicious_score'],
+        ])
+        return features, self._primitive_matrix(timing, behavior)
+    
+    def _primitive_matrix(self, timing: Dict[str, np.ndarray], behavior: Dict[str, np.ndarray]) -> np.ndarray:
+        """Per-wallet WalletPrimitives fields from the batch arrays, one column per field"""
+        columns = {
+            'timestamp_count': timing['count'],
+            'interval_mean': timing['interval_mean'],
+            'interval_std': timing['interval_std'],
+            'long_gap_count': timing['long_gap_count'],
+            'rapid_gap_count': timing['rapid_gap_count'],
+            'transaction_count': behavior['count'],
+            'coinjoin_count': behavior['coinjoin_count'],
+            'similar_output_count': behavior['similar_output_count'],
+            'round_count': behavior['round_count'],
+            'fee_mean': behavior['fee_mean'],
+            'fee_std': behavior['fee_std'],
+        }
+        return np.column_stack([columns[name] for name in WalletPrimitives.__slots__]).astype(np.float64)
+    
+    def timestamp_features(self, wallet_data: List[Dict]) -> Dict[str, np.ndarray]:
+        """Interval moments, active days, dormancy and hour-of-day entropy per wallet"""
+        n = len(wallet_data)
+        lists = [w.get('transaction_timestamps', []) for w in wallet_data]
+        counts = np.fromiter(map(len, lists), dtype=np.intp, count=n)
+        timestamps = _numeric_array([ts for timestamps in lists for ts in timestamps])
+        segment_ids = np.repeat(np.arange(n), counts)
+        
+        # Sort within each wallet; intervals are the diffs that stay inside one
+        order = np.lexsort((timestamps, segment_ids))
+        sorted_ts = timestamps[order]
+        same_wallet = segment_ids[1:] == segment_ids[:-1]
+        intervals = np.diff(sorted_ts)[same_wallet]
+        interval_ids = segment_ids[1:][same_wallet]
+        n_intervals = np.maximum(counts - 1, 0)
+        
+        interval_mean = _ratio(_segment_sum(intervals.astype(float), n_intervals), n_intervals)
+        deviations = np.square(intervals - interval_mean[interval_ids])
+        interval_std = np.sqrt(_ratio(_segment_sum(deviations, n_intervals), n_intervals))
+        
+        long_gaps = np.bincount(interval_ids[intervals > self.LONG_GAP_SECONDS], minlength=n)
+        rapid_gaps = np.bincount(interval_ids[intervals < WalletPrimitives.RAPID_GAP_SECONDS], minlength=n)
+        hours = (timestamps % 86400) // 3600
+        hour_counts = np.bincount(segment_ids * 24 + hours, minlength=n * 24).reshape(n, 24)
+        
+        return {
+            'count': counts,
+            'interval_mean': interval_mean,
+            'interval_std': interval_std,
+            'active_days': _segment_distinct(sorted_ts // 86400, segment_ids, n),
+            'long_gap_count': long_gaps,
+            'rapid_gap_count': rapid_gaps,
+            'dormancy_score': _ratio(long_gaps, n_intervals),
+            'time_zone_entropy': _segment_entropy(hour_counts),
+        }
+    
+    def counterparty_features(self, wallet_data: List[Dict]) -> Dict[str, np.ndarray]:
+        """Counterparty counts and known-exchange interaction share per wallet"""
+        n = len(wallet_data)
+        lists = [w.get('counterparties', []) for w in wallet_data]
+        counts = np.fromiter(map(len, lists), dtype=np.intp, count=n)
+        segment_ids = np.repeat(np.arange(n), counts)
+        
+        # Factorize addresses so every set operation becomes an integer one
+        index: Dict[Any, int] = {}
+        codes = np.fromiter((index.setdefault(address, len(index))
+                             for counterparties in lists for address in counterparties),
+                            dtype=np.int64, count=int(counts.sum()))
+        n_codes = max(len(index), 1)
+        known_keys = np.array([i * n_codes + index[address]
+                               for i, w in enumerate(wallet_data) if counts[i]
+                               for address in w.get('known_exchange_addresses', ())
+                               if address in index], dtype=np.int64)
+        interactions = np.bincount(segment_ids[np.isin(segment_ids * n_codes + codes, known_keys)],
+                                   minlength=n)
+        
+        return {
+            'count': counts,
+            'unique_count': _segment_distinct(codes, segment_ids, n),
+            'exchange_score': _ratio(interactions, counts),
+        }
+    
+    def transaction_features(self, wallet_data: List[Dict]) -> Dict[str, np.ndarray]:
+        """Per-transaction flags and amount/fee statistics aggregated per wallet"""
+        n = len(wallet_data)
+        lists = [w.get('transactions', []) for w in wallet_data]
+        counts = np.fromiter(map(len, lists), dtype=np.intp, count=n)
+        transactions = [tx for txs in lists for tx in txs]
+        segment_ids = np.repeat(np.arange(n), counts)
+        
+        amount_values = [tx.get('amount', 0) for tx in transactions]
+        amounts = _numeric_array(amount_values)
+        fees = _numeric_array([tx.get('fee', 0) for tx in transactions])
+        rate_base = _numeric_array([tx.get('amount', 1) for tx in transactions])
+        consolidations = np.array([tx.get('input_count', 0) > tx.get('output_count', 0)
+                                   for tx in transactions], dtype=bool)
+        
+        # Equal-output (CoinJoin) checks on transactions with more than two outputs
+        outputs = [tx.get('outputs', []) for tx in transactions]
+        output_counts = np.fromiter(map(len, outputs), dtype=np.intp, count=len(outputs))
+        multi = np.flatnonzero(output_counts > 2)
+        output_amounts = _numeric_array([out.get('amount', 0) for i in multi.tolist() for out in outputs[i]])
+        distinct = _segment_distinct(output_amounts, np.repeat(np.arange(len(multi)), output_counts[multi]),
+                                     len(multi))
+        coinjoin = np.zeros(len(transactions), dtype=bool)
+        coinjoin[multi] = distinct < output_counts[multi] * 0.5
+        similar_outputs = np.zeros(len(transactions), dtype=bool)
+        similar_outputs[multi] = distinct < output_counts[multi] * 0.7
+        
+        # Privacy indicators are multiples of 0.5, so their sum is exact in any order
+        high_fee = fees / np.maximum(rate_base, 1) > 0.001
+        privacy = np.bincount(segment_ids, weights=similar_outputs + high_fee * 0.5, minlength=n)
+        
+        # Fee dispersion over positive fees (np.std / np.mean)
+        positive_fee = fees > 0
+        fee_counts = np.bincount(segment_ids[positive_fee], minlength=n)
+        positive_fees = fees[positive_fee]
+        fee_mean = _ratio(_segment_sum(positive_fees.astype(float), fee_counts), fee_counts)
+        fee_deviations = np.square(positive_fees - fee_mean[segment_ids[positive_fee]])
+        fee_std = np.sqrt(_ratio(_segment_sum(fee_deviations, fee_counts), fee_counts))
+        
+        # Suspicious amounts: very round (+0.5) or many zeros (+0.3), summed in order
+        positive = amounts > 0
+        very_round = positive & (amounts % 1000000 == 0)
+        candidates = np.flatnonzero(positive & ~very_round)
+        many_zeros = np.zeros(len(transactions), dtype=bool)
+        if amounts.dtype.kind in 'iu':
+            many_zeros[candidates] = _zero_digit_counts(amounts[candidates]) > 6
+        else:
+            many_zeros[candidates] = [str(amount_values[i]).count('0') > 6 for i in candidates.tolist()]
+        flagged = very_round | many_zeros
+        suspicious = _segment_sequential_sum(np.where(very_round, 0.5, 0.3)[flagged],
+                                             np.bincount(segment_ids[flagged], minlength=n))
+        
+        amount_counts = np.bincount(segment_ids[positive], minlength=n)
+        log_amounts = np.log10(amounts[positive])
+        round_amount = amounts % 100000000 == 0  # Whole BTC
+        
+        coinjoin_count = np.bincount(segment_ids[coinjoin], minlength=n)
+        round_count = np.bincount(segment_ids[round_amount], minlength=n)
+        
+        return {
+            'count': counts,
+            'coinjoin_count': coinjoin_count,
+            'similar_output_count': np.bincount(segment_ids[similar_outputs], minlength=n),
+            'round_count': round_count,
+            'fee_mean': fee_mean,
+            'fee_std': fee_std,
+            'round_ratio': _ratio(round_count, counts),
+            'consolidation_ratio': _ratio(np.bincount(segment_ids[consolidations], minlength=n), counts),
+            'mixing_score': _ratio(coinjoin_count, counts),
+            'fee_sensitivity': np.where(fee_mean > 0, _ratio(fee_std, fee_mean), 0.0),
+            'amount_entropy': _segment_entropy(_segment_histogram(log_amounts, amount_counts)),
+            'privacy_score': _ratio(privacy, counts),
+            'suspicious_score': np.minimum(_ratio(suspicious, counts), 1.0),
+        }
+    
+    def utxo_age_entropy(self, wallet_data: List[Dict], current_time: float) -> np.ndarray:
+        """Entropy of the 10-bin UTXO age histogram per wallet"""
+        lists = [w.get('utxos', []) for w in wallet_data]
+        counts = np.fromiter(map(len, lists), dtype=np.intp, count=len(lists))
+        created = np.array([utxo.get('created_at', current_time) for utxos in lists for utxo in utxos],
+                           dtype=float)
+        ages = (current_time - created) / 86400
+        return _segment_entropy(_segment_histogram(ages, counts))
+
+def _budget_chunks(indices: np.ndarray, costs: np.ndarray, budget: int) -> Iterator[np.ndarray]:
+    """Consecutive slices of indices whose summed cost stays within budget (at least one index each)"""
+    cumulative = np.cumsum(costs)
+    start = 0
+    while start < len(indices):
+        spent = cumulative[start - 1] if start else 0
+        end = max(int(np.searchsorted(cumulative, spent + budget, side='right')), start + 1)
+        yield indices[start:end]
+        start = end
+
+def _find_roots(parent: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+    """Union-find roots of nodes by pointer jumping"""
+    roots = parent[nodes]
+    while True:
+        next_roots = parent[roots]
+        if np.array_equal(next_roots, roots):
+            return roots
+        roots = next_roots
+
+def _union_pairs(parent: np.ndarray, a: np.ndarray, b: np.ndarray):
+    """Merge the sets of every (a[i], b[i]) pair in place; a root always points to a smaller index"""
+    while len(a):
+        root_a, root_b = _find_roots(parent, a), _find_roots(parent, b)
+        apart = root_a != root_b
+        a, b, root_a, root_b = a[apart], b[apart], root_a[apart], root_b[apart]
+        np.minimum.at(parent, np.maximum(root_a, root_b), np.minimum(root_a, root_b))
+    # Flatten so later finds stay shallow
+    parent[:] = _find_roots(parent, np.arange(len(parent)))
+
+# Per-process state of feature extraction pool workers
+_feature_worker: Dict[str, Any] = {}
+
+def _init_feature_worker(shm_name: str, shape: Tuple[int, int], wallet_data: List[Dict], current_time: float):
+    """Process-pool initializer: attach the shared feature and primitives matrix and keep the wallet list"""
+    from multiprocessing import shared_memory
+    
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _feature_worker.update(shm=shm, features=np.ndarray(shape, dtype=np.float64, buffer=shm.buf),
+                           wallet_data=wallet_data, current_time=current_time,
+                           engine=ColumnarFeatureEngine())
+
+def _extract_feature_rows(start: int, end: int) -> int:
+    """Process-pool worker: write the features and primitives of wallets[start:end] into rows start:end"""
+    engine = _feature_worker['engine']
+    wallets = _feature_worker['wallet_data'][start:end]
+    features, primitive_rows = engine.extract_rows(wallets, _feature_worker['current_time'])
+    _feature_worker['features'][start:end, :engine.N_FEATURES] = features
+    _feature_worker['features'][start:end, engine.N_FEATURES:] = primitive_rows
+    return end - start
+
 class EnterpriseWalletClusterer:
     """Enterprise-grade wallet clustering with advanced analytics"""
     
-    def __init__(self, enterprise_id: str):
+    def __init__(self, enterprise_id: str, feature_store: Optional[ClusteringFeatureStore] = None):
         self.enterprise_id = enterprise_id
-        self.scaler = StandardScaler()
+        # Incremental per-wallet features for wallets with an 'address'
+        # (CLUSTERING_FEATURE_STORE_DIR persists them between runs)
+        if feature_store is None and os.getenv('CLUSTERING_FEATURE_STORE_DIR'):
+            feature_store = ClusteringFeatureStore(
+                max_wallets=int(os.getenv('CLUSTERING_FEATURE_STORE_MAX_WALLETS', '1000000')),
+                spill_dir=os.getenv('CLUSTERING_FEATURE_STORE_DIR')
+            )
+        self.feature_store = feature_store
+        # Vectorized batch feature extraction (CLUSTERING_COLUMNAR_FEATURES=0 uses the per-wallet loop)
+        self.feature_engine = (ColumnarFeatureEngine()
+                               if os.getenv('CLUSTERING_COLUMNAR_FEATURES', '1') == '1' else None)
+        # Feature extraction processes and wallets per process-pool task
+        self.workers = int(os.getenv('CLUSTERING_WORKERS', '1'))
+        self.chunk_size = int(os.getenv('CLUSTERING_CHUNK_SIZE', '10000'))
+        # Upper bound on neighbor indices held per radius query in scalable_dbscan
+        self.neighbor_budget = int(os.getenv('CLUSTERING_NEIGHBOR_BUDGET', '2000000'))
+        # Principal components indexed for scalable_dbscan's candidate search
+        self.projection_dims = int(os.getenv('CLUSTERING_PROJECTION_DIMS', '5'))
+        self.scaler = None
         self.clustering_models = {}
         self.entity_classifier = EntityClassifier()
         self.risk_analyzer = RiskAnalyzer()
         self.flow_tracker = FlowTracker()
-        
-    def cluster_wallets(self, wallet_data: List[Dict], algorithm: str = 'dbscan') -> Dict[str, Any]:
-        """Advanced wallet clustering with multiple algorithms"""
+        # Opt-in profiling: CLUSTERING_PROFILE=1 profiles every run, otherwise per-call flag
+        self.profiler = RequestProfiler(enabled=os.getenv('CLUSTERING_PROFILE') == '1',
+                                        output_dir=os.getenv('CLUSTERING_PROFILE_DIR'))
+        
+    def cluster_wallets(self, wallet_data: List[Dict], algorithm: str = 'dbscan',
+                        profile: Optional[bool] = None, request_id: Optional[str] = None,
+                        workers: Optional[int] = None) -> Dict[str, Any]:
+        """Advanced wallet clustering with multiple algorithms
+        
+        profile=True (or CLUSTERING_PROFILE=1 when profile is None) captures a
+        cProfile and tracemalloc profile of this run under request_id; its
+        location is returned in 'profile'.
+        
+        workers > 1 (default CLUSTERING_WORKERS) extracts features in that many
+        processes; results are identical to a single-process run.
+        """
+        workers = max(int(workers or self.workers), 1)
+        if not (profile or (profile is None and self.profiler.enabled)):
+            return self._cluster_wallets(wallet_data, algorithm, workers)
+        
+        request_id = request_id or f"{self.enterprise_id}-{int(time.time() * 1000)}"
+        result, summary = self.profiler.run(request_id, self._cluster_wallets, wallet_data, algorithm, workers)
+        result['profile'] = summary
+        return result
+    
+    def _cluster_wallets(self, wallet_data: List[Dict], algorithm: str, workers: int = 1) -> Dict[str, Any]:
+        """Run feature extraction, clustering and analysis for cluster_wallets"""
         try:
-            # Extract comprehensive features
-            features = self._extract_enterprise_features(wallet_data)
+            # Extract comprehensive features, plus the primitives reused by entity and risk analysis
+            features, primitives = self._extract_enterprise_features(wallet_data, workers)
+            if self.feature_store is not None:
+                self.feature_store.flush()
             
-            # Normalize features
+            # Normalize features (sklearn is imported on first clustering run)
+            if self.scaler is None:
+                from sklearn.preprocessing import StandardScaler
+                self.scaler = StandardScaler()
             features_scaled = self.scaler.fit_transform(features)
             
             # Apply clustering algorithm
@@ -40,11 +670,13 @@ class EnterpriseWalletClusterer:
                 clusters = self._kmeans_clustering(features_scaled)
             elif algorithm == 'hierarchical':
                 clusters = self._hierarchical_clustering(features_scaled)
+            elif algorithm == 'scalable_dbscan':
+                clusters = self._scalable_dbscan_clustering(features_scaled)
             else:
                 raise ValueError(f"Unsupported algorithm: {algorithm}")
             
             # Analyze clusters
-            cluster_analysis = self._analyze_clusters(wallet_data, clusters)
+            cluster_analysis = self._analyze_clusters(wallet_data, clusters, primitives)
             
             # Generate insights
             insights = self._generate_enterprise_insights(cluster_analysis)
@@ -63,77 +695,196 @@ class EnterpriseWalletClusterer:
             logger.error(f"Clustering error: {e}")
             return {'error': str(e)}
     
-    def _extract_enterprise_features(self, wallet_data: List[Dict]) -> np.ndarray:
-        """Extract comprehensive features for enterprise analysis"""
-        features = []
+    def _extract_enterprise_features(self, wallet_data: List[Dict], workers: int = 1
+                                     ) -> Tuple[np.ndarray, List[WalletPrimitives]]:
+        """Extract comprehensive features for enterprise analysis, with each wallet's primitives
+        
+        Wallets tracked by the feature store are folded incrementally; the
+        rest go through the columnar engine in one batch, split across worker
+        processes when workers > 1 (or the per-wallet extractor when the
+        engine is disabled). Stored wallets take their primitives from the
+        folded state, so no wallet's full history is rescanned.
+        """
+        if self.feature_store is None:
+            return self._extract_batch_features(wallet_data, workers)
+        
+        stored = [i for i, wallet in enumerate(wallet_data) if wallet.get('address')]
+        stored_set = set(stored)
+        batch = [i for i in range(len(wallet_data)) if i not in stored_set]
+        features = np.zeros((len(wallet_data), ColumnarFeatureEngine.N_FEATURES))
+        primitives: List[Optional[WalletPrimitives]] = [None] * len(wallet_data)
+        for i in stored:
+            state = self.feature_store.update(wallet_data[i]['address'], wallet_data[i])
+            features[i] = self._features_from_state(wallet_data[i], state)
+            primitives[i] = WalletPrimitives.from_state(state)
+        if batch:
+            batch_features, batch_primitives = self._extract_batch_features([wallet_data[i] for i in batch], workers)
+            features[batch] = batch_features
+            for i, wallet_primitives in zip(batch, batch_primitives):
+                primitives[i] = wallet_primitives
+        return features, primitives
+    
+    def _extract_batch_features(self, wallet_data: List[Dict], workers: int = 1
+                                ) -> Tuple[np.ndarray, List[WalletPrimitives]]:
+        """Features and primitives for wallets without incremental state"""
+        if self.feature_engine is not None:
+            if workers > 1 and len(wallet_data) > self.chunk_size:
+                features, primitive_rows = self._extract_features_parallel(wallet_data, workers)
+                return features, [WalletPrimitives.from_row(row) for row in primitive_rows]
+            return self.feature_engine.extract_with_primitives(wallet_data)
+        primitives = [WalletPrimitives.from_wallet(wallet) for wallet in wallet_data]
+        features = np.array([self._wallet_features(wallet, wallet_primitives)
+                             for wallet, wallet_primitives in zip(wallet_data, primitives)])
+        return features, primitives
+    
+    def _extract_features_parallel(self, wallet_data: List[Dict], workers: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Columnar features and primitives matrix for wallet_data computed by a pool of worker processes
+        
+        Each task is a row range of chunk_size wallets; the worker writes its
+        feature and primitives rows straight into one shared-memory matrix, so
+        only the range and a row count cross the process boundary. With the fork start
+        method the wallet list is inherited by the workers instead of being
+        pickled. Rows land at their input index and all chunks share one
+        current_time, so the matrix equals the single-process result.
+        """
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        from multiprocessing import shared_memory
+        
+        shape = (len(wallet_data), ColumnarFeatureEngine.N_FEATURES + ColumnarFeatureEngine.N_PRIMITIVES)
+        bounds = [(start, min(start + self.chunk_size, shape[0])) for start in range(0, shape[0], self.chunk_size)]
+        context = (multiprocessing.get_context('fork')
+                   if 'fork' in multiprocessing.get_all_start_methods() else None)
+        
+        shm = shared_memory.SharedMemory(create=True, size=shape[0] * shape[1] * 8)
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(bounds)), mp_context=context,
+                                     initializer=_init_feature_worker,
+                                     initargs=(shm.name, shape, wallet_data, datetime.now().timestamp())) as executor:
+                rows = sum(executor.map(_extract_feature_rows, *zip(*bounds)))
+            if rows != shape[0]:
+                raise RuntimeError(f"Feature workers wrote {rows} of {shape[0]} rows")
+            shared = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+            features = shared[:, :ColumnarFeatureEngine.N_FEATURES].copy()
+            primitive_rows = shared[:, ColumnarFeatureEngine.N_FEATURES:].copy()
+            del shared
+            return features, primitive_rows
+        finally:
+            shm.close()
+            shm.unlink()
+    
+    def _wallet_features(self, wallet: Dict, primitives: Optional[WalletPrimitives] = None) -> List[float]:
+        """Per-wallet reference implementation of the clustering features"""
+        if primitives is None:
+            primitives = WalletPrimitives.from_wallet(wallet)
+        wallet_features = []
         
-        for wallet in wallet_data:
-            wallet_features = []
-            
-            # Basic transaction features
-            tx_count = wallet.get('transaction_count', 0)
-            total_volume = wallet.get('total_volume', 0)
-            avg_tx_value = total_volume / max(tx_count, 1)
-            
-            wallet_features.extend([
-                np.log10(max(total_volume, 1)),  # Log total volume
-                tx_count,  # Transaction count
-                np.log10(max(avg_tx_value, 1)),  # Log average transaction
-            ])
-            
-            # Temporal features
-            timestamps = wallet.get('transaction_timestamps', [])
-            if len(timestamps) > 1:
-                intervals = np.diff(sorted(timestamps))
-                wallet_features.extend([
-                    np.mean(intervals),  # Average interval
-                    np.std(intervals),   # Interval variance
-                    len(set([ts // 86400 for ts in timestamps])),  # Active days
-                ])
-            else:
-                wallet_features.extend([0, 0, 0])
-            
-            # Network features
-            counterparties = wallet.get('counterparties', [])
-            wallet_features.extend([
-                len(set(counterparties)),  # Unique counterparties
-                len(counterparties) / max(tx_count, 1),  # Counterparty ratio
-            ])
-            
-            # Behavioral features
-            transactions = wallet.get('transactions', [])
-            wallet_features.extend([
-                self._calculate_round_number_ratio(transactions),
-                self._calculate_consolidation_ratio(transactions),
-                self._calculate_mixing_score(transactions),
-                self._calculate_exchange_interaction_score(wallet),
-                self._calculate_dormancy_score(timestamps),
-                self._calculate_fee_sensitivity(transactions),
-                self._calculate_utxo_age_entropy(wallet),
-                self._calculate_time_zone_entropy(timestamps),
-                self._calculate_amount_distribution_entropy(transactions),
-                self._calculate_velocity_score(wallet),
-            ])
-            
-            # Risk indicators
+        # Basic transaction features
+        tx_count = wallet.get('transaction_count', 0)
+        total_volume = wallet.get('total_volume', 0)
+        avg_tx_value = total_volume / max(tx_count, 1)
+        
+        wallet_features.extend([
+            np.log10(max(total_volume, 1)),  # Log total volume
+            tx_count,  # Transaction count
+            np.log10(max(avg_tx_value, 1)),  # Log average transaction
+        ])
+        
+        # Temporal features
+        timestamps = wallet.get('transaction_timestamps', [])
+        if len(timestamps) > 1:
             wallet_features.extend([
-                self._calculate_privacy_score(transactions),
-                self._calculate_institutional_score(wallet),
-                self._calculate_suspicious_pattern_score(transactions),
+                primitives.interval_mean,  # Average interval
+                primitives.interval_std,   # Interval variance
+                len(set([ts // 86400 for ts in timestamps])),  # Active days
             ])
-            
-            features.append(wallet_features)
+        else:
+            wallet_features.extend([0, 0, 0])
         
-        return np.array(features)
+        # Network features
+        counterparties = wallet.get('counterparties', [])
+        wallet_features.extend([
+            len(set(counterparties)),  # Unique counterparties
+            len(counterparties) / max(tx_count, 1),  # Counterparty ratio
+        ])
+        
+        # Behavioral features
+        transactions = wallet.get('transactions', [])
+        wallet_features.extend([
+            primitives.round_ratio(),
+            self._calculate_consolidation_ratio(transactions),
+            primitives.mixing_score(),
+            self._calculate_exchange_interaction_score(wallet),
+            self._calculate_dormancy_score(primitives),
+            primitives.fee_sensitivity(),
+            self._calculate_utxo_age_entropy(wallet),
+            self._calculate_time_zone_entropy(timestamps),
+            self._calculate_amount_distribution_entropy(transactions),
+            self._calculate_velocity_score(wallet),
+        ])
+        
+        # Risk indicators
+        wallet_features.extend([
+            self._calculate_privacy_score(transactions, primitives),
+            self._calculate_institutional_score(wallet, primitives),
+            self._calculate_suspicious_pattern_score(transactions),
+        ])
+        
+        return wallet_features
     
-    def _calculate_round_number_ratio(self, transactions: List[Dict]) -> float:
-        """Calculate ratio of round number transactions"""
-        if not transactions:
-            return 0.0
+    def _features_from_state(self, wallet: Dict, state: Dict[str, Any]) -> List[float]:
+        """Feature values from WalletFeatureStore statistics, matching _extract_enterprise_features"""
+        tx_count = wallet.get('transaction_count', 0)
+        total_volume = wallet.get('total_volume', 0)
+        n_tx = state['tx_count']
+        n_intervals, interval_mean, interval_m2 = state['interval_moments']
+        interval_std = np.sqrt(interval_m2 / n_intervals) if n_intervals else 0.0
+        n_fees, fee_mean, fee_m2 = state['fee_moments']
         
-        round_count = sum(1 for tx in transactions 
-                         if tx.get('amount', 0) % 100000000 == 0)  # Whole BTC
-        return round_count / len(transactions)
+        counts = state['cp_counts']
+        known_exchanges = wallet.get('known_exchange_addresses', set())
+        if len(known_exchanges) < len(counts):
+            exchange_interactions = sum(counts.get(address, 0) for address in known_exchanges)
+        else:
+            exchange_interactions = sum(count for address, count in counts.items() if address in known_exchanges)
+        exchange_score = exchange_interactions / state['cp_total'] if state['cp_total'] else 0.0
+        
+        # Amount entropy bins span the observed range, so it is rebuilt from per-amount counts
+        amount_entropy = 0.0
+        if state['amount_counts']:
+            amounts = np.fromiter(state['amount_counts'].keys(), dtype=float)
+            weights = np.fromiter(state['amount_counts'].values(), dtype=float)
+            amount_entropy = _entropy(np.histogram(np.log10(amounts), bins=10, weights=weights)[0])
+        
+        institutional = 0.3 if wallet.get('balance', 0) > 1000 else 0.0
+        if state['ts_count'] > 10:
+            institutional += (1 - interval_std / interval_mean if interval_mean > 0 else 0) * 0.3
+        institutional += exchange_score * 0.4
+        
+        return [
+            np.log10(max(total_volume, 1)),
+            tx_count,
+            np.log10(max(total_volume / max(tx_count, 1), 1)),
+            interval_mean if state['ts_count'] > 1 else 0,
+            interval_std if state['ts_count'] > 1 else 0,
+            len(state['active_days']) if state['ts_count'] > 1 else 0,
+            len(counts),
+            state['cp_total'] / max(tx_count, 1),
+            state['round_count'] / n_tx if n_tx else 0.0,
+            state['consolidation_count'] / n_tx if n_tx else 0.0,
+            state['mixing_count'] / n_tx if n_tx else 0.0,
+            exchange_score,
+            state['long_gap_count'] / n_intervals if n_intervals else 0.0,
+            np.sqrt(fee_m2 / n_fees) / fee_mean if n_fees and fee_mean > 0 else 0.0,
+            # UTXOs are spent as well as created, so their age entropy is recomputed
+            self._calculate_utxo_age_entropy(wallet),
+            _entropy(np.asarray(state['hour_counts'])),
+            amount_entropy,
+            self._calculate_velocity_score(wallet),
+            (state['similar_output_count'] + state['high_fee_count'] * 0.5) / n_tx if n_tx else 0.0,
+            min(institutional, 1.0),
+            min(state['suspicious_sum'] / n_tx, 1.0) if n_tx else 0.0,
+        ]
     
     def _calculate_consolidation_ratio(self, transactions: List[Dict]) -> float:
         """Calculate consolidation vs distribution ratio"""
@@ -144,23 +895,6 @@ class EnterpriseWalletClusterer:
                            if tx.get('input_count', 0) > tx.get('output_count', 0))
         return consolidations / len(transactions)
     
-    def _calculate_mixing_score(self, transactions: List[Dict]) -> float:
-        """Calculate privacy/mixing behavior score"""
-        if not transactions:
-            return 0.0
-        
-        mixing_indicators = 0
-        for tx in transactions:
-            outputs = tx.get('outputs', [])
-            if len(outputs) > 2:
-                # Check for equal output amounts (CoinJoin indicator)
-                amounts = [out.get('amount', 0) for out in outputs]
-                unique_amounts = len(set(amounts))
-                if unique_amounts < len(amounts) * 0.5:
-                    mixing_indicators += 1
-        
-        return mixing_indicators / len(transactions)
-    
     def _calculate_exchange_interaction_score(self, wallet: Dict) -> float:
         """Calculate interaction with known exchanges"""
         counterparties = wallet.get('counterparties', [])
@@ -173,26 +907,9 @@ class EnterpriseWalletClusterer:
                                   if addr in known_exchanges)
         return exchange_interactions / len(counterparties)
     
-    def _calculate_dormancy_score(self, timestamps: List[int]) -> float:
+    def _calculate_dormancy_score(self, primitives: WalletPrimitives) -> float:
         """Calculate dormancy behavior score"""
-        if len(timestamps) < 2:
-            return 0.0
-        
-        sorted_timestamps = sorted(timestamps)
-        gaps = np.diff(sorted_timestamps)
-        long_gaps = sum(1 for gap in gaps if gap > 86400 * 30)  # 30+ days
-        return long_gaps / len(gaps)
-    
-    def _calculate_fee_sensitivity(self, transactions: List[Dict]) -> float:
-        """Calculate fee sensitivity score"""
-        if not transactions:
-            return 0.0
-        
-        fees = [tx.get('fee', 0) for tx in transactions if tx.get('fee', 0) > 0]
-        if not fees:
-            return 0.0
-        
-        return np.std(fees) / np.mean(fees) if np.mean(fees) > 0 else 0
+        return primitives.dormancy_ratio()  # 30+ day gaps
     
     def _calculate_utxo_age_entropy(self, wallet: Dict) -> float:
         """Calculate UTXO age distribution entropy"""
@@ -256,20 +973,14 @@ class EnterpriseWalletClusterer:
         time_span = wallet.get('activity_span_days', 1)
         return tx_count / max(time_span, 1)
     
-    def _calculate_privacy_score(self, transactions: List[Dict]) -> float:
+    def _calculate_privacy_score(self, transactions: List[Dict], primitives: WalletPrimitives) -> float:
         """Calculate privacy-seeking behavior score"""
         if not transactions:
             return 0.0
         
-        privacy_indicators = 0
+        # Multiple outputs of similar size
+        privacy_indicators = primitives.similar_output_count
         for tx in transactions:
-            # Multiple outputs of similar size
-            outputs = tx.get('outputs', [])
-            if len(outputs) > 2:
-                amounts = [out.get('amount', 0) for out in outputs]
-                if len(set(amounts)) < len(amounts) * 0.7:
-                    privacy_indicators += 1
-            
             # High fee for privacy
             fee_rate = tx.get('fee', 0) / max(tx.get('amount', 1), 1)
             if fee_rate > 0.001:  # High fee rate
@@ -277,7 +988,7 @@ class EnterpriseWalletClusterer:
         
         return privacy_indicators / len(transactions)
     
-    def _calculate_institutional_score(self, wallet: Dict) -> float:
+    def _calculate_institutional_score(self, wallet: Dict, primitives: WalletPrimitives) -> float:
         """Calculate institutional behavior score"""
         score = 0.0
         
@@ -287,10 +998,9 @@ class EnterpriseWalletClusterer:
             score += 0.3
         
         # Regular transaction patterns
-        timestamps = wallet.get('transaction_timestamps', [])
-        if len(timestamps) > 10:
-            intervals = np.diff(sorted(timestamps))
-            regularity = 1 - (np.std(intervals) / np.mean(intervals)) if np.mean(intervals) > 0 else 0
+        if primitives.timestamp_count > 10:
+            interval_mean = primitives.interval_mean
+            regularity = 1 - (primitives.interval_std / interval_mean) if interval_mean > 0 else 0
             score += regularity * 0.3
         
         # Exchange interactions
@@ -319,6 +1029,8 @@ class EnterpriseWalletClusterer:
     
     def _dbscan_clustering(self, features: np.ndarray) -> Dict[str, Any]:
         """DBSCAN clustering implementation"""
+        from sklearn.cluster import DBSCAN
+        
         dbscan = DBSCAN(eps=0.5, min_samples=5)
         cluster_labels = dbscan.fit_predict(features)
         
@@ -330,8 +1042,111 @@ class EnterpriseWalletClusterer:
             'parameters': {'eps': 0.5, 'min_samples': 5}
         }
     
+    def _scalable_dbscan_clustering(self, features: np.ndarray, eps: float = 0.5,
+                                    min_samples: int = 5) -> Dict[str, Any]:
+        """DBSCAN with bounded memory for large wallet sets
+        
+        Same density model, parameters and labels as _dbscan_clustering, but
+        neighborhoods are never materialized all at once. Identical rows are
+        collapsed into weighted points. A tree over all standardized feature
+        dimensions prunes almost nothing at eps=0.5, so radius queries run in a
+        k-d tree over the points' projection onto their projection_dims leading
+        principal components. Projecting onto orthonormal axes never lengthens
+        a distance, so every true neighbor is among the candidates; candidates
+        are kept only if their full-dimensional distance is within eps. Queries
+        run in chunks sized from per-point candidate counts so that a chunk
+        holds at most neighbor_budget candidates.
+        
+        All points are queried once to find the core points; only core points
+        are queried again, to link them with a vectorized union-find and to
+        reach border points, each of which joins the lowest-numbered cluster
+        among its core neighbors. Clusters are numbered by their first core
+        row, as sklearn's DBSCAN numbers them.
+        
+        Memory stays linear in the number of wallets. Time is dominated by the
+        radius queries, whose cost grows with the number of wallets within eps
+        of each other, so it rises faster than linearly on dense data;
+        benchmark_scalable_dbscan measures it on synthetic wallets.
+        """
+        from sklearn.neighbors import KDTree
+        
+        points, inverse, weights = np.unique(features, axis=0, return_inverse=True, return_counts=True)
+        inverse = inverse.reshape(-1)
+        
+        # Coordinates along the distinct points' leading principal axes (orthonormal eigenvectors)
+        if points.shape[1] > self.projection_dims:
+            _, axes = np.linalg.eigh(np.cov(points, rowvar=False))
+            projected = points @ axes[:, ::-1][:, :self.projection_dims]
+        else:
+            projected = points
+        tree = KDTree(projected)
+        # Slack so rounding in the projection cannot drop a neighbor at exactly eps
+        radius = eps * (1 + 1e-9)
+        candidate_counts = tree.query_radius(projected, radius, count_only=True)
+        
+        def radius_chunks(indices):
+            """(query points, neighbor indices, owning query point) per chunk of indices"""
+            for chunk in _budget_chunks(indices, candidate_counts[indices], self.neighbor_budget):
+                candidates = tree.query_radius(projected[chunk], radius)
+                lengths = np.fromiter(map(len, candidates), dtype=np.intp, count=len(chunk))
+                neighbors = np.concatenate(candidates).astype(np.intp, copy=False)
+                owners = np.repeat(chunk, lengths)
+                # Exact full-dimensional check, in slices to bound the difference matrix
+                within = np.empty(len(neighbors), dtype=bool)
+                for start in range(0, len(neighbors), 1 << 18):
+                    part = slice(start, start + (1 << 18))
+                    difference = points[neighbors[part]] - points[owners[part]]
+                    within[part] = np.einsum('ij,ij->i', difference, difference) <= eps * eps
+                yield chunk, neighbors[within], owners[within]
+        
+        # Core points: neighborhood weight (self and duplicates included) of at least min_samples
+        all_points = np.arange(len(points))
+        neighbor_weight = np.zeros(len(points), dtype=np.intp)
+        for chunk, neighbors, owners in radius_chunks(all_points):
+            neighbor_weight += np.bincount(owners, weights=weights[neighbors],
+                                           minlength=len(points)).astype(np.intp)
+        core = neighbor_weight >= min_samples
+        
+        # Connect core points that lie within eps of each other, and note which core points
+        # reach each border point (fewer than min_samples each, as border points are not core)
+        parent = all_points.copy()
+        border_pairs = []
+        for chunk, neighbors, owners in radius_chunks(np.flatnonzero(core)):
+            linked = core[neighbors] & (neighbors > owners)
+            _union_pairs(parent, owners[linked], neighbors[linked])
+            reached = ~core[neighbors]
+            border_pairs.append((neighbors[reached], owners[reached]))
+        roots = _find_roots(parent, all_points)
+        
+        # Number clusters by their first core row, as sklearn's DBSCAN does
+        point_labels = np.full(len(points), -1, dtype=np.intp)
+        core_rows = np.flatnonzero(core[inverse])
+        cluster_roots, first = np.unique(roots[inverse[core_rows]], return_index=True)
+        root_labels = np.full(len(points), -1, dtype=np.intp)
+        root_labels[cluster_roots[np.argsort(core_rows[first], kind='stable')]] = np.arange(len(cluster_roots))
+        point_labels[core] = root_labels[roots[core]]
+        
+        # Border points join the first-numbered cluster that reaches them
+        nearest_cluster = np.full(len(points), len(cluster_roots), dtype=np.intp)
+        for border, reaching in border_pairs:
+            np.minimum.at(nearest_cluster, border, point_labels[reaching])
+        border = np.flatnonzero(nearest_cluster < len(cluster_roots))
+        point_labels[border] = nearest_cluster[border]
+        
+        cluster_labels = point_labels[inverse]
+        return {
+            'algorithm': 'scalable_dbscan',
+            'labels': cluster_labels.tolist(),
+            'n_clusters': len(cluster_roots),
+            'n_outliers': int(np.count_nonzero(cluster_labels == -1)),
+            'parameters': {'eps': eps, 'min_samples': min_samples, 'neighbor_budget': self.neighbor_budget,
+                           'projection_dims': self.projection_dims}
+        }
+    
     def _kmeans_clustering(self, features: np.ndarray, n_clusters: int = 8) -> Dict[str, Any]:
         """K-means clustering implementation"""
+        from sklearn.cluster import KMeans
+        
         kmeans = KMeans(n_clusters=n_clusters, random_state=42)
         cluster_labels = kmeans.fit_predict(features)
         
@@ -358,39 +1173,65 @@ class EnterpriseWalletClusterer:
             'parameters': {'n_clusters': 8, 'linkage': 'ward'}
         }
     
-    def _analyze_clusters(self, wallet_data: List[Dict], clusters: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze cluster characteristics"""
-        cluster_labels = clusters['labels']
+    def _analyze_clusters(self, wallet_data: List[Dict], clusters: Dict[str, Any],
+                          primitives: Optional[List[Optional[WalletPrimitives]]] = None) -> Dict[str, Any]:
+        """Analyze cluster characteristics
+        
+        Labels are grouped once with a stable argsort, entity types and risk
+        scores are computed once per clustered wallet, and per-cluster totals,
+        means and dominant entity types come from segmented reductions, so
+        the analysis is linear in the number of wallets.
+        """
+        labels = np.asarray(clusters['labels'])
         analysis = {}
         
-        for cluster_id in set(cluster_labels):
-            if cluster_id == -1:  # Outliers in DBSCAN
-                continue
-            
-            cluster_wallets = [wallet_data[i] for i, label in enumerate(cluster_labels) if label == cluster_id]
-            
-            # Calculate cluster statistics
-            total_volume = sum(w.get('total_volume', 0) for w in cluster_wallets)
-            avg_tx_count = np.mean([w.get('transaction_count', 0) for w in cluster_wallets])
-            avg_balance = np.mean([w.get('balance', 0) for w in cluster_wallets])
-            
-            # Entity classification
-            entity_types = [self.entity_classifier.classify(w) for w in cluster_wallets]
-            dominant_entity = max(set(entity_types), key=entity_types.count) if entity_types else 'unknown'
-            
-            # Risk assessment
-            risk_scores = [self.risk_analyzer.calculate_risk(w) for w in cluster_wallets]
-            avg_risk = np.mean(risk_scores)
-            
+        # Outliers in DBSCAN (-1) are not analyzed
+        members = np.flatnonzero(labels != -1)
+        if len(members) == 0:
+            return analysis
+        order = members[np.argsort(labels[members], kind='stable')]
+        cluster_ids, starts, sizes = np.unique(labels[order], return_index=True, return_counts=True)
+        segment_ids = np.repeat(np.arange(len(cluster_ids)), sizes)
+        
+        wallets = [wallet_data[i] for i in order.tolist()]
+        if primitives is None:
+            primitives = [None] * len(wallet_data)
+        wallet_primitives = [primitives[i] if primitives[i] is not None
+                             else WalletPrimitives.from_wallet(wallet_data[i]) for i in order.tolist()]
+        
+        # Calculate cluster statistics
+        volumes = np.array([w.get('total_volume', 0) for w in wallets], dtype=float)
+        tx_counts = np.array([w.get('transaction_count', 0) for w in wallets], dtype=float)
+        balances = np.array([w.get('balance', 0) for w in wallets], dtype=float)
+        total_volume = _segment_sequential_sum(volumes, sizes)
+        avg_tx_count = _segment_sum(tx_counts, sizes) / sizes
+        avg_balance = _segment_sum(balances, sizes) / sizes
+        
+        # Entity classification (ties go to the earlier rule)
+        entity_types = list(self.entity_classifier.entity_rules) + ['unknown']
+        entity_codes = {entity_type: code for code, entity_type in enumerate(entity_types)}
+        codes = np.array([entity_codes[self.entity_classifier.classify(w, p)]
+                          for w, p in zip(wallets, wallet_primitives)], dtype=np.intp)
+        entity_counts = np.bincount(segment_ids * len(entity_types) + codes,
+                                    minlength=len(cluster_ids) * len(entity_types))
+        dominant_entities = entity_counts.reshape(len(cluster_ids), len(entity_types)).argmax(axis=1)
+        
+        # Risk assessment
+        risk_scores = np.array([self.risk_analyzer.calculate_risk(w, p)
+                                for w, p in zip(wallets, wallet_primitives)], dtype=float)
+        avg_risk = _segment_sum(risk_scores, sizes) / sizes
+        
+        for j, cluster_id in enumerate(cluster_ids.tolist()):
+            start, size = int(starts[j]), int(sizes[j])
             analysis[f'cluster_{cluster_id}'] = {
-                'size': len(cluster_wallets),
-                'total_volume': total_volume,
-                'avg_transaction_count': avg_tx_count,
-                'avg_balance': avg_balance,
-                'dominant_entity_type': dominant_entity,
-                'avg_risk_score': avg_risk,
-                'risk_level': self._categorize_risk(avg_risk),
-                'wallet_addresses': [w.get('address') for w in cluster_wallets[:10]]  # Sample addresses
+                'size': size,
+                'total_volume': float(total_volume[j]),
+                'avg_transaction_count': avg_tx_count[j],
+                'avg_balance': avg_balance[j],
+                'dominant_entity_type': entity_types[dominant_entities[j]],
+                'avg_risk_score': avg_risk[j],
+                'risk_level': self._categorize_risk(avg_risk[j]),
+                'wallet_addresses': [w.get('address') for w in wallets[start:start + min(size, 10)]]  # Sample addresses
             }
         
         return analysis
@@ -477,14 +1318,16 @@ class EntityClassifier:
             'retail': self._is_retail
         }
     
-    def classify(self, wallet: Dict) -> str:
+    def classify(self, wallet: Dict, primitives: Optional[WalletPrimitives] = None) -> str:
         """Classify wallet entity type"""
+        if primitives is None:
+            primitives = WalletPrimitives.from_wallet(wallet)
         for entity_type, rule_func in self.entity_rules.items():
-            if rule_func(wallet):
+            if rule_func(wallet, primitives):
                 return entity_type
         return 'unknown'
     
-    def _is_exchange(self, wallet: Dict) -> bool:
+    def _is_exchange(self, wallet: Dict, primitives: WalletPrimitives) -> bool:
         """Check if wallet belongs to an exchange"""
         tx_count = wallet.get('transaction_count', 0)
         unique_counterparties = len(wallet.get('counterparties', []))
@@ -493,31 +1336,22 @@ class EntityClassifier:
                 unique_counterparties > 500 and
                 unique_counterparties / tx_count > 0.3)
     
-    def _is_mixer(self, wallet: Dict) -> bool:
+    def _is_mixer(self, wallet: Dict, primitives: WalletPrimitives) -> bool:
         """Check if wallet is a mixer"""
-        transactions = wallet.get('transactions', [])
-        if not transactions:
+        if not primitives.transaction_count:
             return False
         
-        # Look for mixing patterns
-        equal_output_count = 0
-        for tx in transactions:
-            outputs = tx.get('outputs', [])
-            if len(outputs) > 2:
-                amounts = [out.get('amount', 0) for out in outputs]
-                if len(set(amounts)) < len(amounts) * 0.5:
-                    equal_output_count += 1
-        
-        return equal_output_count / len(transactions) > 0.3
+        # Look for mixing patterns (equal-output transactions)
+        return primitives.mixing_score() > 0.3
     
-    def _is_whale(self, wallet: Dict) -> bool:
+    def _is_whale(self, wallet: Dict, primitives: WalletPrimitives) -> bool:
         """Check if wallet is a whale"""
         balance = wallet.get('balance', 0)
         avg_tx_value = wallet.get('total_volume', 0) / max(wallet.get('transaction_count', 1), 1)
         
         return balance > 1000 or avg_tx_value > 100  # 1000+ BTC or 100+ BTC avg tx
     
-    def _is_miner(self, wallet: Dict) -> bool:
+    def _is_miner(self, wallet: Dict, primitives: WalletPrimitives) -> bool:
         """Check if wallet belongs to a miner"""
         transactions = wallet.get('transactions', [])
         if not transactions:
@@ -525,11 +1359,11 @@ class EntityClassifier:
         
         # Look for coinbase transactions and regular patterns
         coinbase_count = sum(1 for tx in transactions if tx.get('is_coinbase', False))
-        regular_intervals = self._has_regular_intervals(wallet.get('transaction_timestamps', []))
+        regular_intervals = self._has_regular_intervals(primitives)
         
         return coinbase_count > 0 or regular_intervals
     
-    def _is_institutional(self, wallet: Dict) -> bool:
+    def _is_institutional(self, wallet: Dict, primitives: WalletPrimitives) -> bool:
         """Check if wallet is institutional"""
         balance = wallet.get('balance', 0)
         tx_count = wallet.get('transaction_count', 0)
@@ -537,27 +1371,29 @@ class EntityClassifier:
         # Large balance with moderate activity
         return balance > 500 and tx_count > 50 and tx_count < 1000
     
-    def _is_retail(self, wallet: Dict) -> bool:
+    def _is_retail(self, wallet: Dict, primitives: WalletPrimitives) -> bool:
         """Check if wallet is retail"""
         balance = wallet.get('balance', 0)
         tx_count = wallet.get('transaction_count', 0)
         
         return balance < 10 and tx_count < 100
     
-    def _has_regular_intervals(self, timestamps: List[int]) -> bool:
+    def _has_regular_intervals(self, primitives: WalletPrimitives) -> bool:
         """Check for regular transaction intervals"""
-        if len(timestamps) < 5:
+        if primitives.timestamp_count < 5:
             return False
         
-        intervals = np.diff(sorted(timestamps))
-        cv = np.std(intervals) / np.mean(intervals) if np.mean(intervals) > 0 else float('inf')
+        interval_mean = primitives.interval_mean
+        cv = primitives.interval_std / interval_mean if interval_mean > 0 else float('inf')
         return cv < 0.3  # Low coefficient of variation indicates regularity
 
 class RiskAnalyzer:
     """Enterprise risk analysis"""
     
-    def calculate_risk(self, wallet: Dict) -> float:
+    def calculate_risk(self, wallet: Dict, primitives: Optional[WalletPrimitives] = None) -> float:
         """Calculate comprehensive risk score"""
+        if primitives is None:
+            primitives = WalletPrimitives.from_wallet(wallet)
         risk_factors = []
         
         # Volume-based risk
@@ -568,51 +1404,29 @@ class RiskAnalyzer:
             risk_factors.append(0.1)
         
         # Privacy-seeking behavior
-        transactions = wallet.get('transactions', [])
-        if transactions:
-            mixing_score = self._calculate_mixing_score(transactions)
+        if primitives.transaction_count:
+            mixing_score = primitives.mixing_score()
             risk_factors.append(mixing_score * 0.4)
         
         # Suspicious patterns
-        suspicious_score = self._calculate_suspicious_patterns(wallet)
+        suspicious_score = self._calculate_suspicious_patterns(primitives)
         risk_factors.append(suspicious_score * 0.3)
         
         # Combine risk factors
         total_risk = sum(risk_factors)
         return min(total_risk, 1.0)
     
-    def _calculate_mixing_score(self, transactions: List[Dict]) -> float:
-        """Calculate mixing behavior score"""
-        if not transactions:
-            return 0.0
-        
-        mixing_indicators = 0
-        for tx in transactions:
-            outputs = tx.get('outputs', [])
-            if len(outputs) > 2:
-                amounts = [out.get('amount', 0) for out in outputs]
-                if len(set(amounts)) < len(amounts) * 0.5:
-                    mixing_indicators += 1
-        
-        return mixing_indicators / len(transactions)
-    
-    def _calculate_suspicious_patterns(self, wallet: Dict) -> float:
+    def _calculate_suspicious_patterns(self, primitives: WalletPrimitives) -> float:
         """Calculate suspicious pattern score"""
         score = 0.0
         
         # Rapid transactions
-        timestamps = wallet.get('transaction_timestamps', [])
-        if len(timestamps) > 1:
-            intervals = np.diff(sorted(timestamps))
-            rapid_count = sum(1 for interval in intervals if interval < 3600)  # < 1 hour
-            score += (rapid_count / len(intervals)) * 0.5
+        if primitives.timestamp_count > 1:
+            score += primitives.rapid_ratio() * 0.5  # < 1 hour apart
         
-        # Unusual amounts
-        transactions = wallet.get('transactions', [])
-        if transactions:
-            amounts = [tx.get('amount', 0) for tx in transactions]
-            round_amounts = sum(1 for amount in amounts if amount % 100000000 == 0)
-            score += (round_amounts / len(amounts)) * 0.3
+        # Unusual amounts (whole BTC)
+        if primitives.transaction_count:
+            score += primitives.round_ratio() * 0.3
         
         return min(score, 1.0)
 
@@ -620,7 +1434,15 @@ class FlowTracker:
     """Enterprise fund flow tracking"""
     
     def __init__(self):
-        self.flow_graph = nx.DiGraph()
+        self._flow_graph = None
+    
+    @property
+    def flow_graph(self):
+        """Fund flow graph, created (and networkx imported) on first use"""
+        if self._flow_graph is None:
+            import networkx as nx
+            self._flow_graph = nx.DiGraph()
+        return self._flow_graph
     
     def track_flows(self, transactions: List[Dict]) -> Dict[str, Any]:
         """Track fund flows between wallets"""
@@ -681,6 +1503,8 @@ class FlowTracker:
     
     def _analyze_patterns(self) -> Dict[str, Any]:
         """Analyze flow patterns"""
+        import networkx as nx
+        
         patterns = {
             'cycles': len(list(nx.simple_cycles(self.flow_graph))),
             'strongly_connected_components': nx.number_strongly_connected_components(self.flow_graph),
@@ -689,8 +1513,136 @@ class FlowTracker:
         
         return patterns
 
+def _synthetic_wallets(n_wallets: int, seed: int = 42) -> List[Dict]:
+    """Mock wallets with a few transactions, timestamps, counterparties and UTXOs each"""
+    rng = np.random.default_rng(seed)
+    wallets = []
+    for i in range(n_wallets):
+        n_tx = int(rng.integers(2, 16))
+        amounts = rng.lognormal(15, 2, n_tx).astype(np.int64)
+        output_counts = rng.integers(1, 6, n_tx)
+        timestamps = 1640995200 + np.cumsum(rng.exponential(86400, n_tx)).astype(np.int64)
+        wallets.append({
+            'address': f'bc1q{i:040x}',
+            'balance': float(rng.lognormal(3, 2)),
+            'transaction_count': n_tx,
+            'total_volume': float(amounts.sum() / 1e8),
+            'activity_span_days': int((timestamps[-1] - timestamps[0]) // 86400) + 1,
+            'transaction_timestamps': timestamps.tolist(),
+            'counterparties': [f'addr_{j}' for j in rng.integers(0, 5000, n_tx).tolist()],
+            'transactions': [
+                {
+                    'amount': int(amounts[k]),
+                    'fee': int(rng.integers(200, 20000)),
+                    'input_count': int(rng.integers(1, 5)),
+                    'output_count': int(output_counts[k]),
+                    'outputs': [{'amount': int(a)} for a in rng.integers(1, 4, output_counts[k]) * 100000]
+                }
+                for k in range(n_tx)
+            ],
+            'utxos': [{'created_at': int(t)} for t in timestamps[-3:]]
+        })
+    return wallets
+
+def benchmark_feature_workers(n_wallets: int = 200000, worker_counts: Tuple[int, ...] = (1, 2, 4, 8, 16, 32),
+                              chunk_size: int = 10000, seed: int = 42) -> Dict[str, Any]:
+    """Time feature extraction on synthetic wallets for each worker count
+    
+    Reports wall time, wallets per second and speedup over one worker, and
+    checks that every parallel feature matrix equals the single-process one.
+    Counts above os.cpu_count() are still run, oversubscribed.
+    """
+    wallets = _synthetic_wallets(n_wallets, seed)
+    clusterer = EnterpriseWalletClusterer("benchmark")
+    clusterer.chunk_size = chunk_size
+    
+    runs = []
+    baseline = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        features, _ = clusterer._extract_batch_features(wallets, workers)
+        seconds = time.perf_counter() - start
+        if baseline is None:
+            baseline = (features, seconds)
+        runs.append({
+            'workers': workers,
+            'seconds': seconds,
+            'wallets_per_second': n_wallets / seconds,
+            'speedup': baseline[1] / seconds,
+            'matches_single_process': bool(np.array_equal(features, baseline[0]))
+        })
+    
+    return {
+        'wallets': n_wallets,
+        'chunk_size': chunk_size,
+        'cpu_count': os.cpu_count(),
+        'runs': runs
+    }
+
+def benchmark_scalable_dbscan(n_wallets: int = 1000000, chunk_size: int = 10000,
+                              compare_limit: int = 50000, seed: int = 42) -> Dict[str, Any]:
+    """Time scalable_dbscan on the standardized features of synthetic wallets
+    
+    Wallets are generated and featurized chunk_size at a time, so only the
+    feature matrix is held in memory. Reports feature and clustering wall
+    time and the process's peak RSS, and for at most compare_limit wallets
+    checks that the labels equal sklearn's DBSCAN.
+    """
+    import resource
+    from sklearn.preprocessing import StandardScaler
+    
+    engine = ColumnarFeatureEngine()
+    current_time = 1700000000.0
+    start = time.perf_counter()
+    features = np.vstack([
+        engine.extract(_synthetic_wallets(min(chunk_size, n_wallets - offset), seed + offset), current_time)
+        for offset in range(0, n_wallets, chunk_size)
+    ])
+    features = StandardScaler().fit_transform(features)
+    feature_seconds = time.perf_counter() - start
+    
+    clusterer = EnterpriseWalletClusterer("benchmark")
+    start = time.perf_counter()
+    clusters = clusterer._scalable_dbscan_clustering(features)
+    clustering_seconds = time.perf_counter() - start
+    
+    report = {
+        'wallets': n_wallets,
+        'feature_seconds': feature_seconds,
+        'clustering_seconds': clustering_seconds,
+        'wallets_per_second': n_wallets / clustering_seconds,
+        'n_clusters': clusters['n_clusters'],
+        'n_outliers': clusters['n_outliers'],
+        'parameters': clusters['parameters'],
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+    if n_wallets <= compare_limit:
+        from sklearn.cluster import DBSCAN
+        labels = DBSCAN(eps=0.5, min_samples=5).fit_predict(features)
+        report['matches_dbscan'] = bool(np.array_equal(labels, clusters['labels']))
+    return report
+
 # Example usage and testing
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="ChainSignal enterprise wallet clustering")
+    parser.add_argument('--benchmark-workers', action='store_true',
+                        help="time parallel feature extraction for 1-32 workers and exit")
+    parser.add_argument('--benchmark-dbscan', action='store_true',
+                        help="time scalable_dbscan on synthetic wallet features and exit")
+    parser.add_argument('--wallets', type=int, help="synthetic wallets for a benchmark "
+                        "(default 200000 for --benchmark-workers, 1000000 for --benchmark-dbscan)")
+    parser.add_argument('--chunk-size', type=int, default=10000,
+                        help="wallets per worker task (or per feature chunk for --benchmark-dbscan)")
+    args = parser.parse_args()
+    
+    if args.benchmark_workers:
+        print(json.dumps(benchmark_feature_workers(args.wallets or 200000, chunk_size=args.chunk_size), indent=2))
+        raise SystemExit(0)
+    if args.benchmark_dbscan:
+        print(json.dumps(benchmark_scalable_dbscan(args.wallets or 1000000, chunk_size=args.chunk_size), indent=2))
+        raise SystemExit(0)
+    
     # Initialize enterprise clusterer
     clusterer = EnterpriseWalletClusterer("enterprise_123")
     
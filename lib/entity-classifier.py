@@ -1,18 +1,41 @@
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import RandomForestClassifier, IsolationForest
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report
-import joblib
 from datetime import datetime, timedelta
 import json
+import os
+import sys
+
+# Shared modules live next to this script, which is run directly rather than imported as a package
+_LIB_DIR = os.path.dirname(os.path.abspath(__file__))
+if _LIB_DIR not in sys.path:
+    sys.path.insert(0, _LIB_DIR)
+from wallet_feature_store import WalletFeatureStore, running_update
+
+class EntityFeatureStore(WalletFeatureStore):
+    """WalletFeatureStore with the statistics behind EntityClassifier features
+    
+    extract_features takes timing from the transactions themselves, in list
+    order, so intervals between consecutive transactions are folded here
+    alongside the shared per-wallet state.
+    """
+    
+    def _reset_transactions(self, state):
+        super()._reset_transactions(state)
+        state.update(tx_last_timestamp=None, tx_interval_moments=[0, 0.0, 0.0])
+    
+    def _fold_transaction(self, state, tx):
+        super()._fold_transaction(state, tx)
+        if state['tx_last_timestamp'] is not None:
+            running_update(state['tx_interval_moments'], tx['timestamp'] - state['tx_last_timestamp'])
+        state['tx_last_timestamp'] = tx['timestamp']
 
 class EntityClassifier:
-    def __init__(self):
+    def __init__(self, feature_store=None):
+        # Optional EntityFeatureStore, used for address_data that carries an 'address'
+        self.feature_store = feature_store
         self.model = None
-        self.scaler = StandardScaler()
-        self.anomaly_detector = IsolationForest(contamination=0.1, random_state=42)
+        # Created by train_model; sklearn is only imported once training starts
+        self.scaler = None
+        self.anomaly_detector = None
         self.entity_types = [
             'exchange', 'miner', 'mixer', 'gambling', 'darknet', 
             'defi', 'institutional', 'retail', 'unknown'
@@ -20,6 +43,11 @@ class EntityClassifier:
         
     def extract_features(self, address_data):
         """Extract features from address transaction data"""
+        if self.feature_store is not None and address_data.get('address'):
+            return self.extract_features_from_state(
+                address_data, self.feature_store.update(address_data['address'], address_data)
+            )
+        
         features = {}
         
         # Transaction volume features
@@ -42,6 +70,30 @@ class EntityClassifier:
         
         return list(features.values())
     
+    def extract_features_from_state(self, address_data, state):
+        """Same features as extract_features, from EntityFeatureStore statistics"""
+        features = {}
+        
+        features['total_volume'] = address_data['total_received'] + address_data['total_sent']
+        features['avg_tx_size'] = features['total_volume'] / max(address_data['tx_count'], 1)
+        features['volume_ratio'] = address_data['total_sent'] / max(address_data['total_received'], 1)
+        
+        features['activity_span'] = (address_data['last_seen'] - address_data['first_seen']).days
+        features['tx_frequency'] = address_data['tx_count'] / max(features['activity_span'], 1)
+        
+        features['unique_counterparties'] = state['cp_total']
+        features['clustering_coefficient'] = min(state['cp_total'] / 100, 1.0) if state['cp_total'] >= 2 else 0
+        
+        tx_count = state['tx_count']
+        n_intervals, _, interval_m2 = state['tx_interval_moments']
+        features['round_number_ratio'] = state['round_count'] / tx_count if tx_count else 0
+        features['time_pattern_score'] = (
+            1 / (1 + (interval_m2 / n_intervals) / 3600) if tx_count >= 5 and n_intervals else 0
+        )
+        features['consolidation_ratio'] = state['consolidation_count'] / tx_count if tx_count else 0
+        
+        return list(features.values())
+    
     def calculate_clustering_coefficient(self, address_data):
         """Calculate how interconnected the address's counterparties are"""
         counterparties = address_data.get('counterparties', [])
@@ -93,6 +145,13 @@ class EntityClassifier:
     
     def train_model(self, training_data):
         """Train the entity classification model"""
+        # Training-only dependencies, kept out of the classification import path
+        from sklearn.ensemble import RandomForestClassifier, IsolationForest
+        from sklearn.preprocessing import StandardScaler
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import classification_report
+        import joblib
+        
         print("Training entity classification model...")
         
         # Prepare training data
@@ -112,6 +171,7 @@ class EntityClassifier:
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
         # Scale features
+        self.scaler = StandardScaler()
         X_train_scaled = self.scaler.fit_transform(X_train)
         X_test_scaled = self.scaler.transform(X_test)
         
@@ -120,6 +180,7 @@ class EntityClassifier:
         self.model.fit(X_train_scaled, y_train)
         
         # Train anomaly detector
+        self.anomaly_detector = IsolationForest(contamination=0.1, random_state=42)
         self.anomaly_detector.fit(X_train_scaled)
         
         # Evaluate model
@@ -0,0 +1,151 @@
+"""
+Opt-in per-request profiling shared by the Python analytics services
+
+Used by ai-microservice.py (AI_PROFILE / AI_PROFILE_DIR) and
+enterprise-wallet-clustering.py (CLUSTERING_PROFILE / CLUSTERING_PROFILE_DIR).
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class RequestProfiler:
+    """Opt-in cProfile and tracemalloc capture for individual requests
+    
+    Each profiled request writes ``<request_id>.prof`` (pstats format) and
+    ``<request_id>.json`` (wall time, tracemalloc peak and the functions with
+    the highest cumulative time) to output_dir. tracemalloc is process-wide,
+    so one request is profiled at a time and overlapping requests that ask
+    for a profile run unprofiled.
+    
+    ``capture`` suits requests that span threads or an event loop; ``run``
+    profiles a single synchronous call.
+    """
+    
+    TOP_FUNCTIONS = 25
+    
+    def __init__(self, enabled: bool = False, output_dir: Optional[str] = None):
+        import tempfile
+        self.enabled = enabled
+        self.output_dir = output_dir or os.path.join(tempfile.gettempdir(), 'chainsignal-profiles')
+        self._lock = threading.Lock()
+    
+    def capture(self, request_id: str) -> Optional['ProfileCapture']:
+        """Start profiling a request; None if another request is being profiled"""
+        if not self._lock.acquire(blocking=False):
+            logger.warning(f"Profiler busy, request {request_id} runs unprofiled")
+            return None
+        try:
+            capture = ProfileCapture(self, request_id)
+            capture.start()
+            return capture
+        except Exception as e:
+            self._lock.release()
+            logger.error(f"Profiler start error: {e}")
+            return None
+    
+    def run(self, request_id: str, fn: Callable, *args, **kwargs) -> Tuple[Any, Dict[str, Any]]:
+        """Call fn under the profiler, returning (fn result, profile summary)"""
+        capture = self.capture(request_id)
+        if capture is None:
+            return fn(*args, **kwargs), {'error': 'profiler busy'}
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            summary = capture.stop()
+        return result, summary
+
+class ProfileCapture:
+    """One in-progress request profile
+    
+    cProfile only sees the thread that enabled it, so work handed to other
+    threads must go through ``wrap``; those per-thread profiles are merged
+    into the request's profile when it stops.
+    """
+    
+    def __init__(self, profiler: RequestProfiler, request_id: str):
+        self.profiler = profiler
+        self.request_id = re.sub(r'[^A-Za-z0-9_.-]', '_', str(request_id))
+        self._thread_profiles = []
+        self._was_tracing = False
+    
+    def start(self):
+        import cProfile
+        import tracemalloc
+        self._was_tracing = tracemalloc.is_tracing()
+        if not self._was_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._started = time.perf_counter()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+    
+    def wrap(self, fn: Callable) -> Callable:
+        """Wrap fn to be profiled in whichever thread runs it"""
+        def run():
+            import cProfile
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler already covers this thread (e.g. a global one on 3.12+)
+                return fn()
+            try:
+                return fn()
+            finally:
+                profile.disable()
+                self._thread_profiles.append(profile)
+        return run
+    
+    def stop(self) -> Dict[str, Any]:
+        """Stop profiling, write the profile files and return their summary"""
+        import pstats
+        import tracemalloc
+        try:
+            self._profile.disable()
+            wall_time = time.perf_counter() - self._started
+            _, peak = tracemalloc.get_traced_memory()
+            if not self._was_tracing:
+                tracemalloc.stop()
+            
+            stats = pstats.Stats(self._profile)
+            for profile in list(self._thread_profiles):
+                stats.add(profile)
+            
+            os.makedirs(self.profiler.output_dir, exist_ok=True)
+            base_path = os.path.join(self.profiler.output_dir, self.request_id)
+            stats.dump_stats(base_path + '.prof')
+            
+            top = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+            summary = {
+                'request_id': self.request_id,
+                'wall_time_seconds': wall_time,
+                'tracemalloc_peak_bytes': peak,
+                'profile_path': base_path + '.prof',
+                'top_functions': [
+                    {
+                        'function': f"{filename}:{line}({name})",
+                        'calls': calls,
+                        'total_time_seconds': total_time,
+                        'cumulative_time_seconds': cumulative_time
+                    }
+                    for (filename, line, name), (_, calls, total_time, cumulative_time, _) in top[:self.profiler.TOP_FUNCTIONS]
+                ]
+            }
+            with open(base_path + '.json', 'w') as f:
+                json.dump(summary, f, indent=2)
+            
+            logger.info(f"Request profile written to {base_path}.prof")
+            return {key: summary[key] for key in ('request_id', 'wall_time_seconds', 'tracemalloc_peak_bytes', 'profile_path')}
+        
+        except Exception as e:
+            logger.error(f"Profiler stop error: {e}")
+            return {'error': str(e)}
+        finally:
+            self.profiler._lock.release()
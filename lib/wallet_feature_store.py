@@ -0,0 +1,269 @@
+"""
+Incremental per-wallet feature state shared by the Python analytics services
+
+ai-microservice.py, enterprise-wallet-clustering.py and entity-classifier.py
+refresh wallet features from only the history appended since the previous
+refresh. WalletFeatureStore holds the watermark, running-moment and
+persistence logic once; each service subclasses it to fold in the extra
+statistics its features need.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class WalletFeatureStore:
+    """Incrementally maintained per-wallet sufficient statistics
+    
+    A wallet's state holds counts, running moments (Welford) of timestamp
+    intervals and fees, and per-counterparty counts, plus a watermark for
+    each source list: the number of items folded so far and a fingerprint
+    of the last one. ``update`` folds in only the items appended since the
+    previous call, so refreshing a wallet costs O(new transactions). When a
+    list no longer extends its watermark (history rewritten, or timestamps
+    older than the last one folded) that part of the state is rebuilt.
+    
+    Subclasses add statistics by extending the ``_reset_*`` and per-item
+    ``_fold_*`` hooks. States are plain dicts of scalars, tuples and flat
+    lists, dicts and sets, kept in an LRU of max_wallets entries; callers
+    get a snapshot, so they can read it while other threads keep folding
+    into the stored state. With a spill_dir, evicted and flushed states are pickled to one
+    file per wallet there and reloaded on the next update, so they persist
+    across restarts.
+    """
+    
+    LONG_GAP_SECONDS = 86400 * 30
+    
+    def __init__(self, max_wallets: Optional[int] = None, spill_dir: Optional[str] = None):
+        self.max_wallets = max_wallets
+        self.spill_dir = spill_dir
+        self.states: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._dirty = set()  # wallets whose in-memory state is newer than their spill file
+        self._lock = threading.Lock()
+        self.items_folded = 0
+        self.rebuilds = 0
+        self.evictions = 0
+        self.disk_loads = 0
+        
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+    
+    def update(self, wallet_address: str, wallet_data: Dict) -> Dict[str, Any]:
+        """Fold the wallet's new transactions into its state and return a snapshot of it"""
+        with self._lock:
+            state = self._lookup(wallet_address)
+            changed = state is None
+            if state is None:
+                state = self._empty_state()
+            
+            changed |= self._fold_transactions(state, wallet_data.get('transactions', []))
+            changed |= self._fold_timestamps(state, wallet_data.get('transaction_timestamps', []))
+            changed |= self._fold_counterparties(state, wallet_data.get('counterparties', []))
+            if changed:
+                self._dirty.add(wallet_address)
+            self._insert(wallet_address, state)
+            return self._snapshot(state)
+    
+    def get(self, wallet_address: str) -> Optional[Dict[str, Any]]:
+        """Return a snapshot of the wallet's current state without folding anything, None if unknown"""
+        with self._lock:
+            state = self._lookup(wallet_address)
+            return self._snapshot(state) if state is not None else None
+    
+    def flush(self):
+        """Persist every updated wallet state to the spill directory"""
+        with self._lock:
+            if not self.spill_dir:
+                return
+            for wallet_address in self._dirty:
+                self._dump(wallet_address, self.states[wallet_address])
+            self._dirty.clear()
+    
+    def __len__(self) -> int:
+        return len(self.states)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return fold/rebuild/eviction counters and current occupancy"""
+        with self._lock:
+            return {
+                'wallets_in_memory': len(self.states),
+                'items_folded': self.items_folded,
+                'rebuilds': self.rebuilds,
+                'evictions': self.evictions,
+                'disk_loads': self.disk_loads
+            }
+    
+    @staticmethod
+    def _snapshot(state: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of a state that later folds cannot change (its containers hold only immutable values)"""
+        return {key: value.copy() if isinstance(value, (list, dict, set)) else value
+                for key, value in state.items()}
+    
+    def _lookup(self, wallet_address: str) -> Optional[Dict[str, Any]]:
+        state = self.states.get(wallet_address)
+        if state is not None or not self.spill_dir:
+            return state
+        try:
+            with open(self._spill_path(wallet_address), 'rb') as f:
+                state = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Feature state load error for {wallet_address}: {e}")
+            return None
+        self.disk_loads += 1
+        return state
+    
+    def _insert(self, wallet_address: str, state: Dict[str, Any]):
+        """Store a state as most recently used and evict down to max_wallets"""
+        self.states[wallet_address] = state
+        self.states.move_to_end(wallet_address)
+        while self.max_wallets is not None and len(self.states) > max(self.max_wallets, 1):
+            evicted_address, evicted_state = self.states.popitem(last=False)
+            self.evictions += 1
+            if evicted_address in self._dirty:
+                self._dirty.discard(evicted_address)
+                if self.spill_dir:
+                    self._dump(evicted_address, evicted_state)
+    
+    def _spill_path(self, wallet_address: str) -> str:
+        return os.path.join(self.spill_dir, hashlib.sha1(wallet_address.encode()).hexdigest() + '.pkl')
+    
+    def _dump(self, wallet_address: str, state: Dict[str, Any]):
+        # Written to a temporary file and renamed so readers never see a partial state
+        path = self._spill_path(wallet_address)
+        temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path)
+    
+    def _empty_state(self) -> Dict[str, Any]:
+        state = {}
+        self._reset_transactions(state)
+        self._reset_timestamps(state)
+        self._reset_counterparties(state)
+        return state
+    
+    def _reset_transactions(self, state: Dict):
+        state.update(tx_mark=(0, None), tx_count=0, round_count=0, consolidation_count=0,
+                     mixing_count=0, fee_moments=[0, 0.0, 0.0])
+    
+    def _reset_timestamps(self, state: Dict):
+        state.update(ts_mark=(0, None), ts_count=0, last_timestamp=None,
+                     interval_moments=[0, 0.0, 0.0], long_gap_count=0)
+    
+    def _reset_counterparties(self, state: Dict):
+        state.update(cp_mark=(0, None), cp_total=0, cp_counts={})
+    
+    def _fold_transaction(self, state: Dict, tx: Dict):
+        state['tx_count'] += 1
+        if tx.get('amount', 0) % 100000000 == 0:  # Whole BTC
+            state['round_count'] += 1
+        if tx.get('input_count', 0) > tx.get('output_count', 0):
+            state['consolidation_count'] += 1
+        outputs = tx.get('outputs', [])
+        if len(outputs) > 2:
+            amounts = [out.get('amount', 0) for out in outputs]
+            if len(set(amounts)) < len(amounts) * 0.5:  # CoinJoin-like equal outputs
+                state['mixing_count'] += 1
+        fee = tx.get('fee', 0)
+        if fee > 0:
+            running_update(state['fee_moments'], fee)
+    
+    def _fold_timestamp(self, state: Dict, timestamp: float, gap: Optional[float]):
+        """Fold one timestamp; gap is the interval since the previous one (None for the first)"""
+        state['ts_count'] += 1
+        if gap is not None:
+            running_update(state['interval_moments'], gap)
+            if gap > self.LONG_GAP_SECONDS:
+                state['long_gap_count'] += 1
+    
+    def _fold_counterparty(self, state: Dict, address: str):
+        counts = state['cp_counts']
+        counts[address] = counts.get(address, 0) + 1
+        state['cp_total'] += 1
+    
+    def _new_items(self, state: Dict, mark_key: str, items: List) -> Optional[List]:
+        """Items appended since the watermark, or None if the list no longer extends it"""
+        count, fingerprint = state[mark_key]
+        if count > len(items) or (count and item_fingerprint(items[count - 1]) != fingerprint):
+            return None
+        return items[count:]
+    
+    def _fold_transactions(self, state: Dict, transactions: List[Dict]) -> bool:
+        new = self._new_items(state, 'tx_mark', transactions)
+        if new is None:
+            self.rebuilds += 1
+            self._reset_transactions(state)
+            new = transactions
+        if not new:
+            return False
+        
+        for tx in new:
+            self._fold_transaction(state, tx)
+        
+        self.items_folded += len(new)
+        state['tx_mark'] = (len(transactions), item_fingerprint(transactions[-1]))
+        return True
+    
+    def _fold_timestamps(self, state: Dict, timestamps: List) -> bool:
+        new = self._new_items(state, 'ts_mark', timestamps)
+        if new is not None:
+            new = sorted(new)
+            if new and state['last_timestamp'] is not None and new[0] < state['last_timestamp']:
+                new = None  # Intervals are between sorted timestamps, so this needs a rebuild
+        if new is None:
+            self.rebuilds += 1
+            self._reset_timestamps(state)
+            new = sorted(timestamps)
+        if not new:
+            return False
+        
+        last = state['last_timestamp']
+        for timestamp in new:
+            self._fold_timestamp(state, timestamp, None if last is None else timestamp - last)
+            last = timestamp
+        
+        self.items_folded += len(new)
+        state['last_timestamp'] = last
+        state['ts_mark'] = (len(timestamps), item_fingerprint(timestamps[-1]))
+        return True
+    
+    def _fold_counterparties(self, state: Dict, counterparties: List) -> bool:
+        new = self._new_items(state, 'cp_mark', counterparties)
+        if new is None:
+            self.rebuilds += 1
+            self._reset_counterparties(state)
+            new = counterparties
+        if not new:
+            return False
+        
+        for address in new:
+            self._fold_counterparty(state, address)
+        
+        self.items_folded += len(new)
+        state['cp_mark'] = (len(counterparties), item_fingerprint(counterparties[-1]))
+        return True
+
+def running_update(moments: List, value: float):
+    """Welford update of [count, mean, sum of squared deviations] in place"""
+    moments[0] += 1
+    delta = value - moments[1]
+    moments[1] += delta / moments[0]
+    moments[2] += delta * (value - moments[1])
+
+def item_fingerprint(item: Any) -> Any:
+    """Identity of a history item for watermark checks (txid when available)"""
+    if isinstance(item, dict):
+        for key in ('txid', 'hash', 'tx_hash'):
+            if key in item:
+                return item[key]
+        return hashlib.sha1(json.dumps(item, sort_keys=True, default=str).encode()).hexdigest()
+    return item
@@ -0,0 +1,511 @@
+"""
+Behaviour checks for lib/ai-microservice.py
+
+Each test compares an optimized code path against the reference path it
+replaces (or exercises a failure mode) on small synthetic wallets.
+"""
+
+import asyncio
+import importlib.util
+import itertools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+LIB_DIR = Path(__file__).resolve().parent.parent / "lib"
+
+def load_module():
+    """Import ai-microservice.py (the file name is not a valid module name)"""
+    spec = importlib.util.spec_from_file_location("ai_microservice", LIB_DIR / "ai-microservice.py")
+    module = importlib.util.module_from_spec(spec)
+    # Registered so models holding its classes can be pickled to spill files
+    sys.modules["ai_microservice"] = module
+    spec.loader.exec_module(module)
+    return module
+
+ai = load_module()
+
+def synthetic_history(n, seed=0, start=1640995200):
+    """Transactions with a regular daily rhythm and a few outliers"""
+    rng = np.random.default_rng(seed)
+    timestamps = start + np.cumsum(rng.normal(86400, 3600, n)).astype(np.int64)
+    history = []
+    for i in range(n):
+        amount = int(rng.lognormal(17, 0.3))
+        if i % 37 == 36:
+            amount *= 50  # Occasional outlier
+        history.append({
+            'txid': f'{seed}-{i}',
+            'amount': amount,
+            'fee': int(rng.integers(500, 5000)),
+            'timestamp': int(timestamps[i]),
+            'input_count': int(rng.integers(1, 4)),
+            'output_count': int(rng.integers(1, 4)),
+            'counterparty': f'cp{int(rng.integers(0, 20))}'
+        })
+    return history
+
+def synthetic_wallet(seed):
+    """Classifier input assembled from synthetic_history, with outputs and UTXOs"""
+    rng = np.random.default_rng(seed)
+    history = synthetic_history(int(rng.integers(5, 40)), seed)
+    for tx in history:
+        tx['outputs'] = [{'amount': int(a)} for a in rng.integers(1, 3, tx['output_count']) * 100000]
+    timestamps = [tx['timestamp'] for tx in history]
+    return {
+        'transaction_count': len(history),
+        'activity_span_days': (timestamps[-1] - timestamps[0]) // 86400 + 1,
+        'total_volume': sum(tx['amount'] for tx in history) / 1e8,
+        'transaction_timestamps': timestamps,
+        'counterparties': [tx['counterparty'] for tx in history],
+        'known_exchange_addresses': {'cp1', 'cp2'},
+        'transactions': history,
+        'utxos': [{'created_at': timestamp} for timestamp in timestamps[-5:]]
+    }
+
+def trained_classifier(n_wallets=300):
+    """Classifier with a fitted scaler and the sklearn fallback model, plus its training wallets"""
+    from sklearn.linear_model import LogisticRegression
+    
+    classifier = ai.WalletBehaviorClassifier(model_path="models/missing.onnx",
+                                             scaler_path=os.path.join(tempfile.gettempdir(), "missing.scaler.json"))
+    wallets = [synthetic_wallet(seed) for seed in range(n_wallets)]
+    features = classifier.extract_features_batch(wallets)
+    classifier.fit_scaler(features)
+    labels = np.arange(n_wallets) % len(classifier.entity_types)
+    classifier.session = LogisticRegression(max_iter=1000).fit(classifier._scale_features(features), labels)
+    return classifier, wallets
+
+def test_predict_batch_matches_predict():
+    """predict_batch over several chunks returns what predict returns wallet by wallet"""
+    classifier, wallets = trained_classifier()
+    batched = classifier.predict_batch(wallets, chunk_size=64)
+    assert len(batched) == len(wallets)
+    
+    for wallet_data, result in zip(wallets, batched):
+        single = classifier.predict(wallet_data)
+        assert result['entity_type'] == single['entity_type']
+        assert np.isclose(result['risk_score'], single['risk_score'])
+        assert np.allclose(list(result['probabilities'].values()), list(single['probabilities'].values()))
+        assert np.allclose(list(result['features'].values()), list(single['features'].values()))
+    
+    print(f"✅ {len(wallets)} wallets in chunks of 64 match single-wallet predict")
+
+def test_scaler_matches_standard_scaler():
+    """The persisted scaler reloads and transforms like StandardScaler fitted on the same features"""
+    from sklearn.preprocessing import StandardScaler
+    
+    classifier, wallets = trained_classifier()
+    features = classifier.extract_features_batch(wallets)
+    expected = StandardScaler().fit(features.astype(np.float64)).transform(features)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        scaler_path = os.path.join(directory, "wallet_classifier.scaler.json")
+        classifier.save_scaler(scaler_path)
+        loaded = ai.WalletBehaviorClassifier(scaler_path=scaler_path)
+        loaded.load_scaler()
+        assert np.allclose(loaded._scale_features(features), expected, rtol=1e-4, atol=1e-4)
+        
+        # A single wallet is scaled with the training statistics rather than refitted to zeros
+        single = loaded._scale_features(features[:1])
+        assert np.allclose(single, expected[:1], rtol=1e-4, atol=1e-4) and np.any(single != 0)
+        
+        # A missing artifact leaves features unscaled
+        unscaled = ai.WalletBehaviorClassifier(scaler_path=os.path.join(directory, "missing.json"))
+        unscaled.load_scaler()
+        assert np.array_equal(unscaled._scale_features(features), features)
+    
+    print(f"✅ Reloaded scaler matches StandardScaler on {len(features)} wallets")
+
+def test_training_features_match_per_row():
+    """extract_training_features equals extract_anomaly_features against each row's prior history"""
+    detector = ai.AnomalyDetector()
+    history = synthetic_history(200, seed=3)
+    # Out-of-order timestamps and missing fields exercise the running max/min and defaults
+    shuffled = [dict(tx) for tx in history]
+    rng = np.random.default_rng(3)
+    for i in rng.choice(len(shuffled), 20, replace=False):
+        shuffled[i]['timestamp'] -= int(rng.integers(86400, 86400 * 30))
+    for i in rng.choice(len(shuffled), 10, replace=False):
+        shuffled[i].pop('counterparty', None)
+        shuffled[i].pop('fee', None)
+    
+    for name, transactions in (("ordered", history), ("shuffled", shuffled)):
+        features = detector.extract_training_features(transactions)
+        expected = np.vstack([
+            detector.extract_anomaly_features(tx, transactions[:i]) for i, tx in enumerate(transactions)
+        ])
+        assert features.shape == expected.shape
+        assert np.allclose(features, expected, rtol=1e-9, atol=1e-9), name
+        print(f"✅ {name}: {len(transactions)} training rows match the per-row extractor")
+
+def test_detect_batch_matches_per_row():
+    """detect_anomalies_batch scores each transaction as the model scores its per-row features"""
+    history = synthetic_history(200, seed=5)
+    for model_type in ai.AnomalyDetector.MODEL_TYPES:
+        detector = ai.AnomalyDetector(model_type=model_type)
+        assert detector.train_detector('wallet', history[:150]).get('model_trained')
+        batched = detector.detect_anomalies_batch('wallet', history[150:170], history[:150])
+        model, scaler = detector.wallet_model('wallet', 150)
+        
+        for tx, result in zip(history[150:170], batched):
+            row = detector.extract_anomaly_features(tx, history[:150])
+            if model_type == 'isolation_forest':
+                row = scaler.transform(row)
+                score = model.decision_function(row)[0]
+                flagged = model.predict(row)[0] == -1
+            else:
+                score = ai.RUNNING_Z_MODEL.decision_function(model, row)[0]
+                flagged = score < 0
+            assert np.isclose(result['anomaly_score'], score), (model_type, tx['txid'])
+            assert result['is_anomaly'] == flagged, (model_type, tx['txid'])
+        
+        print(f"✅ {model_type}: {len(batched)} batch results match per-row scoring "
+              f"({sum(r['is_anomaly'] for r in batched)} flagged)")
+
+def test_model_store_spill_round_trip():
+    """Models evicted to disk reload unchanged, and a bounded detector scores like an unbounded one"""
+    from sklearn.preprocessing import StandardScaler
+    
+    rng = np.random.default_rng(8)
+    scalers = {f'wallet{i}': StandardScaler().fit(rng.normal(i, 1 + i, (20, 3))) for i in range(5)}
+    with tempfile.TemporaryDirectory() as spill_dir:
+        store = ai.ModelStore('joblib', max_items=2, spill_dir=spill_dir)
+        for key, scaler in scalers.items():
+            store[key] = scaler
+        assert store.stats()['entries_in_memory'] == 2 and store.stats()['evictions'] == 3
+        for key, scaler in scalers.items():
+            assert np.array_equal(store[key].mean_, scaler.mean_) and np.array_equal(store[key].scale_, scaler.scale_)
+        assert store.stats()['disk_loads'] >= 3
+        
+        # Flushed models are found by a new store over the same directory
+        store.flush()
+        reopened = ai.ModelStore('joblib', spill_dir=spill_dir)
+        assert all(np.array_equal(reopened[key].mean_, scaler.mean_) for key, scaler in scalers.items())
+        print(f"✅ {len(scalers)} scalers survive eviction and reopening the spill directory")
+    
+    histories = {f'wallet{seed}': synthetic_history(80, seed) for seed in range(4)}
+    with tempfile.TemporaryDirectory() as spill_dir:
+        bounded = ai.AnomalyDetector(max_models=1, spill_dir=spill_dir)
+        unbounded = ai.AnomalyDetector()
+        for wallet_address, history in histories.items():
+            bounded.train_detector(wallet_address, history[:60])
+            unbounded.train_detector(wallet_address, history[:60])
+        for wallet_address, history in histories.items():
+            expected = unbounded.detect_anomalies_batch(wallet_address, history[60:], history[:60])
+            results = bounded.detect_anomalies_batch(wallet_address, history[60:], history[:60])
+            assert [r['anomaly_score'] for r in results] == [r['anomaly_score'] for r in expected]
+        assert bounded.models.stats()['disk_loads'] >= len(histories) - 1
+        print(f"✅ Detector holding 1 of {len(histories)} models scores like an unbounded one")
+
+def batch_orchestrator():
+    """Orchestrator whose classifier records its predict_batch sizes and whose
+    per-wallet analysis only reports the classification it was given"""
+    orchestrator = ai.AIOrchestrator()
+    classifier, _ = trained_classifier()
+    orchestrator.classifier = classifier
+    orchestrator.batch_sizes = []
+    orchestrator.analyses = {'started': 0, 'finished': 0, 'cancelled': 0}
+    predict_batch = classifier.predict_batch
+    
+    def recording_predict_batch(wallets, **kwargs):
+        orchestrator.batch_sizes.append(len(wallets))
+        return predict_batch(wallets, **kwargs)
+    
+    async def analyze(wallet_address, wallet_data, deadline=None, classification=None):
+        orchestrator.analyses['started'] += 1
+        try:
+            # Staggered, so some analyses are still running when an earlier one finishes
+            await asyncio.sleep(0.002 * (orchestrator.analyses['started'] % 4 + 1))
+        except asyncio.CancelledError:
+            orchestrator.analyses['cancelled'] += 1
+            raise
+        orchestrator.analyses['finished'] += 1
+        return {'wallet_address': wallet_address, 'classification': classification}
+    
+    classifier.predict_batch = recording_predict_batch
+    orchestrator.analyze_wallet_comprehensive = analyze
+    return orchestrator
+
+def test_stale_model_gives_way_only_to_global():
+    """Outgrown or old wallet models keep scoring unless a global model can take over"""
+    history = synthetic_history(80, seed=20)
+    detector = ai.AnomalyDetector()
+    assert detector.train_detector('wallet', history[:20]).get('model_trained')
+    aged = ai.AnomalyDetector(max_model_age=60, max_history_growth=None)
+    assert aged.train_detector('wallet', history[:20]).get('model_trained')
+    aged.models['wallet'].trained_at_ -= 3600
+    
+    # No global model: the stale wallet models are still the best available
+    for name, stale in (("outgrown", detector), ("old", aged)):
+        result = stale.detect_anomaly('wallet', history[50], history[:50])
+        assert result.get('model_scope') == 'wallet', (name, result)
+    
+    # With a global model, stale wallets use it and fresh ones keep their own
+    population = [(f'population{seed}', synthetic_history(60, seed)) for seed in range(30, 35)]
+    for stale in (detector, aged):
+        assert stale.train_global_detector(population).get('model_trained')
+    assert detector.detect_anomaly('wallet', history[50], history[:50])['model_scope'] == 'global'
+    assert aged.detect_anomaly('wallet', history[50], history[:50])['model_scope'] == 'global'
+    assert detector.detect_anomaly('wallet', history[30], history[:30])['model_scope'] == 'wallet'
+    print("✅ Stale models score without a global model and defer to it once trained")
+
+def test_global_model_reloads_when_retrained():
+    """A detector picks up a global model trained or retrained by another process"""
+    with tempfile.TemporaryDirectory() as spill_dir:
+        reader = ai.AnomalyDetector(spill_dir=spill_dir)
+        writer = ai.AnomalyDetector(spill_dir=spill_dir)
+        assert reader.get_global_model() is None
+        
+        features = np.array([[1.0] * len(reader.feature_names)] * 3)
+        sizes = np.array([10, 100, 1000])
+        for trial, seeds in enumerate((range(40, 44), range(50, 56))):
+            time.sleep(0.05)  # Distinct file modification times
+            population = [(f'population{seed}', synthetic_history(60, seed)) for seed in seeds]
+            assert writer.train_global_detector(population).get('model_trained')
+            loaded = reader.get_global_model()
+            assert loaded is not None and reader.get_global_model() is loaded, trial
+            assert ([r['anomaly_score'] for r in reader.score_global(features, sizes)] ==
+                    [r['anomaly_score'] for r in writer.score_global(features, sizes)]), trial
+    print("✅ Global model loaded once trained and reloaded once retrained elsewhere")
+
+def forecast_history(n, seed):
+    """synthetic_history in the forecaster's input format (datetime strings, a volume column)"""
+    return [
+        {'timestamp': datetime.fromtimestamp(tx['timestamp']).isoformat(), 'volume': tx['amount']}
+        for tx in synthetic_history(n, seed)
+    ]
+
+def test_forecast_cache():
+    """Cache hits skip the backend and return copies; retraining invalidates the entry"""
+    forecaster = ai.TimeSeriesForecaster(backend='numpy')
+    predictions = []
+    predict = forecaster.backend.predict
+    def counting_predict(model, periods, include_history=True):
+        predictions.append(periods)
+        return predict(model, periods, include_history)
+    forecaster.backend.predict = counting_predict
+    
+    assert forecaster.train_model('wallet', forecast_history(60, seed=11)).get('volume_model_trained')
+    first = forecaster.forecast('wallet', periods=14)
+    assert len(predictions) == 2
+    first['volume_forecast']['predicted'].clear()
+    first['injected'] = True
+    cached = forecaster.forecast('wallet', periods=14)
+    assert len(predictions) == 2, "cache hit called the backend"
+    assert 'injected' not in cached and len(cached['volume_forecast']['predicted']) > 14
+    forecaster.forecast('wallet', periods=7)
+    assert len(predictions) == 4
+    
+    forecaster.train_model('wallet', forecast_history(90, seed=12))
+    retrained = forecaster.forecast('wallet', periods=14)
+    assert len(predictions) == 6, "retraining did not invalidate the cached forecast"
+    assert retrained['volume_forecast']['predicted'] != cached['volume_forecast']['predicted']
+    print("✅ Cached forecasts skip the backend, come back as copies and expire on retraining")
+
+def test_analyze_wallets_batches():
+    """analyze_wallets classifies in full batches, whatever the concurrency, and cancels on close"""
+    wallets = [(f'wallet{i}', synthetic_wallet(i)) for i in range(200)]
+    
+    orchestrator = batch_orchestrator()
+    async def analyze_all():
+        return [result async for result in orchestrator.analyze_wallets(iter(wallets), concurrency=4, batch_size=16)]
+    results = asyncio.run(analyze_all())
+    orchestrator.stage_executor.shutdown()
+    
+    assert sorted(r['wallet_address'] for r in results) == sorted(address for address, _ in wallets)
+    batch_sizes = list(orchestrator.batch_sizes)
+    assert batch_sizes == [16] * 12 + [8], batch_sizes
+    expected = dict(zip((address for address, _ in wallets),
+                        orchestrator.classifier.predict_batch([wallet for _, wallet in wallets])))
+    assert all(r['classification']['entity_type'] == expected[r['wallet_address']]['entity_type'] for r in results)
+    print(f"✅ {len(results)} wallets analyzed in predict_batch calls of {batch_sizes[0]} "
+          f"(last {batch_sizes[-1]})")
+    
+    orchestrator = batch_orchestrator()
+    consumed = []
+    def feed():
+        for item in wallets:
+            consumed.append(item[0])
+            yield item
+    async def close_early():
+        generator = orchestrator.analyze_wallets(feed(), concurrency=4, batch_size=16)
+        first = await generator.__anext__()
+        await generator.aclose()
+        return first
+    asyncio.run(close_early())
+    orchestrator.stage_executor.shutdown()
+    
+    analyses = orchestrator.analyses
+    assert len(consumed) < len(wallets)
+    assert analyses['cancelled'] > 0 and analyses['started'] == analyses['finished'] + analyses['cancelled']
+    print(f"✅ Closing after one result consumed {len(consumed)} wallets and cancelled "
+          f"{analyses['cancelled']} in-flight analyses")
+
+def test_deadline_returns_partial_results():
+    """Stages past the deadline are reported incomplete; once abandoned stages hold
+    every worker, new requests skip their stages instead of queueing behind them"""
+    orchestrator = ai.AIOrchestrator()
+    release = threading.Event()
+    classification = {'entity_type': 'retail', 'confidence': 0.9, 'risk_score': 0.1}
+    
+    def slow_predict(wallet_data, wallet_address=None):
+        release.wait()
+        return classification
+    orchestrator.classifier.predict = slow_predict
+    wallet_data = {'transaction_history': synthetic_history(5, seed=12)}
+    
+    async def analyze(deadline):
+        return await orchestrator.analyze_wallet_comprehensive('wallet', wallet_data, deadline=deadline)
+    
+    try:
+        for abandoned in range(1, orchestrator.stage_workers):
+            started = time.monotonic()
+            result = asyncio.run(analyze(0.5))
+            assert time.monotonic() - started < 2, abandoned
+            assert result['incomplete_stages'] == ['classification'], result
+            assert 'anomaly_detection' in result and 'risk_summary' in result
+            assert orchestrator.abandoned_stages == abandoned
+        
+        # The last free worker runs the classifier; the queued anomaly stage is cancelled
+        result = asyncio.run(analyze(0.5))
+        assert result['incomplete_stages'] == ['classification', 'anomaly_detection'], result
+        assert orchestrator.abandoned_stages == orchestrator.stage_workers
+        assert orchestrator.skipped_stages == 0
+        
+        # Without a deadline this would wait for the abandoned stages
+        result = asyncio.run(analyze(None))
+        assert result['incomplete_stages'] == ['classification', 'anomaly_detection'], result
+        assert orchestrator.skipped_stages == 2
+    finally:
+        release.set()
+    orchestrator.stage_executor.shutdown(wait=True)
+    assert orchestrator.abandoned_stages == 0
+    print(f"✅ Past the deadline: partial results; with {orchestrator.stage_workers} stages "
+          f"abandoned, new stages skipped")
+
+def test_stream_matches_batch():
+    """Streaming the transactions after training flags them as detect_anomaly does"""
+    for model_type in ai.AnomalyDetector.MODEL_TYPES:
+        detector = ai.AnomalyDetector(model_type=model_type)
+        histories = {f'wallet{seed}': synthetic_history(200, seed) for seed in range(3)}
+        for wallet_address, history in histories.items():
+            assert detector.train_detector(wallet_address, history[:150]).get('model_trained')
+        
+        # Interleave the wallets' remaining transactions into one feed
+        feed = [
+            {**history[i], 'wallet_address': wallet_address}
+            for i in range(150, 200) for wallet_address, history in histories.items()
+        ]
+        scorer = ai.StreamingAnomalyScorer(detector, window_size=16)
+        streamed = []
+        for start in range(0, len(feed), scorer.window_size):
+            streamed.extend(scorer.score_window(feed[start:start + scorer.window_size]))
+        
+        positions = {wallet_address: 150 for wallet_address in histories}
+        for tx, result in zip(feed, streamed):
+            wallet_address = tx['wallet_address']
+            history = histories[wallet_address]
+            expected = detector.detect_anomaly(wallet_address, tx, history[:positions[wallet_address]])
+            positions[wallet_address] += 1
+            assert result['is_anomaly'] == expected['is_anomaly'], (model_type, tx['txid'])
+            assert np.isclose(result['anomaly_score'], expected['anomaly_score']), (model_type, tx['txid'])
+        
+        print(f"✅ {model_type}: {len(feed)} streamed transactions match detect_anomaly "
+              f"({sum(r['is_anomaly'] for r in streamed)} flagged)")
+
+def test_stream_survives_corrupt_model():
+    """A wallet whose spill file cannot be loaded goes unscored without ending the stream"""
+    with tempfile.TemporaryDirectory() as spill_dir:
+        detector = ai.AnomalyDetector(spill_dir=spill_dir, model_type='running_z')
+        for wallet_address in ('good', 'broken'):
+            detector.train_detector(wallet_address, synthetic_history(50, seed=len(wallet_address)))
+        detector.models.flush()
+        with open(detector.models._spill_path('broken'), 'wb') as f:
+            f.write(b'not a model, and longer than the original file would be' * 100)
+        
+        scorer = ai.StreamingAnomalyScorer(detector)
+        window = [
+            {**tx, 'wallet_address': wallet_address}
+            for wallet_address in ('good', 'broken') for tx in synthetic_history(5, seed=9)
+        ]
+        results = scorer.score_window(window)
+        assert all('anomaly_score' in r for r in results[:5])
+        assert all('error' in r for r in results[5:])
+        assert scorer.scored == 5 and scorer.unscored == 5
+        print("✅ Corrupt model file: wallet unscored, other wallets scored")
+
+def test_stream_skips_malformed_records():
+    """Records the features cannot be computed from are counted as invalid, not fatal"""
+    detector = ai.AnomalyDetector(model_type='running_z')
+    history = synthetic_history(60, seed=18)
+    detector.train_detector('wallet', history[:50])
+    good = [json.dumps({**tx, 'wallet_address': 'wallet'}) for tx in history[50:]]
+    tx = {**history[50], 'wallet_address': 'wallet'}
+    malformed = [
+        'not json', '[1, 2]', '"a string"', 'null',
+        json.dumps({key: value for key, value in tx.items() if key != 'wallet_address'}),
+        json.dumps({key: value for key, value in tx.items() if key != 'timestamp'}),
+        json.dumps({**tx, 'timestamp': '2022-01-01'}),
+        json.dumps({**tx, 'timestamp': 1e20}),
+        json.dumps({**tx, 'amount': 'lots'}),
+        json.dumps({**tx, 'fee': True}),
+        json.dumps({**tx, 'input_count': [1]}),
+        json.dumps({**tx, 'counterparty': {'a': 1}}),
+    ]
+    lines = [line for pair in itertools.zip_longest(good, malformed) for line in pair if line]
+    
+    scorer = ai.StreamingAnomalyScorer(detector, window_size=4, report_seconds=3600)
+    stats = scorer.run(lines, emit=lambda alert: None)
+    assert stats['invalid'] == len(malformed), stats
+    assert stats['transactions'] == stats['scored'] == len(good), stats
+    print(f"✅ {len(malformed)} malformed records skipped, {len(good)} valid ones scored")
+
+TESTS = [
+    ("Batch classification matches single predictions", test_predict_batch_matches_predict),
+    ("Persisted scaler matches StandardScaler", test_scaler_matches_standard_scaler),
+    ("Single-pass training features match per-row features", test_training_features_match_per_row),
+    ("Batch anomaly detection matches per-row scoring", test_detect_batch_matches_per_row),
+    ("Model store eviction and spill round trip", test_model_store_spill_round_trip),
+    ("Stale wallet models and the global model", test_stale_model_gives_way_only_to_global),
+    ("Global model reload", test_global_model_reloads_when_retrained),
+    ("Forecast result cache", test_forecast_cache),
+    ("Batched wallet analysis and early close", test_analyze_wallets_batches),
+    ("Analysis deadline and abandoned stages", test_deadline_returns_partial_results),
+    ("Streaming scores match batch detect_anomaly", test_stream_matches_batch),
+    ("Streaming with a corrupt model file", test_stream_survives_corrupt_model),
+    ("Streaming skips malformed records", test_stream_skips_malformed_records),
+]
+
+def run_tests():
+    """Run every check and print a report"""
+    print("🤖 AI Microservice Behaviour Checks")
+    print("=" * 50)
+    
+    failures = []
+    for number, (title, test) in enumerate(TESTS, 1):
+        print(f"\n🧪 Test {number}: {title}")
+        try:
+            test()
+        except Exception as e:
+            print(f"❌ Test failed: {type(e).__name__}: {e}")
+            failures.append(title)
+    
+    print("\n" + "=" * 50)
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return False
+    
+    print("🎉 All AI microservice checks passed!")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if run_tests() else 1)
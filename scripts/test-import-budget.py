@@ -0,0 +1,103 @@
+"""
+Cold-start import budget test for the Python analytics modules
+
+Imports each module in lib/ in a fresh interpreter, reports the measured
+import time together with the slowest imports (from ``python -X importtime``)
+and fails if any module exceeds its configured budget.
+
+Budgets can be overridden per module, e.g.:
+    IMPORT_BUDGET_AI_MICROSERVICE=0.5 python3 scripts/test-import-budget.py
+"""
+
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+LIB_DIR = Path(__file__).resolve().parent.parent / "lib"
+
+# Cold-start budget in seconds for each module
+IMPORT_BUDGETS = {
+    "ai-microservice.py": 0.5,
+    "entity-classifier.py": 0.5,
+    "enterprise-wallet-clustering.py": 0.5,
+    "request_profiler.py": 0.5,
+    "wallet_feature_store.py": 0.5,
+}
+
+# Dependencies that must not be imported just by loading a module
+DEFERRED_IMPORTS = {
+    "ai-microservice.py": ["pandas", "prophet", "onnxruntime", "sklearn", "joblib", "aiohttp"],
+    "entity-classifier.py": ["pandas", "sklearn", "joblib"],
+    "enterprise-wallet-clustering.py": ["pandas", "sklearn", "networkx"],
+}
+
+LOADER = """
+import importlib.util, sys, time
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("module_under_test", sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+elapsed = time.perf_counter() - start
+print(f"{elapsed:.6f}")
+print(",".join(sorted(sys.modules)))
+"""
+
+def get_budget(module_name):
+    """Return the configured budget, honouring IMPORT_BUDGET_<MODULE> overrides"""
+    env_name = "IMPORT_BUDGET_" + re.sub(r"\W", "_", module_name[:-3]).upper()
+    return float(os.getenv(env_name, IMPORT_BUDGETS[module_name]))
+
+def measure_import(module_path):
+    """Import a module in a fresh interpreter; return (seconds, loaded modules, top imports)"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", LOADER, str(module_path)],
+        capture_output=True, text=True, check=True
+    )
+    elapsed_line, modules_line = proc.stdout.strip().splitlines()[-2:]
+
+    # importtime lines: "import time: self [us] | cumulative | imported package"
+    top_imports = []
+    for line in proc.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(\S.*)", line)
+        if match and not match.group(3).startswith(" "):
+            top_imports.append((int(match.group(2)), match.group(3).strip()))
+    top_imports.sort(reverse=True)
+
+    return float(elapsed_line), set(modules_line.split(",")), top_imports[:5]
+
+def run_tests():
+    """Measure every module against its budget and print a report"""
+    print("🚀 Python Module Cold-Start Import Report")
+    print("=" * 50)
+
+    failures = []
+    for module_name in IMPORT_BUDGETS:
+        budget = get_budget(module_name)
+        elapsed, loaded_modules, top_imports = measure_import(LIB_DIR / module_name)
+
+        status = "✅" if elapsed <= budget else "❌"
+        print(f"\n{status} {module_name}: {elapsed*1000:.1f}ms (budget {budget*1000:.0f}ms)")
+        for cumulative_us, package in top_imports:
+            print(f"    {cumulative_us/1000:8.1f}ms  {package}")
+
+        if elapsed > budget:
+            failures.append(f"{module_name} took {elapsed:.3f}s, budget is {budget:.3f}s")
+
+        eager = [dep for dep in DEFERRED_IMPORTS.get(module_name, []) if dep in loaded_modules]
+        if eager:
+            print(f"❌ {module_name} eagerly imports: {', '.join(eager)}")
+            failures.append(f"{module_name} eagerly imports {', '.join(eager)}")
+
+    print("\n" + "=" * 50)
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return False
+
+    print("🎉 All modules within their cold-start budget!")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if run_tests() else 1)
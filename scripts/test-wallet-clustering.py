@@ -0,0 +1,135 @@
+"""
+Behaviour checks for lib/enterprise-wallet-clustering.py
+
+Each test compares an optimized code path against the reference path it
+replaces on synthetic wallets: the columnar feature engine against the
+per-wallet extractor, pooled extraction against a single process, and
+scalable_dbscan against sklearn's DBSCAN.
+"""
+
+import importlib.util
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+LIB_DIR = Path(__file__).resolve().parent.parent / "lib"
+
+def load_module():
+    """Import enterprise-wallet-clustering.py (the file name is not a valid module name)"""
+    spec = importlib.util.spec_from_file_location("enterprise_wallet_clustering",
+                                                  LIB_DIR / "enterprise-wallet-clustering.py")
+    module = importlib.util.module_from_spec(spec)
+    # Registered so feature pool workers can resolve its functions by name
+    sys.modules["enterprise_wallet_clustering"] = module
+    spec.loader.exec_module(module)
+    return module
+
+clustering = load_module()
+
+# Column of the UTXO age entropy, which depends on when it is computed
+UTXO_ENTROPY = 14
+
+def varied_wallets(n_wallets, seed=3):
+    """Synthetic wallets plus edge cases: short histories, long and rapid gaps, exchanges, no UTXOs"""
+    wallets = clustering._synthetic_wallets(n_wallets, seed)
+    for i, wallet in enumerate(wallets):
+        timestamps = wallet['transaction_timestamps']
+        if i % 7 == 0:
+            wallet['transaction_timestamps'] = sorted(timestamps + [timestamps[0] + 100, timestamps[-1] + 86400 * 40])
+            wallet['known_exchange_addresses'] = set(wallet['counterparties'][:1])
+        if i % 11 == 0:
+            wallet['transaction_timestamps'] = timestamps[:1]
+            wallet['utxos'] = []
+        if i % 13 == 0:
+            wallet['transactions'] = []
+    return wallets
+
+def test_columnar_matches_per_wallet():
+    """ColumnarFeatureEngine reproduces _wallet_features bit for bit (UTXO entropy up to its clock)"""
+    wallets = varied_wallets(2000)
+    clusterer = clustering.EnterpriseWalletClusterer("test")
+    expected = np.array([clusterer._wallet_features(wallet) for wallet in wallets])
+    features = clustering.ColumnarFeatureEngine().extract(wallets, datetime.now().timestamp())
+    
+    assert features.shape == expected.shape
+    timeless = np.arange(features.shape[1]) != UTXO_ENTROPY
+    assert np.array_equal(features[:, timeless], expected[:, timeless])
+    assert np.allclose(features[:, UTXO_ENTROPY], expected[:, UTXO_ENTROPY])
+    print(f"✅ {len(wallets)} wallets x {features.shape[1]} columnar features match the per-wallet extractor")
+
+def test_parallel_matches_serial():
+    """Pooled extraction writes the same features and primitives as one process"""
+    wallets = varied_wallets(3000)
+    clusterer = clustering.EnterpriseWalletClusterer("test")
+    clusterer.chunk_size = 700
+    features, primitives = clusterer._extract_batch_features(wallets, 1)
+    
+    for workers in (2, 3):
+        parallel_features, parallel_primitives = clusterer._extract_batch_features(wallets, workers)
+        assert np.array_equal(parallel_features[:, :UTXO_ENTROPY], features[:, :UTXO_ENTROPY])
+        assert np.array_equal(parallel_features[:, UTXO_ENTROPY + 1:], features[:, UTXO_ENTROPY + 1:])
+        assert np.allclose(parallel_features[:, UTXO_ENTROPY], features[:, UTXO_ENTROPY])
+        for serial, parallel in zip(primitives, parallel_primitives):
+            assert all(getattr(serial, name) == getattr(parallel, name)
+                       for name in clustering.WalletPrimitives.__slots__)
+        print(f"✅ {workers} workers: {len(wallets)} feature and primitive rows match one process")
+
+def test_scalable_dbscan_matches_dbscan():
+    """scalable_dbscan assigns exactly the labels sklearn's DBSCAN assigns"""
+    from sklearn.cluster import DBSCAN
+    from sklearn.preprocessing import StandardScaler
+    
+    clusterer = clustering.EnterpriseWalletClusterer("test")
+    features = StandardScaler().fit_transform(clustering.ColumnarFeatureEngine().extract(varied_wallets(5000)))
+    result = clusterer._scalable_dbscan_clustering(features)
+    assert np.array_equal(result['labels'], DBSCAN(eps=0.5, min_samples=5).fit_predict(features))
+    print(f"✅ Wallet features: {result['n_clusters']} clusters, {result['n_outliers']} outliers as DBSCAN")
+    
+    # Duplicated rows, tiny neighbor budgets and every projection size down to one axis
+    rng = np.random.default_rng(25)
+    for trial in range(20):
+        dims = int(rng.integers(2, 25))
+        points = rng.normal(size=(int(rng.integers(50, 2000)), dims)) * rng.uniform(0.1, 1, dims)
+        points = np.round(np.vstack([points, points[rng.integers(0, len(points), len(points) // 5)]]),
+                          int(rng.integers(0, 3)))
+        eps, min_samples = float(rng.uniform(0.2, 2)), int(rng.integers(2, 10))
+        clusterer.neighbor_budget = int(rng.integers(1, 500))
+        clusterer.projection_dims = int(rng.integers(1, 10))
+        result = clusterer._scalable_dbscan_clustering(points, eps, min_samples)
+        expected = DBSCAN(eps=eps, min_samples=min_samples).fit_predict(points)
+        assert np.array_equal(result['labels'], expected), (trial, result['parameters'])
+    print("✅ 20 random point sets with duplicates and small budgets match DBSCAN")
+
+TESTS = [
+    ("Columnar features match the per-wallet extractor", test_columnar_matches_per_wallet),
+    ("Parallel feature extraction matches one process", test_parallel_matches_serial),
+    ("Scalable DBSCAN matches DBSCAN", test_scalable_dbscan_matches_dbscan),
+]
+
+def run_tests():
+    """Run every check and print a report"""
+    print("🧭 Wallet Clustering Behaviour Checks")
+    print("=" * 50)
+    
+    failures = []
+    for number, (title, test) in enumerate(TESTS, 1):
+        print(f"\n🧪 Test {number}: {title}")
+        try:
+            test()
+        except Exception as e:
+            print(f"❌ Test failed: {type(e).__name__}: {e}")
+            failures.append(title)
+    
+    print("\n" + "=" * 50)
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return False
+    
+    print("🎉 All wallet clustering checks passed!")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if run_tests() else 1)
@@ -0,0 +1,194 @@
+"""
+Behaviour checks for lib/wallet_feature_store.py
+
+Features computed from incrementally maintained wallet state must equal a
+full recompute, for the AI service's WalletFeatureStore and for the
+clustering and entity classifier subclasses, across LRU eviction, spill
+files and rebuilt histories.
+"""
+
+import importlib.util
+import pickle
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+LIB_DIR = Path(__file__).resolve().parent.parent / "lib"
+
+def load_module(name, file_name):
+    """Import a lib script by path (the file names are not valid module names)"""
+    spec = importlib.util.spec_from_file_location(name, LIB_DIR / file_name)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+clustering = load_module("enterprise_wallet_clustering", "enterprise-wallet-clustering.py")
+ai = load_module("ai_microservice", "ai-microservice.py")
+entity = load_module("entity_classifier", "entity-classifier.py")
+
+def synthetic_wallets(n_wallets):
+    """Clustering's synthetic wallets, with the txids and timestamps every extractor reads"""
+    wallets = clustering._synthetic_wallets(n_wallets)
+    for wallet in wallets:
+        for k, tx in enumerate(wallet['transactions']):
+            tx['txid'] = f"{wallet['address']}-{k}"
+            tx['timestamp'] = wallet['transaction_timestamps'][k]
+    return wallets
+
+def prefix(wallet, n):
+    """The wallet as it looked after its first n transactions"""
+    return {
+        **wallet,
+        'transactions': wallet['transactions'][:n],
+        'transaction_timestamps': wallet['transaction_timestamps'][:n],
+        'counterparties': wallet['counterparties'][:n],
+        'transaction_count': n,
+        'tx_count': n,
+        'total_received': 1e8,
+        'total_sent': 5e7,
+        'first_seen': datetime(2022, 1, 1),
+        'last_seen': datetime(2022, 3, 1)
+    }
+
+# Store-less extractors computing every feature from the full history
+REFERENCE_CLUSTERER = clustering.EnterpriseWalletClusterer("reference")
+REFERENCE_CLASSIFIER = ai.WalletBehaviorClassifier()
+REFERENCE_ENTITIES = entity.EntityClassifier()
+
+class Extractors:
+    """The three services' extractors, each backed by its own feature store"""
+    
+    def __init__(self, spill_dir, max_wallets):
+        self.clusterer = clustering.EnterpriseWalletClusterer(
+            "test", clustering.ClusteringFeatureStore(max_wallets=max_wallets, spill_dir=f"{spill_dir}/clustering"))
+        self.classifier = ai.WalletBehaviorClassifier(
+            feature_store=ai.WalletFeatureStore(max_wallets=max_wallets, spill_dir=f"{spill_dir}/ai"))
+        self.entities = entity.EntityClassifier(
+            entity.EntityFeatureStore(max_wallets=max_wallets, spill_dir=f"{spill_dir}/entity"))
+        self.stores = (self.clusterer.feature_store, self.classifier.feature_store, self.entities.feature_store)
+    
+    def check(self, wallet):
+        """Assert that every store-backed feature vector equals the full recompute"""
+        address = wallet['address']
+        state = self.clusterer.feature_store.update(address, wallet)
+        assert np.allclose(self.clusterer._features_from_state(wallet, state),
+                           REFERENCE_CLUSTERER._wallet_features(wallet)), ('clustering', address)
+        assert np.allclose(self.classifier._feature_values(wallet, address),
+                           REFERENCE_CLASSIFIER._feature_values(wallet)), ('ai', address)
+        without_address = {key: value for key, value in wallet.items() if key != 'address'}
+        assert np.allclose(self.entities.extract_features(wallet),
+                           REFERENCE_ENTITIES.extract_features(without_address)), ('entity', address)
+    
+    def flush(self):
+        """Write every store's updated states to its spill directory"""
+        for store in self.stores:
+            store.flush()
+
+def test_incremental_matches_recompute():
+    """Growing histories folded incrementally, with eviction and spill, match a full recompute"""
+    wallets = synthetic_wallets(30)
+    with tempfile.TemporaryDirectory() as spill_dir:
+        extractors = Extractors(spill_dir, max_wallets=7)
+        for step in (1, 2, 5, None):
+            for wallet in wallets:
+                extractors.check(prefix(wallet, step or len(wallet['transactions'])))
+            extractors.flush()
+        
+        for store in extractors.stores:
+            stats = store.stats()
+            assert stats['evictions'] > 0 and stats['disk_loads'] > 0 and stats['rebuilds'] == 0, stats
+        print(f"✅ {len(wallets)} wallets refreshed 4 times through stores of 7 match the full recompute")
+
+def test_rewritten_history_rebuilds():
+    """Rewritten histories and out-of-order timestamps rebuild the state instead of folding it"""
+    wallets = synthetic_wallets(10)
+    with tempfile.TemporaryDirectory() as spill_dir:
+        extractors = Extractors(spill_dir, max_wallets=None)
+        for wallet in wallets:
+            extractors.check(prefix(wallet, len(wallet['transactions'])))
+        
+        for wallet in wallets:
+            rewritten = prefix(wallet, len(wallet['transactions']))
+            rewritten['transactions'] = [{**tx, 'txid': f"{tx['txid']}-replaced"} for tx in rewritten['transactions']]
+            rewritten['transaction_timestamps'] = rewritten['transaction_timestamps'] + [1600000000]
+            rewritten['counterparties'] = rewritten['counterparties'][1:]
+            extractors.check(rewritten)
+        
+        for store in extractors.stores:
+            assert store.stats()['rebuilds'] == 3 * len(wallets), store.stats()
+        print(f"✅ {len(wallets)} rewritten wallets rebuilt and match the full recompute")
+
+def test_spilled_state_survives_restart():
+    """Flushed states reload in new stores and keep folding from their watermark"""
+    wallets = synthetic_wallets(12)
+    with tempfile.TemporaryDirectory() as spill_dir:
+        extractors = Extractors(spill_dir, max_wallets=None)
+        for wallet in wallets:
+            extractors.check(prefix(wallet, 1))
+        extractors.flush()
+        
+        restarted = Extractors(spill_dir, max_wallets=None)
+        for wallet in wallets:
+            restarted.check(prefix(wallet, len(wallet['transactions'])))
+        
+        for store in restarted.stores:
+            stats = store.stats()
+            assert stats['disk_loads'] == len(wallets) and stats['rebuilds'] == 0, stats
+        print(f"✅ {len(wallets)} wallets resumed from spill files after a restart")
+
+def test_returned_state_is_a_snapshot():
+    """States handed to callers neither change with later folds nor write back into the store"""
+    wallets = synthetic_wallets(5)
+    with tempfile.TemporaryDirectory() as spill_dir:
+        extractors = Extractors(spill_dir, max_wallets=None)
+        for wallet in wallets:
+            for store in extractors.stores:
+                early = store.update(wallet['address'], prefix(wallet, 2))
+                frozen = pickle.loads(pickle.dumps(early))
+                store.update(wallet['address'], prefix(wallet, len(wallet['transactions'])))
+                assert early == frozen, type(store).__name__
+                
+                current = store.get(wallet['address'])
+                for value in current.values():
+                    if isinstance(value, (list, dict, set)):
+                        value.clear()
+                assert store.get(wallet['address']) != current, type(store).__name__
+            extractors.check(prefix(wallet, len(wallet['transactions'])))
+        print(f"✅ {len(wallets)} wallets: snapshots from update and get are detached from the stores")
+
+TESTS = [
+    ("Incremental features match a full recompute", test_incremental_matches_recompute),
+    ("Rewritten histories rebuild the state", test_rewritten_history_rebuilds),
+    ("Spilled state survives a restart", test_spilled_state_survives_restart),
+    ("Returned states are snapshots", test_returned_state_is_a_snapshot),
+]
+
+def run_tests():
+    """Run every check and print a report"""
+    print("🗃️ Wallet Feature Store Behaviour Checks")
+    print("=" * 50)
+    
+    failures = []
+    for number, (title, test) in enumerate(TESTS, 1):
+        print(f"\n🧪 Test {number}: {title}")
+        try:
+            test()
+        except Exception as e:
+            print(f"❌ Test failed: {type(e).__name__}: {e}")
+            failures.append(title)
+    
+    print("\n" + "=" * 50)
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return False
+    
+    print("🎉 All wallet feature store checks passed!")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if run_tests() else 1)